@@ -1,138 +1,29 @@
-import gradio as gr
+import os
+from suggestion_engine import LIFESTYLE_LOOKUP
 
+# Gradio queue: submissions waiting at once are evaluated together, up to MAX_BATCH_SIZE per call
+MAX_BATCH_SIZE = int(os.environ.get("GRADIO_MAX_BATCH_SIZE", "64"))
+CONCURRENCY_LIMIT = int(os.environ.get("GRADIO_CONCURRENCY_LIMIT", "4"))
+QUEUE_MAX_SIZE = int(os.environ.get("GRADIO_QUEUE_MAX_SIZE", "1000"))
 
-def suggest_health(age, physical_activity_level, stress_level, gender, heart_rate, blood_pressure, sleep_disorder, bmi_category, daily_steps):
-	suggestions = []
-	risk_factors = []
-	positive_factors = []
-
-	try:
-		heart_rate_val = float(heart_rate) if heart_rate else None
-	except Exception:
-		heart_rate_val = None
-	try:
-		bp_val = float(blood_pressure) if blood_pressure else None
-	except Exception:
-		bp_val = None
-	try:
-		steps_val = float(daily_steps) if daily_steps else None
-	except Exception:
-		steps_val = None
-
-	# Age-based recommendations
-	if age is not None:
-		if age <= 12:
-			suggestions.append("👶 **Child Health Focus**: Ensure 9-12 hours of sleep, limit screen time to 2 hours/day, and encourage 60+ minutes of physical activity.")
-			if physical_activity_level and physical_activity_level <= 2:
-				suggestions.append("🏃 **Activity Boost**: Encourage outdoor play, sports, or active games. Consider family activities like hiking or cycling.")
-		elif age <= 18:
-			suggestions.append("🧑‍🎓 **Teen Health**: Focus on consistent sleep schedule (8-10 hours), balanced nutrition, and stress management during academic periods.")
-		elif age <= 30:
-			suggestions.append("💪 **Young Adult**: Build healthy habits now! Focus on regular exercise, stress management, and preventive healthcare.")
-		elif age <= 50:
-			suggestions.append("👨‍💼 **Mid-Life Health**: Prioritize cardiovascular health, maintain muscle mass through strength training, and manage work-life balance.")
-		else:
-			suggestions.append("🧓 **Senior Health**: Focus on bone health, cognitive stimulation, social connections, and regular health screenings.")
-
-	# Physical Activity Analysis
-	if physical_activity_level is not None:
-		if physical_activity_level <= 2:
-			risk_factors.append("Low physical activity")
-			suggestions.append("🚶 **Activity Recommendation**: Start with 10-minute walks, gradually increase to 150 minutes/week of moderate activity.")
-			suggestions.append("💡 **Quick Tips**: Take stairs, park farther away, do desk exercises, or try home workout videos.")
-		elif physical_activity_level <= 5:
-			suggestions.append("👍 **Good Start**: You're moderately active! Consider adding strength training 2x/week and increasing intensity gradually.")
-		elif physical_activity_level <= 8:
-			suggestions.append("🏆 **Excellent Activity Level**: Great job! Maintain your routine and consider adding variety with different activities.")
-		else:
-			suggestions.append("🔥 **High Activity**: Outstanding! Ensure proper recovery, nutrition, and listen to your body to prevent overtraining.")
-
-	# Stress Management
-	if stress_level is not None:
-		if stress_level >= 8:
-			risk_factors.append("High stress level")
-			suggestions.append("😰 **High Stress Alert**: Consider professional help, practice daily meditation, deep breathing, or progressive muscle relaxation.")
-			suggestions.append("🌱 **Stress Relief**: Try yoga, nature walks, journaling, or hobbies. Limit caffeine and ensure adequate sleep.")
-		elif stress_level >= 6:
-			suggestions.append("⚠️ **Moderate Stress**: Practice stress management techniques like mindfulness, regular breaks, and time management.")
-		elif stress_level <= 3:
-			positive_factors.append("Low stress level")
-			suggestions.append("😊 **Great Stress Management**: Keep up your stress management practices!")
-
-	# Sleep Disorder Management
-	if isinstance(sleep_disorder, str) and sleep_disorder.strip():
-		sleep_disorder_lower = sleep_disorder.lower()
-		if "insomnia" in sleep_disorder_lower:
-			risk_factors.append("Insomnia")
-			suggestions.append("😴 **Insomnia Management**: Maintain consistent sleep schedule, limit caffeine after 2 PM, create dark/cool bedroom environment.")
-			suggestions.append("🍯 **Sleep Hygiene**: Avoid screens 1 hour before bed, try chamomile tea, warm bath, or light reading.")
-		elif "apnea" in sleep_disorder_lower:
-			risk_factors.append("Sleep apnea")
-			suggestions.append("🫁 **Sleep Apnea**: Consult a sleep specialist. Consider weight management, avoid alcohol before bed, and sleep on your side.")
-		elif "none" not in sleep_disorder_lower:
-			suggestions.append("🛌 **Sleep Health**: Maintain regular sleep schedule, 7-9 hours nightly, and create a relaxing bedtime routine.")
-
-	# Cardiovascular Health
-	if heart_rate_val is not None:
-		if heart_rate_val > 100:
-			risk_factors.append("Elevated heart rate")
-			suggestions.append("💓 **Heart Rate Alert**: Resting HR >100 may indicate stress, dehydration, or medical condition. Monitor and consult healthcare provider.")
-		elif heart_rate_val < 60:
-			suggestions.append("💪 **Athletic Heart**: Low resting HR can indicate good fitness, but consult doctor if experiencing symptoms.")
-		else:
-			positive_factors.append("Normal heart rate")
-
-	if bp_val is not None:
-		if bp_val > 140:
-			risk_factors.append("High blood pressure")
-			suggestions.append("🩸 **High Blood Pressure**: Reduce sodium intake, increase potassium-rich foods, regular exercise, and consult healthcare provider.")
-		elif bp_val > 120:
-			risk_factors.append("Elevated blood pressure")
-			suggestions.append("⚠️ **Pre-Hypertension**: Focus on DASH diet, weight management, stress reduction, and regular monitoring.")
-		else:
-			positive_factors.append("Normal blood pressure")
 
-	# BMI and Weight Management
-	if bmi_category and bmi_category != "Normal":
-		if "Underweight" in bmi_category:
-			suggestions.append("📈 **Weight Gain**: Focus on nutrient-dense foods, strength training, and consult nutritionist for healthy weight gain.")
-		elif "Overweight" in bmi_category or "Obese" in bmi_category:
-			risk_factors.append("Weight management needed")
-			suggestions.append("⚖️ **Weight Management**: Create calorie deficit through diet and exercise, focus on whole foods, and consider professional guidance.")
-
-	# Daily Steps Analysis
-	if steps_val is not None:
-		if steps_val < 5000:
-			risk_factors.append("Low daily activity")
-			suggestions.append("👟 **Step Goal**: Aim for 7,000-10,000 steps daily. Start with small increases, use step tracker, take walking breaks.")
-		elif steps_val < 8000:
-			suggestions.append("🚶 **Good Progress**: You're getting close to optimal step count! Try adding 1,000 more steps daily.")
-		else:
-			positive_factors.append("Excellent daily activity")
-
-	# Gender-specific recommendations
-	if gender:
-		if gender.lower() == "female":
-			suggestions.append("👩 **Women's Health**: Consider iron-rich foods, calcium for bone health, and regular health screenings.")
-		else:
-			suggestions.append("👨 **Men's Health**: Focus on heart health, prostate awareness, and regular health checkups.")
-
-	# Comprehensive Health Summary
-	if risk_factors:
-		suggestions.append(f"\n🚨 **Risk Factors Identified**: {', '.join(risk_factors)}")
-		suggestions.append("💡 **Priority Actions**: Address these areas first for optimal health improvement.")
-	
-	if positive_factors:
-		suggestions.append(f"\n✅ **Health Strengths**: {', '.join(positive_factors)}")
-		suggestions.append("🌟 **Keep It Up**: Continue these healthy practices!")
-
-	# General wellness tips
-	suggestions.append("\n🌿 **General Wellness**: Stay hydrated (8 glasses water/day), eat colorful fruits/vegetables, and maintain social connections.")
+def suggest_health(age, physical_activity_level, stress_level, gender, heart_rate, blood_pressure, sleep_disorder, bmi_category, daily_steps):
+	return LIFESTYLE_LOOKUP.render({
+		'age': age,
+		'physical_activity_level': physical_activity_level,
+		'stress_level': stress_level,
+		'gender': gender,
+		'heart_rate': heart_rate,
+		'blood_pressure': blood_pressure,
+		'sleep_disorder': sleep_disorder,
+		'bmi_category': bmi_category,
+		'daily_steps': daily_steps,
+	}).text
 
-	if not suggestions:
-		suggestions.append("📝 **Complete Your Profile**: Fill in more details to receive personalized health recommendations!")
 
-	return "\n".join(suggestions)
+def suggest_health_batch(*columns):
+	# Gradio batch mode: one list per input, and a list of results per output
+	return [[suggest_health(*row) for row in zip(*columns)]]
 
 
 # Custom CSS for better styling
@@ -182,10 +73,13 @@ css = """
 }
 """
 
-with gr.Blocks(title="🏥 Lifestyle Health Advisor", css=css, theme=gr.themes.Soft()) as demo:
-    # Header Section
-    with gr.Row():
-        gr.HTML("""
+def build_demo():
+    import gradio as gr
+
+    with gr.Blocks(title="🏥 Lifestyle Health Advisor", css=css, theme=gr.themes.Soft()) as demo:
+        # Header Section
+        with gr.Row():
+            gr.HTML("""
         <div class="main-header">
             <h1>🏥 Lifestyle Health Advisor</h1>
             <p>Get personalized health recommendations based on your lifestyle data</p>
@@ -193,99 +87,99 @@ with gr.Blocks(title="🏥 Lifestyle Health Advisor", css=css, theme=gr.themes.S
         </div>
         """)
     
-    # Main Input Section
-    with gr.Row():
-        with gr.Column(scale=2):
-            gr.Markdown("### 📊 Personal Information")
-            with gr.Row():
-                age = gr.Number(
-                    label="👤 Age", 
-                    value=30, 
-                    minimum=1, 
-                    maximum=120,
-                    info="Enter your current age"
-                )
-                gender = gr.Radio(
-                    ["Male", "Female", "Other"], 
-                    label="⚥ Gender", 
-                    value="Male",
-                    info="Select your gender"
-                )
+        # Main Input Section
+        with gr.Row():
+            with gr.Column(scale=2):
+                gr.Markdown("### 📊 Personal Information")
+                with gr.Row():
+                    age = gr.Number(
+                        label="👤 Age", 
+                        value=30, 
+                        minimum=1, 
+                        maximum=120,
+                        info="Enter your current age"
+                    )
+                    gender = gr.Radio(
+                        ["Male", "Female", "Other"], 
+                        label="⚥ Gender", 
+                        value="Male",
+                        info="Select your gender"
+                    )
             
-            gr.Markdown("### 🏃‍♂️ Activity & Lifestyle")
-            with gr.Row():
-                physical_activity_level = gr.Slider(
-                    minimum=0, 
-                    maximum=10, 
-                    value=5, 
-                    step=0.5,
-                    label="💪 Physical Activity Level (0-10)",
-                    info="0 = Sedentary, 10 = Very Active"
-                )
-                stress_level = gr.Slider(
-                    minimum=0, 
-                    maximum=10, 
-                    value=4, 
-                    step=0.5,
-                    label="😰 Stress Level (0-10)",
-                    info="0 = Very Relaxed, 10 = Extremely Stressed"
-                )
+                gr.Markdown("### 🏃‍♂️ Activity & Lifestyle")
+                with gr.Row():
+                    physical_activity_level = gr.Slider(
+                        minimum=0, 
+                        maximum=10, 
+                        value=5, 
+                        step=0.5,
+                        label="💪 Physical Activity Level (0-10)",
+                        info="0 = Sedentary, 10 = Very Active"
+                    )
+                    stress_level = gr.Slider(
+                        minimum=0, 
+                        maximum=10, 
+                        value=4, 
+                        step=0.5,
+                        label="😰 Stress Level (0-10)",
+                        info="0 = Very Relaxed, 10 = Extremely Stressed"
+                    )
             
-            with gr.Row():
-                daily_steps = gr.Number(
-                    label="👟 Daily Steps", 
-                    value=8000,
-                    info="Average steps per day"
-                )
-                bmi_category = gr.Dropdown(
-                    ["Underweight", "Normal", "Overweight", "Obese"],
-                    label="⚖️ BMI Category",
-                    value="Normal",
-                    info="Select your BMI category"
-                )
+                with gr.Row():
+                    daily_steps = gr.Number(
+                        label="👟 Daily Steps", 
+                        value=8000,
+                        info="Average steps per day"
+                    )
+                    bmi_category = gr.Dropdown(
+                        ["Underweight", "Normal", "Overweight", "Obese"],
+                        label="⚖️ BMI Category",
+                        value="Normal",
+                        info="Select your BMI category"
+                    )
             
-            gr.Markdown("### 🫀 Health Metrics")
-            with gr.Row():
-                heart_rate = gr.Number(
-                    label="💓 Heart Rate (bpm)", 
-                    value=75,
-                    info="Resting heart rate"
-                )
-                blood_pressure = gr.Number(
-                    label="🩸 Blood Pressure (systolic)", 
-                    value=120,
-                    info="Systolic blood pressure"
-                )
+                gr.Markdown("### 🫀 Health Metrics")
+                with gr.Row():
+                    heart_rate = gr.Number(
+                        label="💓 Heart Rate (bpm)", 
+                        value=75,
+                        info="Resting heart rate"
+                    )
+                    blood_pressure = gr.Number(
+                        label="🩸 Blood Pressure (systolic)", 
+                        value=120,
+                        info="Systolic blood pressure"
+                    )
             
-            sleep_disorder = gr.Dropdown(
-                ["None", "Insomnia", "Sleep Apnea", "Restless Leg Syndrome", "Other"],
-                label="😴 Sleep Disorder",
-                value="None",
-                info="Select any sleep issues you experience"
-            )
+                sleep_disorder = gr.Dropdown(
+                    ["None", "Insomnia", "Sleep Apnea", "Restless Leg Syndrome", "Other"],
+                    label="😴 Sleep Disorder",
+                    value="None",
+                    info="Select any sleep issues you experience"
+                )
         
-        # Output Section
-        with gr.Column(scale=1):
-            gr.Markdown("### 💡 Health Recommendations")
-            output = gr.Textbox(
-                label="", 
-                lines=20,
-                max_lines=25,
-                show_copy_button=True,
-                elem_classes=["suggestion-output"]
-            )
+            # Output Section
+            with gr.Column(scale=1):
+                gr.Markdown("### 💡 Health Recommendations")
+                output = gr.Textbox(
+                    label="", 
+                    lines=20,
+                    max_lines=25,
+                    show_copy_button=True,
+                    elem_classes=["suggestion-output"]
+                )
     
-    # Action Button
-    with gr.Row():
-        btn = gr.Button(
-            "🔍 Get Personalized Health Suggestions", 
-            variant="primary",
-            size="lg",
-            elem_classes=["btn-primary"]
-        )
+        # Action Button
+        with gr.Row():
+            btn = gr.Button(
+                "🔍 Get Personalized Health Suggestions", 
+                variant="primary",
+                size="lg",
+                elem_classes=["btn-primary"]
+            )
     
-    # Footer
-    gr.Markdown("""
+        # Footer
+        gr.Markdown("""
     ---
     <div style="text-align: center; color: #666; font-size: 12px;">
     <p>⚠️ <strong>Disclaimer:</strong> This tool provides general health suggestions and should not replace professional medical advice. Always consult healthcare providers for medical concerns.</p>
@@ -293,15 +187,28 @@ with gr.Blocks(title="🏥 Lifestyle Health Advisor", css=css, theme=gr.themes.S
     </div>
     """)
 
-    # Event Handler
-    btn.click(
-        fn=suggest_health,
-        inputs=[age, physical_activity_level, stress_level, gender, heart_rate, blood_pressure, sleep_disorder, bmi_category, daily_steps],
-        outputs=[output],
-    )
+        # Event Handler
+        btn.click(
+            fn=suggest_health_batch,
+            inputs=[age, physical_activity_level, stress_level, gender, heart_rate, blood_pressure, sleep_disorder, bmi_category, daily_steps],
+            outputs=[output],
+            batch=True,
+            max_batch_size=MAX_BATCH_SIZE,
+            concurrency_limit=CONCURRENCY_LIMIT,
+        )
+    demo.queue(default_concurrency_limit=CONCURRENCY_LIMIT, max_size=QUEUE_MAX_SIZE)
+    return demo
+
+
+def __getattr__(name):
+    # Gradio is only imported, and the UI only built, once something asks for ``demo``
+    if name == "demo":
+        demo = globals()["demo"] = build_demo()
+        return demo
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 if __name__ == "__main__":
-	demo.launch()
+	build_demo().launch()
 
 
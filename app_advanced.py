@@ -1,157 +1,52 @@
-import gradio as gr
+import atexit
 import json
+import os
 from datetime import datetime
 from database import HealthDatabase
+from suggestion_engine import LIFESTYLE_LOOKUP, LIFESTYLE_RULES
 
 # Initialize database
 db = HealthDatabase()
+# Checkpoints the WAL and closes every thread's connection
+atexit.register(db.close)
 
-def suggest_health_advanced(age, physical_activity_level, stress_level, gender, heart_rate, blood_pressure, sleep_disorder, bmi_category, daily_steps, user_name, save_data):
-    suggestions = []
-    risk_factors = []
-    positive_factors = []
-
-    try:
-        heart_rate_val = float(heart_rate) if heart_rate else None
-    except Exception:
-        heart_rate_val = None
-    try:
-        bp_val = float(blood_pressure) if blood_pressure else None
-    except Exception:
-        bp_val = None
-    try:
-        steps_val = float(daily_steps) if daily_steps else None
-    except Exception:
-        steps_val = None
-
-    # Age-based recommendations
-    if age is not None:
-        if age <= 12:
-            suggestions.append("👶 **Child Health Focus**: Ensure 9-12 hours of sleep, limit screen time to 2 hours/day, and encourage 60+ minutes of physical activity.")
-            if physical_activity_level and physical_activity_level <= 2:
-                suggestions.append("🏃 **Activity Boost**: Encourage outdoor play, sports, or active games. Consider family activities like hiking or cycling.")
-        elif age <= 18:
-            suggestions.append("🧑‍🎓 **Teen Health**: Focus on consistent sleep schedule (8-10 hours), balanced nutrition, and stress management during academic periods.")
-        elif age <= 30:
-            suggestions.append("💪 **Young Adult**: Build healthy habits now! Focus on regular exercise, stress management, and preventive healthcare.")
-        elif age <= 50:
-            suggestions.append("👨‍💼 **Mid-Life Health**: Prioritize cardiovascular health, maintain muscle mass through strength training, and manage work-life balance.")
-        else:
-            suggestions.append("🧓 **Senior Health**: Focus on bone health, cognitive stimulation, social connections, and regular health screenings.")
-
-    # Physical Activity Analysis
-    if physical_activity_level is not None:
-        if physical_activity_level <= 2:
-            risk_factors.append("Low physical activity")
-            suggestions.append("🚶 **Activity Recommendation**: Start with 10-minute walks, gradually increase to 150 minutes/week of moderate activity.")
-            suggestions.append("💡 **Quick Tips**: Take stairs, park farther away, do desk exercises, or try home workout videos.")
-        elif physical_activity_level <= 5:
-            suggestions.append("👍 **Good Start**: You're moderately active! Consider adding strength training 2x/week and increasing intensity gradually.")
-        elif physical_activity_level <= 8:
-            suggestions.append("🏆 **Excellent Activity Level**: Great job! Maintain your routine and consider adding variety with different activities.")
-        else:
-            suggestions.append("🔥 **High Activity**: Outstanding! Ensure proper recovery, nutrition, and listen to your body to prevent overtraining.")
+# Gradio queue: submissions are handled in batches of up to MAX_BATCH_SIZE, one batch at a time,
+# because SQLite has a single writer; the read-only views share READ_CONCURRENCY_LIMIT workers
+MAX_BATCH_SIZE = int(os.environ.get("GRADIO_MAX_BATCH_SIZE", "64"))
+READ_CONCURRENCY_LIMIT = int(os.environ.get("GRADIO_CONCURRENCY_LIMIT", "4"))
+QUEUE_MAX_SIZE = int(os.environ.get("GRADIO_QUEUE_MAX_SIZE", "1000"))
+# Users shown per page in the Data Management tab
+USERS_PAGE_SIZE = int(os.environ.get("USERS_PAGE_SIZE", "50"))
 
-    # Stress Management
-    if stress_level is not None:
-        if stress_level >= 8:
-            risk_factors.append("High stress level")
-            suggestions.append("😰 **High Stress Alert**: Consider professional help, practice daily meditation, deep breathing, or progressive muscle relaxation.")
-            suggestions.append("🌱 **Stress Relief**: Try yoga, nature walks, journaling, or hobbies. Limit caffeine and ensure adequate sleep.")
-        elif stress_level >= 6:
-            suggestions.append("⚠️ **Moderate Stress**: Practice stress management techniques like mindfulness, regular breaks, and time management.")
-        elif stress_level <= 3:
-            positive_factors.append("Low stress level")
-            suggestions.append("😊 **Great Stress Management**: Keep up your stress management practices!")
+def _advise(age, physical_activity_level, stress_level, gender, heart_rate, blood_pressure, sleep_disorder, bmi_category, daily_steps, user_name, save_data):
+    """Suggestions text, plus the submission to save (None when saving was not requested)"""
+    values = LIFESTYLE_RULES.normalize({
+        'age': age,
+        'physical_activity_level': physical_activity_level,
+        'stress_level': stress_level,
+        'gender': gender,
+        'heart_rate': heart_rate,
+        'blood_pressure': blood_pressure,
+        'sleep_disorder': sleep_disorder,
+        'bmi_category': bmi_category,
+        'daily_steps': daily_steps,
+    })
+    heart_rate_val = values['heart_rate']
+    bp_val = values['blood_pressure']
+    steps_val = values['daily_steps']
+    advice = LIFESTYLE_LOOKUP.render_values(values)
+    risk_factors = list(advice.risk_factors)
+    positive_factors = list(advice.positive_factors)
 
-    # Sleep Disorder Management
-    if isinstance(sleep_disorder, str) and sleep_disorder.strip():
-        sleep_disorder_lower = sleep_disorder.lower()
-        if "insomnia" in sleep_disorder_lower:
-            risk_factors.append("Insomnia")
-            suggestions.append("😴 **Insomnia Management**: Maintain consistent sleep schedule, limit caffeine after 2 PM, create dark/cool bedroom environment.")
-            suggestions.append("🍯 **Sleep Hygiene**: Avoid screens 1 hour before bed, try chamomile tea, warm bath, or light reading.")
-        elif "apnea" in sleep_disorder_lower:
-            risk_factors.append("Sleep apnea")
-            suggestions.append("🫁 **Sleep Apnea**: Consult a sleep specialist. Consider weight management, avoid alcohol before bed, and sleep on your side.")
-        elif "none" not in sleep_disorder_lower:
-            suggestions.append("🛌 **Sleep Health**: Maintain regular sleep schedule, 7-9 hours nightly, and create a relaxing bedtime routine.")
-
-    # Cardiovascular Health
-    if heart_rate_val is not None:
-        if heart_rate_val > 100:
-            risk_factors.append("Elevated heart rate")
-            suggestions.append("💓 **Heart Rate Alert**: Resting HR >100 may indicate stress, dehydration, or medical condition. Monitor and consult healthcare provider.")
-        elif heart_rate_val < 60:
-            suggestions.append("💪 **Athletic Heart**: Low resting HR can indicate good fitness, but consult doctor if experiencing symptoms.")
-        else:
-            positive_factors.append("Normal heart rate")
-
-    if bp_val is not None:
-        if bp_val > 140:
-            risk_factors.append("High blood pressure")
-            suggestions.append("🩸 **High Blood Pressure**: Reduce sodium intake, increase potassium-rich foods, regular exercise, and consult healthcare provider.")
-        elif bp_val > 120:
-            risk_factors.append("Elevated blood pressure")
-            suggestions.append("⚠️ **Pre-Hypertension**: Focus on DASH diet, weight management, stress reduction, and regular monitoring.")
-        else:
-            positive_factors.append("Normal blood pressure")
-
-    # BMI and Weight Management
-    if bmi_category and bmi_category != "Normal":
-        if "Underweight" in bmi_category:
-            suggestions.append("📈 **Weight Gain**: Focus on nutrient-dense foods, strength training, and consult nutritionist for healthy weight gain.")
-        elif "Overweight" in bmi_category or "Obese" in bmi_category:
-            risk_factors.append("Weight management needed")
-            suggestions.append("⚖️ **Weight Management**: Create calorie deficit through diet and exercise, focus on whole foods, and consider professional guidance.")
-
-    # Daily Steps Analysis
-    if steps_val is not None:
-        if steps_val < 5000:
-            risk_factors.append("Low daily activity")
-            suggestions.append("👟 **Step Goal**: Aim for 7,000-10,000 steps daily. Start with small increases, use step tracker, take walking breaks.")
-        elif steps_val < 8000:
-            suggestions.append("🚶 **Good Progress**: You're getting close to optimal step count! Try adding 1,000 more steps daily.")
-        else:
-            positive_factors.append("Excellent daily activity")
-
-    # Gender-specific recommendations
-    if gender:
-        if gender.lower() == "female":
-            suggestions.append("👩 **Women's Health**: Consider iron-rich foods, calcium for bone health, and regular health screenings.")
-        else:
-            suggestions.append("👨 **Men's Health**: Focus on heart health, prostate awareness, and regular health checkups.")
-
-    # Comprehensive Health Summary
-    if risk_factors:
-        suggestions.append(f"\n🚨 **Risk Factors Identified**: {', '.join(risk_factors)}")
-        suggestions.append("💡 **Priority Actions**: Address these areas first for optimal health improvement.")
-    
-    if positive_factors:
-        suggestions.append(f"\n✅ **Health Strengths**: {', '.join(positive_factors)}")
-        suggestions.append("🌟 **Keep It Up**: Continue these healthy practices!")
+    suggestions_text = advice.text
 
-    # General wellness tips
-    suggestions.append("\n🌿 **General Wellness**: Stay hydrated (8 glasses water/day), eat colorful fruits/vegetables, and maintain social connections.")
-
-    if not suggestions:
-        suggestions.append("📝 **Complete Your Profile**: Fill in more details to receive personalized health recommendations!")
-
-    suggestions_text = "\n".join(suggestions)
-
-    # Save data if requested
-    save_status = ""
+    submission = None
     if save_data and user_name and user_name.strip():
-        try:
-            # Create or get user
-            user_id = db.create_user(
-                name=user_name.strip(),
-                age=age,
-                gender=gender
-            )
-            
-            # Save health record
-            health_data = {
+        submission = {
+            'name': user_name.strip(),
+            'age': age,
+            'gender': gender,
+            'health_data': {
                 'physical_activity_level': physical_activity_level,
                 'stress_level': stress_level,
                 'heart_rate': heart_rate_val,
@@ -162,28 +57,63 @@ def suggest_health_advanced(age, physical_activity_level, stress_level, gender,
                 'suggestions': suggestions_text,
                 'risk_factors': risk_factors,
                 'positive_factors': positive_factors
-            }
-            
-            record_id = db.save_health_record(user_id, health_data)
-            
-            # Save analytics
-            if physical_activity_level is not None:
-                db.save_health_analytics(user_id, 'physical_activity', physical_activity_level)
-            if stress_level is not None:
-                db.save_health_analytics(user_id, 'stress_level', stress_level)
-            if heart_rate_val is not None:
-                db.save_health_analytics(user_id, 'heart_rate', heart_rate_val)
-            if bp_val is not None:
-                db.save_health_analytics(user_id, 'blood_pressure', bp_val)
-            if steps_val is not None:
-                db.save_health_analytics(user_id, 'daily_steps', steps_val)
-            
-            save_status = f"\n\n💾 **Data Saved Successfully!**\nUser ID: {user_id} | Record ID: {record_id}\nYour health data has been stored for future reference and tracking."
-            
+            },
+            'analytics': {
+                'physical_activity': physical_activity_level,
+                'stress_level': stress_level,
+                'heart_rate': heart_rate_val,
+                'blood_pressure': bp_val,
+                'daily_steps': steps_val,
+            },
+        }
+    return suggestions_text, submission
+
+
+def _save_status(user_id, record_id):
+    return f"\n\n💾 **Data Saved Successfully!**\nUser ID: {user_id} | Record ID: {record_id}\nYour health data has been stored for future reference and tracking."
+
+
+def _save_submissions(submissions):
+    """(user_id, record_id) or the exception, per submission"""
+    if not submissions:
+        return []
+    try:
+        # The whole batch in one transaction
+        return db.save_submissions(submissions)
+    except Exception:
+        pass
+    # The batch rolled back; save one by one so a bad submission only fails itself
+    results = []
+    for submission in submissions:
+        try:
+            results.append(db.save_submissions([submission])[0])
         except Exception as e:
-            save_status = f"\n\n❌ **Save Error**: {str(e)}"
+            results.append(e)
+    return results
+
 
-    return suggestions_text + save_status
+def suggest_health_advanced(age, physical_activity_level, stress_level, gender, heart_rate, blood_pressure, sleep_disorder, bmi_category, daily_steps, user_name, save_data):
+    return suggest_health_advanced_batch(*([value] for value in (
+        age, physical_activity_level, stress_level, gender, heart_rate, blood_pressure,
+        sleep_disorder, bmi_category, daily_steps, user_name, save_data
+    )))[0][0]
+
+
+def suggest_health_advanced_batch(*columns):
+    # Gradio batch mode: one list per input, and a list of results per output
+    advice = [_advise(*row) for row in zip(*columns)]
+    saved = iter(_save_submissions([submission for _, submission in advice if submission is not None]))
+    results = []
+    for suggestions_text, submission in advice:
+        save_status = ""
+        if submission is not None:
+            outcome = next(saved)
+            if isinstance(outcome, Exception):
+                save_status = f"\n\n❌ **Save Error**: {str(outcome)}"
+            else:
+                save_status = _save_status(*outcome)
+        results.append(suggestions_text + save_status)
+    return [results]
 
 def get_user_dashboard(user_id):
     """Get user dashboard data"""
@@ -245,6 +175,31 @@ def get_user_dashboard(user_id):
     except Exception as e:
         return f"Error loading dashboard: {str(e)}"
 
+def get_users_page(pager=None, step=0):
+    """Render a page of the users list; step is -1, 0 (first page) or 1
+    
+    pager is the gr.State of the view: the cursors of the pages shown so far
+    and the cursor of the next page, so only one page is ever read.
+    """
+    starts = list((pager or {}).get('starts') or [None])
+    if step > 0 and (pager or {}).get('next') is not None:
+        starts.append(pager['next'])
+    elif step < 0:
+        starts = starts[:-1] or [None]
+    elif step == 0:
+        starts = [None]
+    
+    users, next_cursor = db.get_users_page(USERS_PAGE_SIZE, after=starts[-1])
+    pager = {'starts': starts, 'next': next_cursor}
+    if not users:
+        return "No users found in database.", pager
+    
+    users_text = f"## 👥 All Users in Database (page {len(starts)})\n\n"
+    for user in users:
+        users_text += f"**ID {user['id']}**: {user['name']} ({user['age']} years, {user['gender']}) - Joined: {user['created_at'][:10]}\n"
+    users_text += "\nMore users on the next page." if next_cursor else "\nEnd of list."
+    return users_text, pager
+
 # Custom CSS for better styling
 css = """
 .gradio-container {
@@ -300,10 +255,13 @@ css = """
 }
 """
 
-with gr.Blocks(title="🏥 Advanced Lifestyle Health Advisor", css=css, theme=gr.themes.Soft()) as demo:
-    # Header Section
-    with gr.Row():
-        gr.HTML("""
+def build_demo():
+    import gradio as gr
+
+    with gr.Blocks(title="🏥 Advanced Lifestyle Health Advisor", css=css, theme=gr.themes.Soft()) as demo:
+        # Header Section
+        with gr.Row():
+            gr.HTML("""
         <div class="main-header">
             <h1>🏥 Advanced Lifestyle Health Advisor</h1>
             <p>Get personalized health recommendations with data storage and analytics</p>
@@ -311,163 +269,167 @@ with gr.Blocks(title="🏥 Advanced Lifestyle Health Advisor", css=css, theme=gr
         </div>
         """)
     
-    # Main Interface with Tabs
-    with gr.Tabs():
-        # Health Assessment Tab
-        with gr.Tab("🔍 Health Assessment"):
-            with gr.Row():
-                with gr.Column(scale=2):
-                    gr.Markdown("### 📊 Personal Information")
-                    with gr.Row():
-                        user_name = gr.Textbox(
-                            label="👤 Your Name", 
-                            placeholder="Enter your name to save data",
-                            info="Required for data storage"
-                        )
-                        age = gr.Number(
-                            label="👤 Age", 
-                            value=30, 
-                            minimum=1, 
-                            maximum=120,
-                            info="Enter your current age"
-                        )
-                        gender = gr.Radio(
-                            ["Male", "Female", "Other"], 
-                            label="⚥ Gender", 
-                            value="Male",
-                            info="Select your gender"
-                        )
+        # Main Interface with Tabs
+        with gr.Tabs():
+            # Health Assessment Tab
+            with gr.Tab("🔍 Health Assessment"):
+                with gr.Row():
+                    with gr.Column(scale=2):
+                        gr.Markdown("### 📊 Personal Information")
+                        with gr.Row():
+                            user_name = gr.Textbox(
+                                label="👤 Your Name", 
+                                placeholder="Enter your name to save data",
+                                info="Required for data storage"
+                            )
+                            age = gr.Number(
+                                label="👤 Age", 
+                                value=30, 
+                                minimum=1, 
+                                maximum=120,
+                                info="Enter your current age"
+                            )
+                            gender = gr.Radio(
+                                ["Male", "Female", "Other"], 
+                                label="⚥ Gender", 
+                                value="Male",
+                                info="Select your gender"
+                            )
                     
-                    gr.Markdown("### 🏃‍♂️ Activity & Lifestyle")
-                    with gr.Row():
-                        physical_activity_level = gr.Slider(
-                            minimum=0, 
-                            maximum=10, 
-                            value=5, 
-                            step=0.5,
-                            label="💪 Physical Activity Level (0-10)",
-                            info="0 = Sedentary, 10 = Very Active"
-                        )
-                        stress_level = gr.Slider(
-                            minimum=0, 
-                            maximum=10, 
-                            value=4, 
-                            step=0.5,
-                            label="😰 Stress Level (0-10)",
-                            info="0 = Very Relaxed, 10 = Extremely Stressed"
-                        )
+                        gr.Markdown("### 🏃‍♂️ Activity & Lifestyle")
+                        with gr.Row():
+                            physical_activity_level = gr.Slider(
+                                minimum=0, 
+                                maximum=10, 
+                                value=5, 
+                                step=0.5,
+                                label="💪 Physical Activity Level (0-10)",
+                                info="0 = Sedentary, 10 = Very Active"
+                            )
+                            stress_level = gr.Slider(
+                                minimum=0, 
+                                maximum=10, 
+                                value=4, 
+                                step=0.5,
+                                label="😰 Stress Level (0-10)",
+                                info="0 = Very Relaxed, 10 = Extremely Stressed"
+                            )
                     
-                    with gr.Row():
-                        daily_steps = gr.Number(
-                            label="👟 Daily Steps", 
-                            value=8000,
-                            info="Average steps per day"
-                        )
-                        bmi_category = gr.Dropdown(
-                            ["Underweight", "Normal", "Overweight", "Obese"],
-                            label="⚖️ BMI Category",
-                            value="Normal",
-                            info="Select your BMI category"
-                        )
+                        with gr.Row():
+                            daily_steps = gr.Number(
+                                label="👟 Daily Steps", 
+                                value=8000,
+                                info="Average steps per day"
+                            )
+                            bmi_category = gr.Dropdown(
+                                ["Underweight", "Normal", "Overweight", "Obese"],
+                                label="⚖️ BMI Category",
+                                value="Normal",
+                                info="Select your BMI category"
+                            )
                     
-                    gr.Markdown("### 🫀 Health Metrics")
-                    with gr.Row():
-                        heart_rate = gr.Number(
-                            label="💓 Heart Rate (bpm)", 
-                            value=75,
-                            info="Resting heart rate"
-                        )
-                        blood_pressure = gr.Number(
-                            label="🩸 Blood Pressure (systolic)", 
-                            value=120,
-                            info="Systolic blood pressure"
-                        )
+                        gr.Markdown("### 🫀 Health Metrics")
+                        with gr.Row():
+                            heart_rate = gr.Number(
+                                label="💓 Heart Rate (bpm)", 
+                                value=75,
+                                info="Resting heart rate"
+                            )
+                            blood_pressure = gr.Number(
+                                label="🩸 Blood Pressure (systolic)", 
+                                value=120,
+                                info="Systolic blood pressure"
+                            )
                     
-                    sleep_disorder = gr.Dropdown(
-                        ["None", "Insomnia", "Sleep Apnea", "Restless Leg Syndrome", "Other"],
-                        label="😴 Sleep Disorder",
-                        value="None",
-                        info="Select any sleep issues you experience"
-                    )
+                        sleep_disorder = gr.Dropdown(
+                            ["None", "Insomnia", "Sleep Apnea", "Restless Leg Syndrome", "Other"],
+                            label="😴 Sleep Disorder",
+                            value="None",
+                            info="Select any sleep issues you experience"
+                        )
                     
-                    save_data = gr.Checkbox(
-                        label="💾 Save my data for tracking",
-                        value=True,
-                        info="Check to save your health data for future reference"
-                    )
+                        save_data = gr.Checkbox(
+                            label="💾 Save my data for tracking",
+                            value=True,
+                            info="Check to save your health data for future reference"
+                        )
                 
-                # Output Section
-                with gr.Column(scale=1):
-                    gr.Markdown("### 💡 Health Recommendations")
-                    output = gr.Textbox(
-                        label="", 
-                        lines=20,
-                        max_lines=25,
-                        show_copy_button=True,
-                        elem_classes=["suggestion-output"]
-                    )
+                    # Output Section
+                    with gr.Column(scale=1):
+                        gr.Markdown("### 💡 Health Recommendations")
+                        output = gr.Textbox(
+                            label="", 
+                            lines=20,
+                            max_lines=25,
+                            show_copy_button=True,
+                            elem_classes=["suggestion-output"]
+                        )
             
-            # Action Button
-            with gr.Row():
-                btn = gr.Button(
-                    "🔍 Get Personalized Health Suggestions", 
-                    variant="primary",
-                    size="lg",
-                    elem_classes=["btn-primary"]
-                )
-        
-        # Dashboard Tab
-        with gr.Tab("📊 Health Dashboard"):
-            with gr.Row():
-                with gr.Column(scale=1):
-                    gr.Markdown("### 👤 View Your Health History")
-                    user_id_input = gr.Number(
-                        label="User ID",
-                        value=1,
-                        info="Enter your User ID to view dashboard"
-                    )
-                    dashboard_btn = gr.Button(
-                        "📈 Load Dashboard",
-                        variant="secondary"
+                # Action Button
+                with gr.Row():
+                    btn = gr.Button(
+                        "🔍 Get Personalized Health Suggestions", 
+                        variant="primary",
+                        size="lg",
+                        elem_classes=["btn-primary"]
                     )
+        
+            # Dashboard Tab
+            with gr.Tab("📊 Health Dashboard"):
+                with gr.Row():
+                    with gr.Column(scale=1):
+                        gr.Markdown("### 👤 View Your Health History")
+                        user_id_input = gr.Number(
+                            label="User ID",
+                            value=1,
+                            info="Enter your User ID to view dashboard"
+                        )
+                        dashboard_btn = gr.Button(
+                            "📈 Load Dashboard",
+                            variant="secondary"
+                        )
                 
-                with gr.Column(scale=2):
-                    gr.Markdown("### 📊 Your Health Dashboard")
-                    dashboard_output = gr.Textbox(
-                        label="",
-                        lines=25,
-                        max_lines=30,
-                        show_copy_button=True,
-                        elem_classes=["dashboard-output"]
-                    )
+                    with gr.Column(scale=2):
+                        gr.Markdown("### 📊 Your Health Dashboard")
+                        dashboard_output = gr.Textbox(
+                            label="",
+                            lines=25,
+                            max_lines=30,
+                            show_copy_button=True,
+                            elem_classes=["dashboard-output"]
+                        )
         
-        # Data Management Tab
-        with gr.Tab("💾 Data Management"):
-            with gr.Row():
-                with gr.Column():
-                    gr.Markdown("### 📋 All Users")
-                    users_btn = gr.Button("👥 View All Users", variant="secondary")
-                    users_output = gr.Textbox(
-                        label="Users List",
-                        lines=10,
-                        show_copy_button=True
-                    )
+            # Data Management Tab
+            with gr.Tab("💾 Data Management"):
+                with gr.Row():
+                    with gr.Column():
+                        gr.Markdown("### 📋 All Users")
+                        users_btn = gr.Button("👥 View All Users", variant="secondary")
+                        users_output = gr.Textbox(
+                            label="Users List",
+                            lines=10,
+                            show_copy_button=True
+                        )
+                        with gr.Row():
+                            users_prev_btn = gr.Button("⬅️ Previous Page", size="sm")
+                            users_next_btn = gr.Button("Next Page ➡️", size="sm")
+                        users_pager = gr.State(None)
                 
-                with gr.Column():
-                    gr.Markdown("### 📤 Export Data")
-                    export_user_id = gr.Number(
-                        label="User ID to Export",
-                        value=1
-                    )
-                    export_btn = gr.Button("📥 Export User Data", variant="secondary")
-                    export_output = gr.Textbox(
-                        label="Export Data (JSON)",
-                        lines=15,
-                        show_copy_button=True
-                    )
+                    with gr.Column():
+                        gr.Markdown("### 📤 Export Data")
+                        export_user_id = gr.Number(
+                            label="User ID to Export",
+                            value=1
+                        )
+                        export_btn = gr.Button("📥 Export User Data", variant="secondary")
+                        export_output = gr.Textbox(
+                            label="Export Data (JSON)",
+                            lines=15,
+                            show_copy_button=True
+                        )
     
-    # Footer
-    gr.Markdown("""
+        # Footer
+        gr.Markdown("""
     ---
     <div style="text-align: center; color: #666; font-size: 12px;">
     <p>⚠️ <strong>Disclaimer:</strong> This tool provides general health suggestions and should not replace professional medical advice. Always consult healthcare providers for medical concerns.</p>
@@ -475,50 +437,59 @@ with gr.Blocks(title="🏥 Advanced Lifestyle Health Advisor", css=css, theme=gr
     </div>
     """)
 
-    # Event Handlers
-    btn.click(
-        fn=suggest_health_advanced,
-        inputs=[age, physical_activity_level, stress_level, gender, heart_rate, blood_pressure, sleep_disorder, bmi_category, daily_steps, user_name, save_data],
-        outputs=[output],
-    )
-    
-    dashboard_btn.click(
-        fn=get_user_dashboard,
-        inputs=[user_id_input],
-        outputs=[dashboard_output]
-    )
+        # Event Handlers
+        btn.click(
+            fn=suggest_health_advanced_batch,
+            inputs=[age, physical_activity_level, stress_level, gender, heart_rate, blood_pressure, sleep_disorder, bmi_category, daily_steps, user_name, save_data],
+            outputs=[output],
+            batch=True,
+            max_batch_size=MAX_BATCH_SIZE,
+            concurrency_limit=1,
+        )
     
-    def get_all_users():
-        users = db.get_all_users()
-        if not users:
-            return "No users found in database."
-        
-        users_text = "## 👥 All Users in Database\n\n"
-        for user in users:
-            users_text += f"**ID {user['id']}**: {user['name']} ({user['age']} years, {user['gender']}) - Joined: {user['created_at'][:10]}\n"
-        
-        return users_text
+        dashboard_btn.click(
+            fn=get_user_dashboard,
+            inputs=[user_id_input],
+            outputs=[dashboard_output],
+            concurrency_limit=READ_CONCURRENCY_LIMIT,
+            concurrency_id="database_reads",
+        )
     
-    users_btn.click(
-        fn=get_all_users,
-        outputs=[users_output]
-    )
+        for button, step in ((users_btn, 0), (users_prev_btn, -1), (users_next_btn, 1)):
+            button.click(
+                fn=lambda pager, step=step: get_users_page(pager, step),
+                inputs=[users_pager],
+                outputs=[users_output, users_pager],
+                concurrency_id="database_reads",
+            )
     
-    def export_user_data(user_id):
-        if not user_id or user_id <= 0:
-            return "Please enter a valid User ID"
+        def export_user_data(user_id):
+            if not user_id or user_id <= 0:
+                return "Please enter a valid User ID"
         
-        try:
-            data = db.export_user_data(user_id)
-            return json.dumps(data, indent=2, default=str)
-        except Exception as e:
-            return f"Error exporting data: {str(e)}"
+            try:
+                data = db.export_user_data(user_id)
+                return json.dumps(data, indent=2, default=str)
+            except Exception as e:
+                return f"Error exporting data: {str(e)}"
     
-    export_btn.click(
-        fn=export_user_data,
-        inputs=[export_user_id],
-        outputs=[export_output]
-    )
+        export_btn.click(
+            fn=export_user_data,
+            inputs=[export_user_id],
+            outputs=[export_output],
+            concurrency_id="database_reads",
+        )
+    demo.queue(default_concurrency_limit=READ_CONCURRENCY_LIMIT, max_size=QUEUE_MAX_SIZE)
+    return demo
+
+
+def __getattr__(name):
+    # Gradio is only imported, and the UI only built, once something asks for ``demo``
+    if name == "demo":
+        demo = globals()["demo"] = build_demo()
+        return demo
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 if __name__ == "__main__":
-    demo.launch()
+    build_demo().launch()
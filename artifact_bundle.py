@@ -0,0 +1,86 @@
+import json
+import os
+
+import numpy as np
+
+from forest_engine import FlatForest
+
+
+# 2: adds missing_left, the direction NaN features take at each split
+BUNDLE_FORMAT_VERSION = 2
+MANIFEST_NAME = 'manifest.json'
+FOREST_ARRAYS = ['feature', 'threshold', 'left', 'right', 'missing_left', 'value', 'roots']
+
+
+def _replace_atomically(path: str, write) -> None:
+	# Write beside the target and rename over it: processes that still have the
+	# old file memory-mapped keep their inode instead of seeing it truncated.
+	tmp_path = f"{path}.tmp-{os.getpid()}"
+	with open(tmp_path, 'wb') as f:
+		write(f)
+	os.replace(tmp_path, path)
+
+
+def save_bundle(bundle_dir: str, forest: FlatForest, scaler, label_encoders: dict, feature_cols: list[str]) -> str:
+	"""Write the consolidated, uncompressed artifact bundle; returns the manifest path.
+
+	Tree arrays go to one ``.npy`` file each so they can be memory-mapped;
+	everything small (feature columns, encoder classes, scaler parameters,
+	array dtypes and shapes) lives in ``manifest.json``, written last.
+	"""
+	os.makedirs(bundle_dir, exist_ok=True)
+	arrays = {}
+	for name in FOREST_ARRAYS:
+		array = np.ascontiguousarray(getattr(forest, name))
+		filename = f"{name}.npy"
+		_replace_atomically(os.path.join(bundle_dir, filename), lambda f: np.save(f, array, allow_pickle=False))
+		arrays[name] = {"file": filename, "dtype": array.dtype.str, "shape": list(array.shape)}
+
+	n_features = len(feature_cols)
+	manifest = {
+		"format_version": BUNDLE_FORMAT_VERSION,
+		"feature_cols": list(feature_cols),
+		"categories": {col: [str(c) for c in le.classes_] for col, le in label_encoders.items()},
+		"scaler": {
+			"mean": (scaler.mean_ if scaler.with_mean else np.zeros(n_features)).tolist(),
+			"scale": (scaler.scale_ if scaler.with_std else np.ones(n_features)).tolist(),
+		},
+		"forest": {
+			"classes": forest.classes_.tolist(),
+			"max_depth": forest.max_depth,
+			"n_trees": forest.n_trees,
+			"node_count": forest.node_count,
+			"arrays": arrays,
+		},
+	}
+	manifest_path = os.path.join(bundle_dir, MANIFEST_NAME)
+	_replace_atomically(manifest_path, lambda f: f.write(json.dumps(manifest, indent=2).encode()))
+	return manifest_path
+
+
+def load_manifest(bundle_dir: str) -> dict:
+	with open(os.path.join(bundle_dir, MANIFEST_NAME)) as f:
+		manifest = json.load(f)
+	if manifest.get("format_version") != BUNDLE_FORMAT_VERSION:
+		raise ValueError(
+			f"unsupported artifact bundle version {manifest.get('format_version')!r} in {bundle_dir}; "
+			f"expected {BUNDLE_FORMAT_VERSION}; rebuild it with `python train_model.py --export-bundle`"
+		)
+	return manifest
+
+
+def load_forest(bundle_dir: str, manifest: dict, mmap: bool = True) -> FlatForest:
+	"""Open the tree arrays, memory-mapped read-only by default so workers share one page-cache copy."""
+	spec = manifest["forest"]
+	arrays = {}
+	for name in FOREST_ARRAYS:
+		info = spec["arrays"][name]
+		array = np.load(os.path.join(bundle_dir, info["file"]), mmap_mode='r' if mmap else None, allow_pickle=False)
+		if array.dtype.str != info["dtype"] or list(array.shape) != info["shape"]:
+			raise ValueError(f"artifact bundle array {name!r} does not match its manifest entry")
+		arrays[name] = array
+	return FlatForest(
+		max_depth=spec["max_depth"],
+		classes=np.asarray(spec["classes"]),
+		**arrays,
+	)
@@ -0,0 +1,116 @@
+import asyncio
+from typing import Awaitable, Callable
+
+from metrics import Histogram
+
+
+BATCH_SIZE_BUCKETS = [1, 2, 4, 8, 16, 32, 64, 128, 256]
+QUEUE_WAIT_BUCKETS = [0.0005, 0.001, 0.002, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25]
+
+
+class MicroBatcher:
+	"""Coalesces concurrent single-payload predictions into batched calls.
+
+	Requests are queued and flushed as one ``predict_batch`` call once
+	``max_batch_size`` payloads are waiting or the oldest has waited
+	``max_wait_ms``, whichever comes first. Each caller's future gets its own
+	row of the batch result; a row error is raised as ValueError, matching the
+	unbatched path.
+	"""
+
+	def __init__(self, predict_batch: Callable[[list[dict]], Awaitable[list[dict]]], max_batch_size: int = 32, max_wait_ms: float = 2.0):
+		self.predict_batch = predict_batch
+		self.max_batch_size = max_batch_size
+		self.max_wait = max_wait_ms / 1000.0
+		self.batch_sizes = Histogram('predict_batch_size', BATCH_SIZE_BUCKETS, 'Payloads per flushed micro-batch')
+		self.queue_wait = Histogram('predict_queue_wait_seconds', QUEUE_WAIT_BUCKETS, 'Time a payload waited before its batch was flushed')
+		self._queue: asyncio.Queue | None = None
+		self._collector: asyncio.Task | None = None
+		self._flushes: set[asyncio.Task] = set()
+
+	def start(self) -> None:
+		self._queue = asyncio.Queue()
+		self._collector = asyncio.create_task(self._collect())
+
+	async def stop(self) -> None:
+		if self._collector is not None:
+			self._collector.cancel()
+			await asyncio.gather(self._collector, return_exceptions=True)
+			self._collector = None
+		# Flush whatever was still queued, then wait for in-flight batches
+		pending = []
+		while self._queue is not None and not self._queue.empty():
+			pending.append(self._queue.get_nowait())
+		if pending:
+			self._spawn_flush(pending)
+		if self._flushes:
+			await asyncio.gather(*self._flushes, return_exceptions=True)
+
+	async def submit(self, payload: dict) -> dict:
+		if self._queue is None:
+			raise RuntimeError("micro-batcher is not running")
+		loop = asyncio.get_running_loop()
+		future = loop.create_future()
+		self._queue.put_nowait((payload, future, loop.time()))
+		return await future
+
+	async def _collect(self) -> None:
+		loop = asyncio.get_running_loop()
+		while True:
+			batch = []
+			try:
+				batch.append(await self._queue.get())
+				deadline = loop.time() + self.max_wait
+				while len(batch) < self.max_batch_size:
+					if not self._queue.empty():
+						batch.append(self._queue.get_nowait())
+						continue
+					timeout = deadline - loop.time()
+					if timeout <= 0:
+						break
+					try:
+						batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+					except asyncio.TimeoutError:
+						break
+			except asyncio.CancelledError:
+				# Stopping: don't strand callers whose payloads were already dequeued
+				if batch:
+					self._spawn_flush(batch)
+				raise
+			self._spawn_flush(batch)
+
+	def _spawn_flush(self, batch: list) -> None:
+		# Batches run concurrently so a slow flush never stalls collection of the next one
+		task = asyncio.create_task(self._flush(batch))
+		self._flushes.add(task)
+		task.add_done_callback(self._flushes.discard)
+
+	async def _flush(self, batch: list) -> None:
+		now = asyncio.get_running_loop().time()
+		self.batch_sizes.observe(len(batch))
+		for _, _, enqueued_at in batch:
+			self.queue_wait.observe(now - enqueued_at)
+
+		try:
+			results = await self.predict_batch([payload for payload, _, _ in batch])
+		except Exception as e:
+			for _, future, _ in batch:
+				if not future.done():
+					future.set_exception(e)
+			return
+
+		for (_, future, _), result in zip(batch, results):
+			if future.done():
+				continue  # caller went away
+			if "error" in result:
+				future.set_exception(ValueError(result["error"]))
+			else:
+				future.set_result(result)
+
+	def stats(self) -> dict:
+		return {
+			"max_batch_size": self.max_batch_size,
+			"max_wait_ms": self.max_wait * 1000.0,
+			"batch_size": self.batch_sizes.snapshot(),
+			"queue_wait_seconds": self.queue_wait.snapshot(),
+		}
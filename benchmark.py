@@ -0,0 +1,738 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for inference, the suggestion rules and the FastAPI endpoints.
+
+Every timed case reports p50/p95/p99 latency, throughput and the peak
+memory allocated per call. Results can be saved as JSON and compared with
+a previous run to catch regressions (non-zero exit status).
+
+Usage:
+    python benchmark.py                          # run every section
+    python benchmark.py inference suggest api    # run selected sections
+    python benchmark.py --output bench.json
+    python benchmark.py --compare baseline.json --max-regression 0.25
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+from datetime import datetime
+
+import numpy as np
+
+warnings.filterwarnings('ignore')
+
+SAMPLE_PAYLOAD = {
+    'age': 35,
+    'gender': 'Male',
+    'occupation': 'Engineer',
+    'sleep_duration': 7.5,
+    'quality_of_sleep': 8,
+    'physical_activity_level': 60,
+    'stress_level': 5,
+    'bmi_category': 'Normal',
+    'heart_rate': 70,
+    'daily_steps': 8000,
+    'systolic': 120,
+    'diastolic': 80,
+}
+SUGGEST_PAYLOAD = {
+    'age': 45,
+    'physical_activity_level': 3,
+    'stress_level': 8,
+    'gender': 'Female',
+    'heart_rate': 85,
+    'blood_pressure': 135,
+    'sleep_disorder': 'Insomnia',
+}
+# Positional inputs of the Gradio suggestion handlers
+GRADIO_INPUTS = (45, 3, 8, 'Female', 85, 135, 'Insomnia', 'Overweight', 6500)
+
+# Seconds each case is timed for; --min-time overrides it
+MIN_TIME = 0.5
+ALLOC_CALLS = 20
+
+
+def _percentile(sorted_values, q):
+    index = min(len(sorted_values) - 1, max(0, round(q / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def measure(fn, min_time=None, max_calls=100_000):
+    """Time fn for about min_time seconds and return latency percentiles (microseconds),
+    throughput and the peak bytes allocated per call (traced separately, so the
+    timings are not slowed down by tracemalloc)"""
+    min_time = MIN_TIME if min_time is None else min_time
+    fn()  # warm up
+    timings = []
+    deadline = time.perf_counter() + min_time
+    while len(timings) < max_calls:
+        start = time.perf_counter()
+        fn()
+        end = time.perf_counter()
+        timings.append((end - start) * 1e6)
+        if end > deadline:
+            break
+
+    tracemalloc.start()
+    peaks = []
+    for _ in range(min(ALLOC_CALLS, len(timings))):
+        baseline, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        fn()
+        peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+    tracemalloc.stop()
+
+    timings.sort()
+    return {
+        'calls': len(timings),
+        'p50_us': _percentile(timings, 50),
+        'p95_us': _percentile(timings, 95),
+        'p99_us': _percentile(timings, 99),
+        'mean_us': statistics.fmean(timings),
+        'ops_per_s': 1e6 / statistics.fmean(timings),
+        'alloc_peak_bytes': statistics.fmean(peaks),
+    }
+
+
+def print_row(name, stats):
+    print(f"   {name:<38} p50 {stats['p50_us']:>10.1f}  p95 {stats['p95_us']:>10.1f}  p99 {stats['p99_us']:>10.1f} us"
+          f"  {stats['ops_per_s']:>10.0f} ops/s  {stats['alloc_peak_bytes'] / 1024:>8.1f} KiB/call")
+
+
+def run_cases(cases):
+    results = {}
+    for name, fn in cases.items():
+        results[name] = measure(fn)
+        print_row(name, results[name])
+    return results
+
+
+def bench_inference():
+    """ModelBundle encoding and prediction"""
+    from inference import ModelBundle
+
+    print("\n🧠 INFERENCE:")
+    bundle = ModelBundle()
+    flat = ModelBundle(engine='flat')
+    batch = [dict(SAMPLE_PAYLOAD, age=20 + i % 40) for i in range(100)]
+    return run_cases({
+        'ModelBundle.transform_row': lambda: bundle.transform_row(SAMPLE_PAYLOAD),
+        'ModelBundle.transform_batch (100)': lambda: bundle.transform_batch(batch),
+        'ModelBundle.predict': lambda: bundle.predict(SAMPLE_PAYLOAD),
+        'ModelBundle.predict (flat)': lambda: flat.predict(SAMPLE_PAYLOAD),
+        'ModelBundle.predict_batch (100)': lambda: bundle.predict_batch(batch),
+    })
+
+
+def bench_suggest():
+    """Suggestion rules of every front end"""
+    import main
+
+    print("\n💡 SUGGESTION RULES:")
+    # app_advanced opens health_data.db in the working directory on import
+    cwd = os.getcwd()
+    os.chdir(tempfile.mkdtemp(prefix='bench-'))
+    try:
+        import app
+        import app_advanced
+    finally:
+        os.chdir(cwd)
+
+    import pandas as pd
+    from suggestion_engine import LIFESTYLE_LOOKUP, LIFESTYLE_RULES
+
+    req = main.SuggestRequest(**SUGGEST_PAYLOAD)
+    rng = np.random.default_rng(0)
+    frame = pd.DataFrame({
+        'age': rng.integers(5, 90, 10_000),
+        'physical_activity_level': rng.uniform(0, 10, 10_000),
+        'stress_level': rng.uniform(0, 10, 10_000),
+        'gender': rng.choice(['Male', 'Female', 'Other'], 10_000),
+        'heart_rate': rng.integers(50, 110, 10_000),
+        'blood_pressure': rng.integers(100, 160, 10_000),
+        'sleep_disorder': rng.choice(['None', 'Insomnia', 'Sleep Apnea'], 10_000),
+        'bmi_category': rng.choice(['Normal', 'Overweight', 'Obese'], 10_000),
+        'daily_steps': rng.integers(2000, 12000, 10_000),
+    })
+    records = frame.to_dict('records')
+    profile = dict(zip(('age', 'physical_activity_level', 'stress_level', 'gender', 'heart_rate', 'blood_pressure', 'sleep_disorder', 'bmi_category', 'daily_steps'), GRADIO_INPUTS))
+
+    stats = LIFESTYLE_LOOKUP.stats()
+    print(f"   lookup tables: {stats['entries']} entries, {stats['table_bytes'] / 2**20:.1f} MiB, built in {stats['build_seconds'] * 1000:.1f} ms"
+          f" (all {stats['full_cross_product']} signatures rendered would be ~{stats['full_table_bytes_estimate'] / 2**30:.1f} GiB)")
+    return run_cases({
+        'LIFESTYLE_RULES.evaluate': lambda: LIFESTYLE_RULES.evaluate(profile),
+        'LIFESTYLE_LOOKUP.render': lambda: LIFESTYLE_LOOKUP.render(profile),
+        'main.suggest_health': lambda: main.suggest_health(req),
+        'app.suggest_health': lambda: app.suggest_health(*GRADIO_INPUTS),
+        'app_advanced.suggest_health_advanced': lambda: app_advanced.suggest_health_advanced(*GRADIO_INPUTS, '', False),
+        'LIFESTYLE_RULES.evaluate x10k (loop)': lambda: [LIFESTYLE_RULES.evaluate(r) for r in records],
+        'LIFESTYLE_RULES.evaluate_many (10k)': lambda: LIFESTYLE_RULES.evaluate_many(frame),
+    })
+
+
+def bench_api():
+    """/suggest and /predict through an in-process client"""
+    from fastapi.testclient import TestClient
+    import main
+
+    print("\n🌐 API (in-process TestClient):")
+    client = TestClient(main.app)
+
+    def post(path, payload):
+        def call():
+            resp = client.post(path, json=payload)
+            assert resp.status_code == 200, resp.text
+        return call
+
+    return run_cases({
+        'POST /suggest': post('/suggest', SUGGEST_PAYLOAD),
+        'POST /predict': post('/predict', SAMPLE_PAYLOAD),
+        'POST /predict/batch (100)': post('/predict/batch', [dict(SAMPLE_PAYLOAD, age=20 + i % 40) for i in range(100)]),
+    })
+
+
+def bench_serialization():
+    """Response bodies of /suggest and /predict: FastAPI's default path against FastJSONResponse"""
+    from fastapi.encoders import jsonable_encoder
+    from starlette.responses import JSONResponse
+    import main
+    from inference import ModelBundle
+    from json_response import BACKEND, FastJSONResponse
+    from suggestion_engine import API_LOOKUP
+
+    print(f"\n🧾 RESPONSE SERIALIZATION (FastJSONResponse backend: {BACKEND}):")
+    req = main.SuggestRequest(**SUGGEST_PAYLOAD)
+    prediction = ModelBundle().predict(SAMPLE_PAYLOAD)
+    results = run_cases({
+        '/suggest default': lambda: JSONResponse(jsonable_encoder({"suggestions": main.suggest_health(req)})),
+        '/suggest fast (pre-encoded)': lambda: FastJSONResponse(b'{"suggestions":' + API_LOOKUP.render_json(vars(req)) + b'}'),
+        '/predict default': lambda: JSONResponse(jsonable_encoder(prediction)),
+        '/predict fast': lambda: FastJSONResponse(prediction),
+    })
+    for route in ('/suggest', '/predict'):
+        saved = results[f'{route} default']['p50_us'] - results[next(k for k in results if k.startswith(f'{route} fast'))]['p50_us']
+        print(f"   {route:<38} saves {saved:>8.1f} us/request (p50)")
+    return results
+
+
+def bench_metrics():
+    """Cost of the instrumentation itself"""
+    from inference import ModelBundle
+    from metrics import MetricsMiddleware, Registry
+
+    print("\n📏 METRICS OVERHEAD:")
+    registry = Registry()
+    counter = registry.counter('bench_total')
+    gauge = registry.gauge('bench_in_flight')
+    histogram = registry.histogram('bench_seconds')
+
+    class Route:
+        path = '/bench'
+
+    async def endpoint(scope, receive, send):
+        scope['route'] = Route
+        await send({'type': 'http.response.start', 'status': 200, 'headers': []})
+        await send({'type': 'http.response.body', 'body': b''})
+
+    async def send(message):
+        pass
+
+    middleware = MetricsMiddleware(endpoint, registry)
+
+    def drive(app):
+        # Nothing in these apps suspends, so one send() runs the whole request
+        try:
+            app({'type': 'http', 'method': 'GET'}, None, send).send(None)
+        except StopIteration:
+            pass
+
+    # The flat engine's short forest pass keeps the hook's cost visible
+    bundle = ModelBundle(engine='flat')
+    timed = ModelBundle(engine='flat', stage_hook=lambda stage, seconds: histogram.observe(seconds))
+    for _ in range(5):
+        drive(middleware)
+    return run_cases({
+        'Counter.inc': counter.inc,
+        'Gauge.inc + dec': lambda: (gauge.inc(), gauge.dec()),
+        'Histogram.observe': lambda: histogram.observe(0.0003),
+        'ASGI request (bare)': lambda: drive(endpoint),
+        'ASGI request (MetricsMiddleware)': lambda: drive(middleware),
+        'ModelBundle.predict (flat)': lambda: bundle.predict(SAMPLE_PAYLOAD),
+        'ModelBundle.predict (flat, stage_hook)': lambda: timed.predict(SAMPLE_PAYLOAD),
+        'Registry.render': registry.render,
+    })
+
+
+def bench_database(users=100, records_per_user=20):
+    """HealthDatabase operations: a fresh connection per call vs persistent per-thread WAL connections"""
+    import sqlite3
+    from database import HealthDatabase
+
+    class ConnectPerCall(HealthDatabase):
+        # The previous behaviour: a new default-configured connection for every call, closed when dropped
+        def _connect(self):
+            return sqlite3.connect(self.db_path)
+
+    print(f"\n🗄️  DATABASE ({users} users x {records_per_user} records):")
+    record = {'physical_activity_level': 3, 'stress_level': 8, 'heart_rate': 85, 'blood_pressure': 135,
+              'sleep_disorder': 'Insomnia', 'bmi_category': 'Overweight', 'daily_steps': 6500,
+              'suggestions': 'x' * 600, 'risk_factors': ['High stress'], 'positive_factors': []}
+    directory = tempfile.mkdtemp(prefix='bench-db-')
+    databases = {'connect per call': ConnectPerCall(os.path.join(directory, 'legacy.db')),
+                 'thread-local WAL': HealthDatabase(os.path.join(directory, 'pooled.db'))}
+    cases = {}
+    for label, db in databases.items():
+        for i in range(users):
+            user_id = db.create_user(f'user {i}')
+            for _ in range(records_per_user):
+                db.save_health_record(user_id, record)
+        cases[f'get_user ({label})'] = lambda db=db: db.get_user(users // 2)
+        cases[f'get_user_health_history ({label})'] = lambda db=db: db.get_user_health_history(users // 2)
+    # Writes last, so every read above sees the same table sizes
+    for label, db in databases.items():
+        cases[f'save_health_record ({label})'] = lambda db=db: db.save_health_record(users + 1, record)
+    try:
+        return run_cases(cases)
+    finally:
+        for db in databases.values():
+            db.close()
+
+
+
+def bench_indexes(records=1_000_000, users=10_000):
+    """Per-user lookups on a large health_data.db, before and after the index migration"""
+    import sqlite3
+    from database import HealthDatabase, apply_migrations
+
+    class Unmigrated(HealthDatabase):
+        # Opens the database as it is, so the lookups can be timed before the upgrade
+        def init_database(self):
+            pass
+
+    print(f"\n🗂️  INDEXES ({records} health records and {records} analytics rows, {users} users):")
+    path = os.path.join(tempfile.mkdtemp(prefix='bench-indexes-'), 'health.db')
+    conn = sqlite3.connect(path)
+    apply_migrations(conn, target=1)  # the tables without indexes
+    metrics = ('physical_activity', 'stress_level', 'heart_rate', 'blood_pressure', 'daily_steps')
+    start = time.perf_counter()
+    with conn:
+        conn.executemany('INSERT INTO users (name) VALUES (?)', ((f'user {i}',) for i in range(users)))
+        # Each user's rows are spread through the table, as they are when users come back over time
+        conn.executemany(
+            "INSERT INTO health_records (user_id, stress_level, suggestions, risk_factors, positive_factors, created_at) "
+            "VALUES (?, ?, ?, '[]', '[]', datetime('2024-01-01', ? || ' minutes'))",
+            ((1 + i % users, i % 10, 'x' * 200, i) for i in range(records)))
+        conn.executemany(
+            "INSERT INTO health_analytics (user_id, metric_name, metric_value, date_recorded) "
+            "VALUES (?, ?, ?, date('2024-01-01', ? || ' days'))",
+            ((1 + i % users, metrics[i // users % len(metrics)], i % 100, i // (users * len(metrics))) for i in range(records)))
+    conn.close()
+    print(f"   built in {time.perf_counter() - start:.1f}s, {os.path.getsize(path) / 2**20:.0f} MiB")
+
+    user_id = users // 2
+    plans = {
+        'history': ('SELECT * FROM health_records WHERE user_id = ? ORDER BY created_at DESC LIMIT ?', (user_id, 50)),
+        'analytics (one metric)': ('SELECT * FROM health_analytics WHERE user_id = ? AND metric_name = ? ORDER BY date_recorded DESC', (user_id, 'stress_level')),
+        'analytics (all metrics)': ('SELECT * FROM health_analytics WHERE user_id = ? ORDER BY date_recorded DESC', (user_id,)),
+    }
+    results = {}
+    for label in ('before', 'after'):
+        if label == 'after':
+            start = time.perf_counter()
+            HealthDatabase(path).close()  # upgrades in place
+            print(f"   migration to the latest schema: {time.perf_counter() - start:.1f}s")
+        with Unmigrated(path) as db:
+            conn = db._connect()
+            for name, (sql, params) in plans.items():
+                print(f"   {name} ({label}): {'; '.join(row[3] for row in conn.execute('EXPLAIN QUERY PLAN ' + sql, params))}")
+            results.update(run_cases({
+                f'get_user_health_history ({label})': lambda: db.get_user_health_history(user_id),
+                f'get_health_analytics (metric, {label})': lambda: db.get_health_analytics(user_id, 'stress_level'),
+                f'get_health_analytics (all, {label})': lambda: db.get_health_analytics(user_id),
+            }))
+    return results
+
+def bench_pagination(users=500_000, page_size=50):
+    """Listing users: everything at once vs keyset pages vs a fetchmany stream"""
+    from collections import deque
+    from database import HealthDatabase
+
+    print(f"\n📄 PAGINATION ({users} users, pages of {page_size}):")
+    db = HealthDatabase(os.path.join(tempfile.mkdtemp(prefix='bench-pages-'), 'health.db'))
+    conn = db._connect()
+    with conn:
+        conn.executemany("INSERT INTO users (name, age, gender, created_at) VALUES (?, ?, ?, datetime('2024-01-01', ? || ' seconds'))",
+                         ((f'user {i}', 20 + i % 60, 'Female', i // 3) for i in range(users)))
+    # The page halfway down the list, reached by following cursors
+    middle, _ = db.get_users_page(users // 2)
+    cursor = (middle[-1]['created_at'], middle[-1]['id'])
+    try:
+        return run_cases({
+            'get_all_users': db.get_all_users,
+            'get_users_page (first)': lambda: db.get_users_page(page_size),
+            'get_users_page (middle, keyset)': lambda: db.get_users_page(page_size, after=cursor),
+            'middle page (LIMIT/OFFSET)': lambda: conn.execute(
+                'SELECT * FROM users ORDER BY created_at DESC, id DESC LIMIT ? OFFSET ?', (page_size, users // 2)).fetchall(),
+            'iter_users (streamed)': lambda: deque(db.iter_users(), maxlen=0),
+        })
+    finally:
+        db.close()
+
+def _write_syscalls():
+    """write() calls this process has made so far, from /proc/self/io (None where that is unavailable)"""
+    try:
+        with open('/proc/self/io') as f:
+            return next(int(line.split()[1]) for line in f if line.startswith('syscw:'))
+    except (OSError, StopIteration):
+        return None
+
+
+def bench_submissions(batch_size=64, submissions=500):
+    """Saving a "save my data" submission: seven commits vs one transaction vs one transaction per batch"""
+    from database import HealthDatabase
+
+    print(f"\n💾 SUBMISSIONS (bulk batches of {batch_size}):")
+    health_data = {'physical_activity_level': 3, 'stress_level': 8, 'heart_rate': 85, 'blood_pressure': 135,
+                   'sleep_disorder': 'Insomnia', 'bmi_category': 'Overweight', 'daily_steps': 6500,
+                   'suggestions': 'x' * 600, 'risk_factors': ['High stress'], 'positive_factors': []}
+    analytics = {'physical_activity': 3, 'stress_level': 8, 'heart_rate': 85, 'blood_pressure': 135, 'daily_steps': 6500}
+    submission = {'name': 'user', 'age': 45, 'gender': 'Female', 'health_data': health_data, 'analytics': analytics}
+    directory = tempfile.mkdtemp(prefix='bench-submissions-')
+
+    def per_call(db):
+        # What suggest_health_advanced did before: a commit per statement
+        user_id = db.create_user(name='user', age=45, gender='Female')
+        db.save_health_record(user_id, health_data)
+        for metric_name, metric_value in analytics.items():
+            db.save_health_analytics(user_id, metric_name, metric_value)
+
+    strategies = {
+        'per-call commits': (1, per_call),
+        'save_submission': (1, lambda db: db.save_submission('user', health_data, analytics, age=45, gender='Female')),
+        f'save_submissions (x{batch_size})': (batch_size, lambda db: db.save_submissions([submission] * batch_size)),
+    }
+    results = {}
+    for label, (per_op, save) in strategies.items():
+        with HealthDatabase(os.path.join(directory, f'{len(results)}.db')) as db:
+            stats = run_cases({label: lambda: save(db)})[label]
+            # Separate fixed-size run for the write syscall count
+            before = _write_syscalls()
+            for _ in range(max(1, submissions // per_op)):
+                save(db)
+            after = _write_syscalls()
+        stats['submissions_per_s'] = stats['ops_per_s'] * per_op
+        if before is not None:
+            stats['write_syscalls_per_submission'] = (after - before) / (max(1, submissions // per_op) * per_op)
+        results[label] = stats
+    for label, stats in results.items():
+        writes = stats.get('write_syscalls_per_submission')
+        print(f"   {label:<38} {stats['submissions_per_s']:>10.0f} submissions/s"
+              + (f"   {writes:6.2f} write() calls/submission" if writes is not None else ''))
+    return results
+
+
+def bench_cohort(rows=100_000):
+    """Synthetic rows through the offline scoring path (score_cohort.py)"""
+    from inference import ModelBundle
+    from score_cohort import score_chunk
+    from synthetic_data import SyntheticCohort, format_csv
+
+    print(f"\n📦 COHORT ({rows} synthetic rows):")
+    cohort = SyntheticCohort.from_csv()
+    rng = np.random.default_rng(0)
+    chunk = cohort.sample(rows, rng)
+    bundle = ModelBundle()
+    results = run_cases({
+        'SyntheticCohort.sample': lambda: cohort.sample(rows, rng),
+        'synthetic_data.format_csv': lambda: format_csv(chunk),
+        'score_chunk': lambda: score_chunk(bundle, chunk.copy()),
+    })
+    for name, stats in results.items():
+        print(f"   {name:<38} {rows * stats['ops_per_s']:>12.0f} rows/s")
+    return results
+
+
+def bench_engines():
+    """sklearn RandomForest vs the flattened array engine"""
+    from inference import ModelBundle
+
+    print("\n🌲 FOREST ENGINES:")
+    bundles = {engine: ModelBundle(engine=engine) for engine in ('sklearn', 'flat')}
+    batch = [dict(SAMPLE_PAYLOAD, age=20 + i % 40, daily_steps=3000 + i * 7) for i in range(1000)]
+    X_row = bundles['sklearn'].transform_row(SAMPLE_PAYLOAD)
+    X_batch, _ = bundles['sklearn'].transform_batch(batch)
+
+    results = {}
+    for engine, bundle in bundles.items():
+        results.update(run_cases({
+            f'{engine} predict_proba (1 row)': lambda: bundle.forest.predict_proba(X_row),
+            f'{engine} predict_proba (1000 rows)': lambda: bundle.forest.predict_proba(X_batch),
+            f'{engine} ModelBundle.predict': lambda: bundle.predict(SAMPLE_PAYLOAD),
+        }))
+
+    print("\n   Speedup of flat over sklearn (p50):")
+    for name in ('predict_proba (1 row)', 'predict_proba (1000 rows)', 'ModelBundle.predict'):
+        speedup = results[f'sklearn {name}']['p50_us'] / results[f'flat {name}']['p50_us']
+        print(f"   {name:<38} {speedup:>10.1f}x")
+
+    assert np.allclose(bundles['sklearn'].forest.predict_proba(X_batch), bundles['flat'].forest.predict_proba(X_batch))
+    return results
+
+
+def bench_microbatch(concurrency=256):
+    """Concurrent single-profile predictions: one forest pass each vs coalesced by MicroBatcher"""
+    import asyncio
+    from fastapi.concurrency import run_in_threadpool
+    from batcher import MicroBatcher
+    from inference import ModelBundle
+
+    print(f"\n📦 MICRO-BATCHING ({concurrency} concurrent /predict-style calls):")
+    bundle = ModelBundle()
+    payloads = [dict(SAMPLE_PAYLOAD, age=20 + i % 40) for i in range(concurrency)]
+
+    async def unbatched():
+        await asyncio.gather(*(run_in_threadpool(bundle.predict, p) for p in payloads))
+
+    async def batched(max_batch_size, max_wait_ms):
+        async def predict_batch(batch):
+            return await run_in_threadpool(bundle.predict_batch, batch)
+
+        batcher = MicroBatcher(predict_batch, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms)
+        batcher.start()
+        start = time.perf_counter()
+        await asyncio.gather(*(batcher.submit(p) for p in payloads))
+        elapsed = time.perf_counter() - start
+        await batcher.stop()
+        return elapsed, batcher.stats()
+
+    start = time.perf_counter()
+    asyncio.run(unbatched())
+    baseline = time.perf_counter() - start
+    results = {'unbatched': {'ops_per_s': concurrency / baseline}}
+    print(f"   {'unbatched':<38} {concurrency / baseline:>10.0f} req/s")
+    for max_batch_size, max_wait_ms in [(16, 2.0), (64, 2.0), (256, 5.0)]:
+        elapsed, stats = asyncio.run(batched(max_batch_size, max_wait_ms))
+        mean_batch = stats['batch_size']['sum'] / stats['batch_size']['count']
+        mean_wait_ms = stats['queue_wait_seconds']['sum'] / stats['queue_wait_seconds']['count'] * 1000
+        name = f'batch<={max_batch_size}, wait<={max_wait_ms}ms'
+        results[name] = {'ops_per_s': concurrency / elapsed, 'mean_batch': mean_batch, 'mean_queue_wait_ms': mean_wait_ms}
+        print(f"   {name:<38} {concurrency / elapsed:>10.0f} req/s"
+              f"  (mean batch {mean_batch:.1f}, mean queue wait {mean_wait_ms:.2f} ms)")
+    return results
+
+
+GRADIO_SERVER = """
+import importlib, json, os, sys, tempfile
+sys.path.insert(0, sys.argv[1])
+os.chdir(tempfile.mkdtemp(prefix='bench-'))  # app_advanced opens health_data.db here
+demo = importlib.import_module(sys.argv[2]).build_demo()
+_, url, _ = demo.launch(prevent_thread_lock=True, quiet=True)
+dependencies = demo.config['dependencies']
+fn_index = next(i for i, d in enumerate(dependencies) if d.get('batch'))
+print(json.dumps({'url': url, 'fn_index': fn_index, 'trigger_id': dependencies[fn_index]['targets'][0][0]}), flush=True)
+sys.stdin.read()
+"""
+
+
+def bench_gradio(users=300):
+    """Simultaneous submissions through the Gradio queue: one event at a time vs queued batches"""
+    import asyncio
+    import subprocess
+    import uuid
+    import httpx
+
+    async def submit_all(server, rows):
+        # No keep-alive reuse: the server may close an idle connection just as it is picked again
+        limits = httpx.Limits(max_connections=None, max_keepalive_connections=0)
+        async with httpx.AsyncClient(base_url=server['url'], timeout=300, limits=limits) as client:
+            async def submit(row):
+                session = uuid.uuid4().hex
+                start = time.perf_counter()
+                join = {'data': row, 'fn_index': server['fn_index'], 'trigger_id': server['trigger_id'], 'session_hash': session, 'event_data': None}
+                (await client.post('queue/join', json=join)).raise_for_status()
+                async with client.stream('GET', 'queue/data', params={'session_hash': session}) as stream:
+                    async for line in stream.aiter_lines():
+                        if '"process_completed"' in line:
+                            assert '"success":true' in line, line
+                            return time.perf_counter() - start
+                raise RuntimeError('stream closed before the event completed')
+
+            start = time.perf_counter()
+            latencies = await asyncio.gather(*(submit(row) for row in rows))
+            return time.perf_counter() - start, sorted(latencies)
+
+    def run(module, rows, env):
+        # A fresh server process per configuration; Gradio does not relaunch cleanly in-process
+        proc = subprocess.Popen(
+            [sys.executable, '-c', GRADIO_SERVER, os.path.dirname(os.path.abspath(__file__)), module],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+            env={**os.environ, **env},
+        )
+        try:
+            server = json.loads(proc.stdout.readline())
+            elapsed, latencies = asyncio.run(submit_all(server, rows))
+        finally:
+            proc.kill()
+            proc.wait()
+        return {
+            'ops_per_s': len(rows) / elapsed,
+            'p50_us': _percentile(latencies, 50) * 1e6,
+            'p95_us': _percentile(latencies, 95) * 1e6,
+        }
+
+    print(f"\n🖥️  GRADIO QUEUE ({users} simultaneous submissions):")
+    suggest_rows = [list(GRADIO_INPUTS[:-1]) + [5000 + i] for i in range(users)]
+    advanced_rows = [row + [f'kiosk user {i}', True] for i, row in enumerate(suggest_rows)]
+    configs = {
+        'one at a time': {'GRADIO_MAX_BATCH_SIZE': '1', 'GRADIO_CONCURRENCY_LIMIT': '1'},
+        'queued batches (defaults)': {},
+    }
+    results = {}
+    for module, rows in (('app', suggest_rows), ('app_advanced', advanced_rows)):
+        for label, env in configs.items():
+            name = f'{module}: {label}'
+            results[name] = run(module, rows, env)
+            print(f"   {name:<44} {results[name]['ops_per_s']:>8.0f} req/s"
+                  f"  p50 {results[name]['p50_us'] / 1000:>8.1f} ms  p95 {results[name]['p95_us'] / 1000:>8.1f} ms")
+    return results
+
+
+STARTUP_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+from inference import ModelBundle
+bundle = ModelBundle(**json.loads(sys.argv[1]))
+bundle.predict(json.loads(sys.argv[2]))
+elapsed = time.perf_counter() - start
+memory = {}
+with open('/proc/self/smaps_rollup') as f:
+    for line in f:
+        key, _, value = line.partition(':')
+        if key in ('Rss', 'Pss', 'Shared_Clean', 'Private_Clean', 'Private_Dirty'):
+            memory[key] = int(value.split()[0])
+print(json.dumps({'startup_s': elapsed, **memory}), flush=True)
+sys.stdin.read()  # stay alive until every worker has loaded, so PSS reflects sharing
+"""
+
+
+def bench_startup(workers=4):
+    """Startup time and per-worker memory for the joblib artifacts vs the memory-mapped bundle"""
+    import subprocess
+
+    if not os.path.exists('/proc/self/smaps_rollup'):
+        print("\n🚀 STARTUP: skipped (needs Linux /proc/self/smaps_rollup)")
+        return {}
+
+    print(f"\n🚀 STARTUP ({workers} concurrent workers, memory in MiB per worker):")
+    here = os.path.dirname(os.path.abspath(__file__))
+    configs = {
+        'joblib + sklearn': {'engine': 'sklearn'},
+        'joblib + flat': {'engine': 'flat'},
+        'mmap bundle + flat': {'engine': 'flat', 'artifact_format': 'mmap'},
+    }
+    results = {}
+    for name, options in configs.items():
+        procs = [
+            subprocess.Popen(
+                [sys.executable, '-W', 'ignore', '-c', STARTUP_PROBE, json.dumps(options), json.dumps(SAMPLE_PAYLOAD)],
+                cwd=here, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True,
+            )
+            for _ in range(workers)
+        ]
+        reports = [json.loads(proc.stdout.readline()) for proc in procs]
+        for proc in procs:
+            proc.stdin.close()
+            proc.wait()
+        mean = {key: statistics.fmean(r[key] for r in reports) for key in reports[0]}
+        results[name] = mean
+        print(f"   {name:<22} startup {mean['startup_s'] * 1000:7.0f} ms   RSS {mean['Rss'] / 1024:6.1f}"
+              f"   PSS {mean['Pss'] / 1024:6.1f}   private {(mean['Private_Clean'] + mean['Private_Dirty']) / 1024:6.1f}")
+    return results
+
+
+SECTIONS = {
+    'inference': bench_inference,
+    'suggest': bench_suggest,
+    'api': bench_api,
+    'serialization': bench_serialization,
+    'database': bench_database,
+    'submissions': bench_submissions,
+    'indexes': bench_indexes,
+    'pagination': bench_pagination,
+    'metrics': bench_metrics,
+    'cohort': bench_cohort,
+    'engines': bench_engines,
+    'microbatch': bench_microbatch,
+    'gradio': bench_gradio,
+    'startup': bench_startup,
+}
+
+
+def compare(results, baseline, max_regression):
+    """Print p50 changes against a saved run; returns the cases that got slower than allowed"""
+    regressions = []
+    print(f"\n📊 COMPARISON (p50, allowed regression {max_regression:.0%}):")
+    for key, stats in results.items():
+        old = baseline.get('results', {}).get(key)
+        if not old or 'p50_us' not in stats or 'p50_us' not in old:
+            continue
+        change = stats['p50_us'] / old['p50_us'] - 1
+        flag = '❌' if change > max_regression else '  '
+        print(f" {flag} {key:<52} {old['p50_us']:>10.1f} -> {stats['p50_us']:>10.1f} us  ({change:+.1%})")
+        if change > max_regression:
+            regressions.append(key)
+    return regressions
+
+
+def main():
+    global MIN_TIME
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('sections', nargs='*', help=f"sections to run: {', '.join(SECTIONS)} (default: all)")
+    parser.add_argument('--output', help="write results to this JSON file")
+    parser.add_argument('--compare', help="JSON file from a previous run to compare p50 latencies against")
+    parser.add_argument('--max-regression', type=float, default=0.25, help="fail if a p50 grows by more than this fraction (default: 0.25)")
+    parser.add_argument('--min-time', type=float, default=MIN_TIME, help="seconds to time each case (default: %(default)s)")
+    args = parser.parse_args()
+    unknown = set(args.sections) - set(SECTIONS)
+    if unknown:
+        parser.error(f"unknown section(s): {', '.join(sorted(unknown))}")
+    MIN_TIME = args.min_time
+
+    results = {}
+    for section in args.sections or SECTIONS:
+        for name, stats in SECTIONS[section]().items():
+            results[f"{section}/{name}"] = stats
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Saved results to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.max_regression)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) above {args.max_regression:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
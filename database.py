@@ -1,174 +1,318 @@
 import sqlite3
 import json
+import threading
+import weakref
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import Iterator, List, Dict, Optional, Tuple
 import os
 
+# Applied once to every new connection
+CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",  # readers and the writer no longer block each other
+    "PRAGMA synchronous=NORMAL",  # fsync at checkpoints instead of every commit; durable with WAL
+    "PRAGMA cache_size=-16384",  # 16 MiB page cache per connection
+    "PRAGMA mmap_size=268435456",  # read pages through a 256 MiB memory map
+    "PRAGMA temp_store=MEMORY",
+)
+# How long a write waits for another connection's lock before "database is locked"
+BUSY_TIMEOUT_SECONDS = 5.0
+
+# Ordered schema migrations: (version, description, statements). Each one runs in its own
+# transaction together with its schema_version row. Append new ones; never edit one that has shipped.
+MIGRATIONS = [
+    (1, 'users, health_records and health_analytics tables', (
+        '''
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            email TEXT UNIQUE,
+            age INTEGER,
+            gender TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS health_records (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            physical_activity_level REAL,
+            stress_level REAL,
+            heart_rate REAL,
+            blood_pressure REAL,
+            sleep_disorder TEXT,
+            bmi_category TEXT,
+            daily_steps INTEGER,
+            suggestions TEXT,
+            risk_factors TEXT,
+            positive_factors TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS health_analytics (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            metric_name TEXT,
+            metric_value REAL,
+            date_recorded DATE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+        ''',
+    )),
+    (2, 'indexes for per-user history and analytics lookups', (
+        # get_user_health_history: no scan, no sort; rows are read by rowid for the remaining columns
+        'CREATE INDEX IF NOT EXISTS idx_health_records_user_created ON health_records (user_id, created_at)',
+        # get_health_analytics: every column is in the index (id is the rowid), so it is never read from the table
+        'CREATE INDEX IF NOT EXISTS idx_health_analytics_user_metric '
+        'ON health_analytics (user_id, metric_name, date_recorded, metric_value, created_at)',
+    )),
+    (3, 'index for paging through users', (
+        # Keyset pages of users by (created_at, id); id is the rowid, which every index ends with
+        'CREATE INDEX IF NOT EXISTS idx_users_created ON users (created_at)',
+    )),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    """Latest migration applied to the database, 0 for a new or pre-migration database"""
+    if not conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'schema_version'").fetchone():
+        return 0
+    return conn.execute('SELECT COALESCE(MAX(version), 0) FROM schema_version').fetchone()[0]
+
+def apply_migrations(conn: sqlite3.Connection, target: int = None) -> List[int]:
+    """Upgrade the database in place up to target (default: the latest); returns the versions applied
+    
+    Databases created before versioning already have the version 1 tables,
+    which it creates with IF NOT EXISTS, so they are simply marked as version 1.
+    """
+    target = SCHEMA_VERSION if target is None else target
+    with conn:
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INTEGER PRIMARY KEY,
+                description TEXT NOT NULL,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+    
+    applied = []
+    for version, description, statements in MIGRATIONS:
+        if version > target:
+            break
+        with conn:
+            # The write lock is held from here, so a concurrent process cannot apply the same migration
+            conn.execute('BEGIN IMMEDIATE')
+            if get_schema_version(conn) >= version:
+                continue
+            for statement in statements:
+                conn.execute(statement)
+            conn.execute('INSERT INTO schema_version (version, description) VALUES (?, ?)', (version, description))
+        applied.append(version)
+    return applied
+
+INSERT_USER = 'INSERT INTO users (name, email, age, gender) VALUES (?, ?, ?, ?)'
+INSERT_HEALTH_RECORD = '''
+    INSERT INTO health_records (
+        user_id, physical_activity_level, stress_level, heart_rate,
+        blood_pressure, sleep_disorder, bmi_category, daily_steps,
+        suggestions, risk_factors, positive_factors
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+INSERT_HEALTH_ANALYTICS = 'INSERT INTO health_analytics (user_id, metric_name, metric_value, date_recorded) VALUES (?, ?, ?, ?)'
+
+def _health_record_row(user_id: int, health_data: Dict) -> tuple:
+    return (
+        user_id,
+        health_data.get('physical_activity_level'),
+        health_data.get('stress_level'),
+        health_data.get('heart_rate'),
+        health_data.get('blood_pressure'),
+        health_data.get('sleep_disorder'),
+        health_data.get('bmi_category'),
+        health_data.get('daily_steps'),
+        health_data.get('suggestions'),
+        json.dumps(health_data.get('risk_factors', [])),
+        json.dumps(health_data.get('positive_factors', []))
+    )
+
+def _user_dict(user: tuple) -> Dict:
+    return {
+        'id': user[0],
+        'name': user[1],
+        'email': user[2],
+        'age': user[3],
+        'gender': user[4],
+        'created_at': user[5],
+        'updated_at': user[6]
+    }
+
+def _health_record_dict(record: tuple) -> Dict:
+    return {
+        'id': record[0],
+        'user_id': record[1],
+        'physical_activity_level': record[2],
+        'stress_level': record[3],
+        'heart_rate': record[4],
+        'blood_pressure': record[5],
+        'sleep_disorder': record[6],
+        'bmi_category': record[7],
+        'daily_steps': record[8],
+        'suggestions': record[9],
+        'risk_factors': json.loads(record[10]) if record[10] else [],
+        'positive_factors': json.loads(record[11]) if record[11] else [],
+        'created_at': record[12]
+    }
+
+# Position of a row in a (created_at DESC, id DESC) listing; pages start after it
+PageCursor = Tuple[str, int]
+# Rows per fetchmany call in the iter_* generators
+FETCH_CHUNK_SIZE = 1000
+
+class _ConnectionOwner:
+    """Kept in the owning thread's threading.local, so it is collected when that thread exits"""
+    __slots__ = ('__weakref__',)
+
 class HealthDatabase:
-    def __init__(self, db_path: str = "health_data.db"):
+    def __init__(self, db_path: str = "health_data.db", busy_timeout: float = BUSY_TIMEOUT_SECONDS):
         self.db_path = db_path
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        # Reentrant: a connection's finalizer can run on a thread that already holds it
+        self._connections_lock = threading.RLock()
         self.init_database()
     
-    def init_database(self):
-        """Initialize the database with required tables"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Users table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                email TEXT UNIQUE,
-                age INTEGER,
-                gender TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Health records table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS health_records (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER,
-                physical_activity_level REAL,
-                stress_level REAL,
-                heart_rate REAL,
-                blood_pressure REAL,
-                sleep_disorder TEXT,
-                bmi_category TEXT,
-                daily_steps INTEGER,
-                suggestions TEXT,
-                risk_factors TEXT,
-                positive_factors TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users (id)
-            )
-        ''')
-        
-        # Health analytics table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS health_analytics (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER,
-                metric_name TEXT,
-                metric_value REAL,
-                date_recorded DATE,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users (id)
-            )
-        ''')
-        
-        conn.commit()
+    def _connect(self) -> sqlite3.Connection:
+        """This thread's connection, opened and configured on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # check_same_thread=False only so close() can close it from another thread
+            conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout, check_same_thread=False)
+            for pragma in CONNECTION_PRAGMAS:
+                conn.execute(pragma)
+            # Worker threads come and go (anyio retires idle ones after 10 s): close the
+            # connection when its thread exits instead of keeping it until close()
+            owner = _ConnectionOwner()
+            finalizer = weakref.finalize(owner, HealthDatabase._release, weakref.ref(self), conn)
+            finalizer.atexit = False
+            self._local.conn = conn
+            self._local.owner = owner
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+    
+    @staticmethod
+    def _release(db_ref: weakref.ref, conn: sqlite3.Connection):
+        db = db_ref()
+        if db is not None:
+            with db._connections_lock:
+                if conn in db._connections:
+                    db._connections.remove(conn)
         conn.close()
     
+    def close(self):
+        """Close every thread's connection; the next call on any thread reconnects"""
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+            # Dropped after the lock is released, which runs the owners' finalizers (closing twice is harmless)
+            old_local, self._local = self._local, threading.local()
+        for conn in connections:
+            conn.close()
+        del old_local
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
+    def init_database(self):
+        """Create the tables, or upgrade an existing database to the latest schema"""
+        apply_migrations(self._connect())
+    
+    def schema_version(self) -> int:
+        return get_schema_version(self._connect())
+    
     def create_user(self, name: str, email: str = None, age: int = None, gender: str = None) -> int:
         """Create a new user and return user ID"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        conn = self._connect()
+        with conn:
+            cursor = conn.cursor()
         
-        cursor.execute('''
-            INSERT INTO users (name, email, age, gender)
-            VALUES (?, ?, ?, ?)
-        ''', (name, email, age, gender))
+            cursor.execute(INSERT_USER, (name, email, age, gender))
         
-        user_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+            user_id = cursor.lastrowid
         
         return user_id
     
     def get_user(self, user_id: int) -> Optional[Dict]:
         """Get user information by ID"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
         
         cursor.execute('SELECT * FROM users WHERE id = ?', (user_id,))
         user = cursor.fetchone()
-        conn.close()
         
         if user:
-            return {
-                'id': user[0],
-                'name': user[1],
-                'email': user[2],
-                'age': user[3],
-                'gender': user[4],
-                'created_at': user[5],
-                'updated_at': user[6]
-            }
+            return _user_dict(user)
         return None
     
     def save_health_record(self, user_id: int, health_data: Dict) -> int:
         """Save a health record for a user"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        conn = self._connect()
+        with conn:
+            cursor = conn.cursor()
         
-        cursor.execute('''
-            INSERT INTO health_records (
-                user_id, physical_activity_level, stress_level, heart_rate,
-                blood_pressure, sleep_disorder, bmi_category, daily_steps,
-                suggestions, risk_factors, positive_factors
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            user_id,
-            health_data.get('physical_activity_level'),
-            health_data.get('stress_level'),
-            health_data.get('heart_rate'),
-            health_data.get('blood_pressure'),
-            health_data.get('sleep_disorder'),
-            health_data.get('bmi_category'),
-            health_data.get('daily_steps'),
-            health_data.get('suggestions'),
-            json.dumps(health_data.get('risk_factors', [])),
-            json.dumps(health_data.get('positive_factors', []))
-        ))
-        
-        record_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+            cursor.execute(INSERT_HEALTH_RECORD, _health_record_row(user_id, health_data))
+        
+            record_id = cursor.lastrowid
         
         return record_id
     
     def get_user_health_history(self, user_id: int, limit: int = 50) -> List[Dict]:
         """Get health history for a user"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT * FROM health_records 
-            WHERE user_id = ? 
-            ORDER BY created_at DESC 
-            LIMIT ?
-        ''', (user_id, limit))
+        return self.get_health_history_page(user_id, limit)[0]
+    
+    def get_health_history_page(self, user_id: int, limit: int = 50, after: PageCursor = None) -> Tuple[List[Dict], Optional[PageCursor]]:
+        """One page of a user's health records, newest first
         
-        records = cursor.fetchall()
-        conn.close()
+        Returns the records and the cursor to pass as after for the next page,
+        or None on the last page. Each page is an index seek, however deep.
+        """
+        conn = self._connect()
+        if after is None:
+            rows = conn.execute('''
+                SELECT * FROM health_records
+                WHERE user_id = ?
+                ORDER BY created_at DESC, id DESC
+                LIMIT ?
+            ''', (user_id, limit + 1)).fetchall()
+        else:
+            rows = conn.execute('''
+                SELECT * FROM health_records
+                WHERE user_id = ? AND (created_at, id) < (?, ?)
+                ORDER BY created_at DESC, id DESC
+                LIMIT ?
+            ''', (user_id, *after, limit + 1)).fetchall()
         
-        health_history = []
-        for record in records:
-            health_history.append({
-                'id': record[0],
-                'user_id': record[1],
-                'physical_activity_level': record[2],
-                'stress_level': record[3],
-                'heart_rate': record[4],
-                'blood_pressure': record[5],
-                'sleep_disorder': record[6],
-                'bmi_category': record[7],
-                'daily_steps': record[8],
-                'suggestions': record[9],
-                'risk_factors': json.loads(record[10]) if record[10] else [],
-                'positive_factors': json.loads(record[11]) if record[11] else [],
-                'created_at': record[12]
-            })
-        
-        return health_history
+        records = [_health_record_dict(row) for row in rows[:limit]]
+        next_cursor = (records[-1]['created_at'], records[-1]['id']) if len(rows) > limit else None
+        return records, next_cursor
+    
+    def iter_user_health_history(self, user_id: int, chunk_size: int = FETCH_CHUNK_SIZE) -> Iterator[Dict]:
+        """Every health record of a user, newest first, fetched chunk_size rows at a time"""
+        return self._iter_rows(_health_record_dict, '''
+            SELECT * FROM health_records
+            WHERE user_id = ?
+            ORDER BY created_at DESC, id DESC
+        ''', (user_id,), chunk_size)
     
     def get_health_analytics(self, user_id: int, metric_name: str = None) -> List[Dict]:
         """Get health analytics for a user"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
         
         if metric_name:
@@ -185,7 +329,6 @@ class HealthDatabase:
             ''', (user_id,))
         
         analytics = cursor.fetchall()
-        conn.close()
         
         return [{
             'id': record[0],
@@ -201,35 +344,104 @@ class HealthDatabase:
         if not date_recorded:
             date_recorded = datetime.now().strftime('%Y-%m-%d')
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        conn = self._connect()
+        with conn:
+            cursor = conn.cursor()
         
-        cursor.execute('''
-            INSERT INTO health_analytics (user_id, metric_name, metric_value, date_recorded)
-            VALUES (?, ?, ?, ?)
-        ''', (user_id, metric_name, metric_value, date_recorded))
+            cursor.execute(INSERT_HEALTH_ANALYTICS, (user_id, metric_name, metric_value, date_recorded))
         
-        conn.commit()
-        conn.close()
     
-    def get_all_users(self) -> List[Dict]:
-        """Get all users"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+    def save_submission(self, name: str, health_data: Dict, analytics: Dict[str, float] = None,
+                        email: str = None, age: int = None, gender: str = None) -> Tuple[int, int]:
+        """Create a user and save their health record and analytics in one transaction; returns (user_id, record_id)"""
+        return self.save_submissions([{
+            'name': name, 'email': email, 'age': age, 'gender': gender,
+            'health_data': health_data, 'analytics': analytics,
+        }])[0]
+    
+    def save_submissions(self, submissions: List[Dict], date_recorded: str = None) -> List[Tuple[int, int]]:
+        """Save many submissions in one transaction, all or nothing
         
-        cursor.execute('SELECT * FROM users ORDER BY created_at DESC')
-        users = cursor.fetchall()
-        conn.close()
+        Each submission is a dict of save_submission's arguments; analytics
+        metrics whose value is None are skipped. Returns (user_id, record_id)
+        per submission, in order.
+        """
+        if not submissions:
+            return []
+        if not date_recorded:
+            date_recorded = datetime.now().strftime('%Y-%m-%d')
         
-        return [{
-            'id': user[0],
-            'name': user[1],
-            'email': user[2],
-            'age': user[3],
-            'gender': user[4],
-            'created_at': user[5],
-            'updated_at': user[6]
-        } for user in users]
+        conn = self._connect()
+        with conn:
+            # Take the write lock up front: no other connection can insert between our rows,
+            # so each executemany assigns consecutive AUTOINCREMENT ids ending at last_insert_rowid()
+            conn.execute('BEGIN IMMEDIATE')
+            cursor = conn.cursor()
+            
+            cursor.executemany(INSERT_USER, [
+                (s['name'], s.get('email'), s.get('age'), s.get('gender')) for s in submissions
+            ])
+            user_ids = self._last_inserted_ids(cursor, len(submissions))
+            
+            cursor.executemany(INSERT_HEALTH_RECORD, [
+                _health_record_row(user_id, s['health_data']) for user_id, s in zip(user_ids, submissions)
+            ])
+            record_ids = self._last_inserted_ids(cursor, len(submissions))
+            
+            cursor.executemany(INSERT_HEALTH_ANALYTICS, [
+                (user_id, metric_name, metric_value, date_recorded)
+                for user_id, s in zip(user_ids, submissions)
+                for metric_name, metric_value in (s.get('analytics') or {}).items()
+                if metric_value is not None
+            ])
+        
+        return list(zip(user_ids, record_ids))
+    
+    @staticmethod
+    def _last_inserted_ids(cursor: sqlite3.Cursor, count: int) -> List[int]:
+        last_id = cursor.execute('SELECT last_insert_rowid()').fetchone()[0]
+        return list(range(last_id - count + 1, last_id + 1))
+        
+    
+    def get_all_users(self) -> List[Dict]:
+        """Get all users; prefer get_users_page or iter_users on large databases"""
+        return list(self.iter_users())
+    
+    def get_users_page(self, limit: int = 50, after: PageCursor = None) -> Tuple[List[Dict], Optional[PageCursor]]:
+        """One page of users, newest first, and the cursor for the next page (None on the last page)"""
+        conn = self._connect()
+        if after is None:
+            rows = conn.execute('SELECT * FROM users ORDER BY created_at DESC, id DESC LIMIT ?', (limit + 1,)).fetchall()
+        else:
+            rows = conn.execute('''
+                SELECT * FROM users
+                WHERE (created_at, id) < (?, ?)
+                ORDER BY created_at DESC, id DESC
+                LIMIT ?
+            ''', (*after, limit + 1)).fetchall()
+        
+        users = [_user_dict(row) for row in rows[:limit]]
+        next_cursor = (users[-1]['created_at'], users[-1]['id']) if len(rows) > limit else None
+        return users, next_cursor
+    
+    def iter_users(self, chunk_size: int = FETCH_CHUNK_SIZE) -> Iterator[Dict]:
+        """Every user, newest first, fetched chunk_size rows at a time"""
+        return self._iter_rows(_user_dict, 'SELECT * FROM users ORDER BY created_at DESC, id DESC', (), chunk_size)
+    
+    def _iter_rows(self, to_dict, sql: str, params: tuple, chunk_size: int) -> Iterator[Dict]:
+        # Executed on the first next(), on the calling thread's connection. The open statement pins
+        # the read snapshot (and delays WAL checkpoints) until the generator finishes or is closed.
+        cursor = self._connect().cursor()
+        try:
+            cursor.execute(sql, params)
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield to_dict(row)
+        finally:
+            cursor.close()
     
     def export_user_data(self, user_id: int) -> Dict:
         """Export all user data for backup/analysis"""
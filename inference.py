@@ -1,53 +1,396 @@
+import logging
 import os
+import threading
+import time
+from typing import Any, Callable, NamedTuple
 import joblib
 import numpy as np
+from artifact_bundle import MANIFEST_NAME, load_forest, load_manifest
+from forest_engine import FlatForest
+from prediction_cache import PredictionCache
 
 
 ARTIFACT_DIR = os.path.join(os.path.dirname(__file__), "artifacts")
+ARTIFACT_FILES = ['model.joblib', 'scaler.joblib', 'label_encoders.joblib', 'feature_cols.joblib']
+# Consolidated manifest + uncompressed tree arrays written by train_model.py
+BUNDLE_DIR = os.path.join(ARTIFACT_DIR, "bundle")
+# How often a cached bundle re-stats its artifact files
+ARTIFACT_CHECK_INTERVAL = 1.0
+
+logger = logging.getLogger(__name__)
+
+# Payload keys in the same order as the training feature columns
+PAYLOAD_KEYS = [
+	'gender',
+	'age',
+	'occupation',
+	'sleep_duration',
+	'quality_of_sleep',
+	'physical_activity_level',
+	'stress_level',
+	'bmi_category',
+	'heart_rate',
+	'daily_steps',
+	'systolic',
+	'diastolic',
+]
+CATEGORICAL_KEYS = {
+	'gender': 'Gender',
+	'occupation': 'Occupation',
+	'bmi_category': 'BMI Category',
+}
+
+
+class FeatureEncoder:
+	"""Fused replacement for the fitted LabelEncoders and StandardScaler.
+
+	Categories become plain dict lookups and scaling is the same
+	``(x - mean) / scale`` affine StandardScaler applies, done in place, so the
+	output is bit-for-bit identical to the sklearn path.
+	"""
+
+	def __init__(self, categories: dict[str, list[str]], mean: np.ndarray, scale: np.ndarray):
+		self.codes = {
+			key: {str(label): float(code) for code, label in enumerate(categories[col])}
+			for key, col in CATEGORICAL_KEYS.items()
+		}
+		self.mean = np.asarray(mean, dtype=np.float64)
+		self.scale = np.asarray(scale, dtype=np.float64)
+		self._local = threading.local()
+
+	@classmethod
+	def from_sklearn(cls, label_encoders: dict, scaler) -> "FeatureEncoder":
+		n_features = len(PAYLOAD_KEYS)
+		mean = scaler.mean_ if scaler.with_mean else np.zeros(n_features)
+		scale = scaler.scale_ if scaler.with_std else np.ones(n_features)
+		categories = {col: list(le.classes_) for col, le in label_encoders.items()}
+		return cls(categories, mean, scale)
+
+	def buffer(self) -> np.ndarray:
+		"""Per-thread (1, n_features) scratch row reused across requests."""
+		buf = getattr(self._local, 'row', None)
+		if buf is None:
+			buf = self._local.row = np.empty((1, len(PAYLOAD_KEYS)), dtype=np.float64)
+		return buf
+
+	def encode_into(self, payload: dict, out: np.ndarray) -> None:
+		for j, key in enumerate(PAYLOAD_KEYS):
+			value = payload[key]
+			codes = self.codes.get(key)
+			if codes is None:
+				try:
+					out[j] = value
+				except (TypeError, ValueError):
+					raise ValueError(f"invalid value for '{key}': {value!r}") from None
+			else:
+				try:
+					out[j] = codes[value]
+				except (KeyError, TypeError):
+					raise ValueError(f"unknown {key} {value!r}") from None
+
+	def scale_inplace(self, X: np.ndarray) -> np.ndarray:
+		X -= self.mean
+		X /= self.scale
+		return X
+
+	def transform_row(self, payload: dict, out: np.ndarray | None = None) -> np.ndarray:
+		if out is None:
+			out = np.empty((1, len(PAYLOAD_KEYS)), dtype=np.float64)
+		self.encode_into(payload, out[0])
+		return self.scale_inplace(out)
+
+	def transform_batch(self, payloads: list[dict]) -> tuple[np.ndarray, list[str | None]]:
+		X, errors = self.encode_batch(payloads)
+		return self.scale_inplace(X), errors
+
+	def encode_batch(self, payloads: list[dict]) -> tuple[np.ndarray, list[str | None]]:
+		"""Like ``transform_batch`` without the scaling step."""
+		errors: list[str | None] = [None] * len(payloads)
+		X = np.empty((len(payloads), len(PAYLOAD_KEYS)), dtype=np.float64)
+		n_valid = 0
+		for i, payload in enumerate(payloads):
+			try:
+				self.encode_into(payload, X[n_valid])
+			except KeyError as exc:
+				errors[i] = f"missing field {exc}"
+			except (TypeError, ValueError) as exc:
+				errors[i] = str(exc)
+			else:
+				n_valid += 1
+		return X[:n_valid], errors
+
+
+	def transform_columns(self, columns: dict) -> tuple[np.ndarray, np.ndarray]:
+		"""Encode and scale whole columns keyed like a payload.
+
+		Numeric columns must already be numeric (NaN marks a missing value).
+		Returns the scaled matrix of the valid rows and the boolean mask of
+		which input rows those are; a missing value or unknown category makes
+		a row invalid.
+		"""
+		n_rows = len(columns[PAYLOAD_KEYS[0]])
+		X = np.empty((n_rows, len(PAYLOAD_KEYS)), dtype=np.float64)
+		for j, key in enumerate(PAYLOAD_KEYS):
+			codes = self.codes.get(key)
+			if codes is None:
+				X[:, j] = columns[key]
+			else:
+				X[:, j] = [codes.get(value, np.nan) for value in columns[key]]
+		valid = ~np.isnan(X).any(axis=1)
+		return self.scale_inplace(X[valid]), valid
+
+
+def artifact_signature(artifact_format: str = 'joblib') -> tuple:
+	"""(mtime_ns, size) of every artifact file; changes whenever the model is retrained."""
+	if artifact_format == 'mmap':
+		# The manifest is replaced last, after all of the bundle's arrays
+		paths = [os.path.join(BUNDLE_DIR, MANIFEST_NAME)]
+	else:
+		paths = [os.path.join(ARTIFACT_DIR, name) for name in ARTIFACT_FILES]
+	signature = []
+	for path in paths:
+		stat = os.stat(path)
+		signature.append((stat.st_mtime_ns, stat.st_size))
+	return tuple(signature)
+
+
+# Stages reported to a ModelBundle's stage_hook
+STAGES = ('encode', 'scale', 'forest')
+
+
+class LoadedArtifacts(NamedTuple):
+	"""Everything one artifact load produces, swapped into a ModelBundle as a unit."""
+
+	signature: tuple
+	model: Any
+	scaler: Any
+	label_encoders: dict | None
+	feature_cols: list[str]
+	encoder: FeatureEncoder
+	forest: Any
+	class_labels: list[str]
+	# Increases with every load; part of every prediction cache key
+	generation: int = 0
 
 
 class ModelBundle:
-	def __init__(self):
-		self.model = joblib.load(os.path.join(ARTIFACT_DIR, 'model.joblib'))
-		self.scaler = joblib.load(os.path.join(ARTIFACT_DIR, 'scaler.joblib'))
-		self.label_encoders = joblib.load(os.path.join(ARTIFACT_DIR, 'label_encoders.joblib'))
-		self.feature_cols = joblib.load(os.path.join(ARTIFACT_DIR, 'feature_cols.joblib'))
+	"""Loaded artifacts plus the encode -> scale -> forest prediction path.
+
+	``stage_hook(stage, seconds)``, when given, is called after each of
+	STAGES of every uncached ``predict``; ``batch_stage_hook`` does the same
+	for every ``predict_batch``, whose timings cover the whole batch. Without
+	a hook the prediction path does no timing at all.
+	"""
+
+	def __init__(self, engine: str = 'sklearn', cache_size: int = 0, cache_ttl: float | None = None, artifact_format: str = 'joblib', stage_hook: Callable[[str, float], None] | None = None, batch_stage_hook: Callable[[str, float], None] | None = None):
+		if engine not in ('sklearn', 'flat'):
+			raise ValueError(f"unknown inference engine {engine!r}; expected 'sklearn' or 'flat'")
+		if artifact_format not in ('joblib', 'mmap'):
+			raise ValueError(f"unknown artifact format {artifact_format!r}; expected 'joblib' or 'mmap'")
+		if artifact_format == 'mmap' and engine != 'flat':
+			raise ValueError("the memory-mapped artifact bundle only supports engine='flat'")
+		self.engine = engine
+		self.artifact_format = artifact_format
+		# Opt-in memoization of predict(), keyed by the canonical feature tuple
+		self.cache = PredictionCache(cache_size, cache_ttl) if cache_size > 0 else None
+		self.stage_hook = stage_hook
+		self.batch_stage_hook = batch_stage_hook
+		self._reload_lock = threading.Lock()
+		self._generation = 0
+		self._load()
+
+	def _load(self) -> None:
+		artifacts = self._read_artifacts()
+		self._generation += 1
+		# One reference swap: a concurrent predict sees either the old artifacts or the new ones
+		self._artifacts = artifacts._replace(generation=self._generation)
+		self._signature_checked_at = time.monotonic()
+		if self.cache is not None:
+			self.cache.clear()
+
+	def _read_artifacts(self) -> LoadedArtifacts:
+		# Taken before reading, so files replaced mid-load change it again and trigger another reload
+		signature = artifact_signature(self.artifact_format)
+		if self.artifact_format == 'mmap':
+			return self._read_bundle(signature)
+		return self._read_joblib(signature)
+
+	def _read_bundle(self, signature: tuple) -> LoadedArtifacts:
+		# No sklearn objects: encoder and forest are rebuilt from the manifest and mapped arrays
+		manifest = load_manifest(BUNDLE_DIR)
+		categories = manifest["categories"]
+		forest = load_forest(BUNDLE_DIR, manifest, mmap=True)
+		return LoadedArtifacts(
+			signature=signature,
+			model=None,
+			scaler=None,
+			label_encoders=None,
+			feature_cols=manifest["feature_cols"],
+			encoder=FeatureEncoder(categories, manifest["scaler"]["mean"], manifest["scaler"]["scale"]),
+			forest=forest,
+			class_labels=[categories['Sleep Disorder'][int(code)] for code in forest.classes_],
+		)
+
+	def _read_joblib(self, signature: tuple) -> LoadedArtifacts:
+		model = joblib.load(os.path.join(ARTIFACT_DIR, 'model.joblib'))
+		scaler = joblib.load(os.path.join(ARTIFACT_DIR, 'scaler.joblib'))
+		label_encoders = joblib.load(os.path.join(ARTIFACT_DIR, 'label_encoders.joblib'))
+		return LoadedArtifacts(
+			signature=signature,
+			model=model,
+			scaler=scaler,
+			label_encoders=label_encoders,
+			feature_cols=joblib.load(os.path.join(ARTIFACT_DIR, 'feature_cols.joblib')),
+			encoder=FeatureEncoder.from_sklearn(label_encoders, scaler),
+			# Anything exposing predict_proba and classes_ like the fitted forest
+			forest=FlatForest.from_sklearn(model) if self.engine == 'flat' else model,
+			# Human-readable label for each column of predict_proba
+			class_labels=[str(label) for label in label_encoders['Sleep Disorder'].inverse_transform(model.classes_)],
+		)
+
+	model = property(lambda self: self._artifacts.model)
+	scaler = property(lambda self: self._artifacts.scaler)
+	label_encoders = property(lambda self: self._artifacts.label_encoders)
+	feature_cols = property(lambda self: self._artifacts.feature_cols)
+	encoder = property(lambda self: self._artifacts.encoder)
+	forest = property(lambda self: self._artifacts.forest)
+	class_labels = property(lambda self: self._artifacts.class_labels)
+	artifact_signature = property(lambda self: self._artifacts.signature)
+
+	def reload_if_changed(self) -> bool:
+		"""Reload the artifacts (and drop cached predictions) if they changed on disk.
+
+		A failed reload, e.g. of files a retrain is still writing, is logged
+		and the current artifacts keep serving; the next check tries again.
+		"""
+		with self._reload_lock:
+			self._signature_checked_at = time.monotonic()
+			try:
+				if artifact_signature(self.artifact_format) == self.artifact_signature:
+					return False
+				self._load()
+			except Exception:
+				logger.exception("Reloading the %s artifacts failed; still serving the previous ones", self.artifact_format)
+				return False
+			return True
 
 	def transform_row(self, payload: dict) -> np.ndarray:
-		gender = self.label_encoders['Gender'].transform([payload['gender']])[0]
-		bmi = self.label_encoders['BMI Category'].transform([payload['bmi_category']])[0]
-		occ = self.label_encoders['Occupation'].transform([payload['occupation']])[0]
-		sleep_disorder = 0  # not used as feature; target in training
-
-		row = [
-			gender,
-			payload['age'],
-			occ,
-			payload['sleep_duration'],
-			payload['quality_of_sleep'],
-			payload['physical_activity_level'],
-			payload['stress_level'],
-			bmi,
-			payload['heart_rate'],
-			payload['daily_steps'],
-			payload['systolic'],
-			payload['diastolic'],
-		]
-		row = np.asarray([row])
-		row_scaled = self.scaler.transform(row)
-		return row_scaled
+		return self._artifacts.encoder.transform_row(payload)
+
+	def transform_batch(self, payloads: list[dict]) -> tuple[np.ndarray, list[str | None]]:
+		"""Encode and scale many payloads at once.
+
+		Returns the scaled matrix for the rows that encoded cleanly (in input
+		order) and a per-row error list holding None for every valid row.
+		"""
+		return self._artifacts.encoder.transform_batch(payloads)
+
+	@staticmethod
+	def _format_result(proba: np.ndarray, class_labels: list[str]) -> dict:
+		best = int(proba.argmax())
+		return {
+			"prediction": class_labels[best],
+			"confidence": float(proba[best]),
+			"probabilities": dict(zip(class_labels, proba.tolist())),
+		}
+
+	def _cache_key(self, payload: dict) -> tuple | None:
+		try:
+			return tuple(
+				payload[key] if key in CATEGORICAL_KEYS else float(payload[key])
+				for key in PAYLOAD_KEYS
+			)
+		except (KeyError, TypeError, ValueError):
+			# Malformed payloads skip the cache and fail in the normal path
+			return None
 
 	def predict(self, payload: dict) -> dict:
-		row = self.transform_row(payload)
-		pred = self.model.predict(row)[0]
-		inv_map = {v: k for k, v in enumerate(['None', 'Sleep Apnea', 'Insomnia'])}
-		# Our label mapping in training: ['None','Sleep Apnea','Insomnia'] -> 0,1,2 via label encoder
-		# Return human-readable label via inverse of encoder
-		label_encoder = self.label_encoders['Sleep Disorder']
-		label = label_encoder.inverse_transform([pred])[0]
-		proba = None
-		if hasattr(self.model, 'predict_proba'):
-			proba = self.model.predict_proba(row).max()
-		return {"prediction": label, "confidence": float(proba) if proba is not None else None}
+		if self.cache is None:
+			return self._predict(payload)
+
+		if time.monotonic() - self._signature_checked_at >= ARTIFACT_CHECK_INTERVAL:
+			self.reload_if_changed()
+		key = self._cache_key(payload)
+		if key is None:
+			return self._predict(payload)
+		# A result computed by artifacts that a concurrent reload replaces (and whose
+		# cache.clear() it may land after) is keyed by their generation, so it is never served again
+		artifacts = self._artifacts
+		key = (artifacts.generation, key)
+		try:
+			cached = self.cache.get(key)
+		except TypeError:
+			return self._predict(payload)
+		if cached is None:
+			cached = self._predict(payload, artifacts)
+			self.cache.put(key, cached)
+		return {**cached, "probabilities": dict(cached["probabilities"])}
+
+	def _predict(self, payload: dict, artifacts: LoadedArtifacts | None = None) -> dict:
+		artifacts = artifacts or self._artifacts
+		if self.stage_hook is not None:
+			return self._predict_timed(artifacts, payload)
+		encoder = artifacts.encoder
+		row = encoder.transform_row(payload, out=encoder.buffer())
+		# One forest pass gives the label (argmax), the confidence and the full distribution
+		proba = artifacts.forest.predict_proba(row)[0]
+		return self._format_result(proba, artifacts.class_labels)
+
+	def _predict_timed(self, artifacts: LoadedArtifacts, payload: dict) -> dict:
+		hook = self.stage_hook
+		encoder = artifacts.encoder
+		start = time.perf_counter()
+		row = encoder.buffer()
+		encoder.encode_into(payload, row[0])
+		encoded = time.perf_counter()
+		encoder.scale_inplace(row)
+		scaled = time.perf_counter()
+		proba = artifacts.forest.predict_proba(row)[0]
+		done = time.perf_counter()
+		hook('encode', encoded - start)
+		hook('scale', scaled - encoded)
+		hook('forest', done - scaled)
+		return self._format_result(proba, artifacts.class_labels)
+
+	def predict_proba_columns(self, columns: dict) -> tuple[np.ndarray, np.ndarray]:
+		"""Class probabilities (columns follow ``class_labels``) for the valid rows
+		of column-oriented input, plus the validity mask; see FeatureEncoder.transform_columns."""
+		artifacts = self._artifacts
+		X, valid = artifacts.encoder.transform_columns(columns)
+		if not len(X):
+			return np.empty((0, len(artifacts.class_labels))), valid
+		return artifacts.forest.predict_proba(X), valid
+
+	def predict_batch(self, payloads: list[dict]) -> list[dict]:
+		"""Predict many payloads with a single forest pass, preserving input order.
 
+		Rows that fail to encode get an ``{"error": ...}`` entry instead of
+		failing the whole batch.
+		"""
+		artifacts = self._artifacts
+		hook = self.batch_stage_hook
+		if hook is None:
+			X, errors = artifacts.encoder.transform_batch(payloads)
+			if len(X):
+				proba = artifacts.forest.predict_proba(X)
+		else:
+			start = time.perf_counter()
+			X, errors = artifacts.encoder.encode_batch(payloads)
+			encoded = time.perf_counter()
+			artifacts.encoder.scale_inplace(X)
+			scaled = time.perf_counter()
+			if len(X):
+				proba = artifacts.forest.predict_proba(X)
+			hook('encode', encoded - start)
+			hook('scale', scaled - encoded)
+			hook('forest', time.perf_counter() - scaled)
 
+		results: list[dict] = []
+		j = 0
+		for err in errors:
+			if err is not None:
+				results.append({"error": err})
+				continue
+			results.append(self._format_result(proba[j], artifacts.class_labels))
+			j += 1
+		return results
@@ -0,0 +1,129 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+
+# Per-process bundle, loaded once by the pool initializer
+_WORKER_MODEL = None
+# Shared by every worker; start-up jobs wait on it so each one lands on a different process
+_WORKER_BARRIER = None
+
+
+def _init_worker(model_options: dict, barrier) -> None:
+	global _WORKER_MODEL, _WORKER_BARRIER
+	from inference import ModelBundle
+	_WORKER_MODEL = ModelBundle(**model_options)
+	_WORKER_BARRIER = barrier
+
+
+def _ping() -> int:
+	# A worker blocked here cannot pick up another job, so all of them must take one
+	_WORKER_BARRIER.wait()
+	return os.getpid()
+
+
+def _warmup(payloads: list[dict]) -> int:
+	_WORKER_MODEL.predict_batch(payloads)
+	_WORKER_BARRIER.wait()
+	return os.getpid()
+
+
+def _predict(payload: dict) -> dict:
+	return _WORKER_MODEL.predict(payload)
+
+
+def _predict_batch(payloads: list[dict]) -> list[dict]:
+	return _WORKER_MODEL.predict_batch(payloads)
+
+
+class InferencePool:
+	"""Runs ModelBundle predictions in worker processes so the forest is not GIL-bound.
+
+	Every worker loads the artifacts once at start-up. ``max_in_flight`` caps
+	the number of submitted-but-unfinished calls; further callers wait on the
+	event loop instead of piling work into the executor queue.
+	"""
+
+	def __init__(self, workers: int | None = None, max_in_flight: int | None = None, model_options: dict | None = None, start_method: str = 'spawn'):
+		self.workers = workers or os.cpu_count() or 1
+		self.max_in_flight = max_in_flight or 4 * self.workers
+		self.model_options = model_options or {}
+		self.start_method = start_method
+		self.in_flight = 0
+		self._executor: ProcessPoolExecutor | None = None
+		self._barrier = None
+		self._semaphore = asyncio.Semaphore(self.max_in_flight)
+		# Set once start() finishes (or fails) so early callers wait instead of erroring
+		self._started = asyncio.Event()
+
+	async def start(self) -> list[int]:
+		"""Spawn the workers and wait until each has loaded the model; returns their pids."""
+		context = multiprocessing.get_context(self.start_method)
+		self._barrier = context.Barrier(self.workers)
+		executor = ProcessPoolExecutor(
+			max_workers=self.workers,
+			mp_context=context,
+			initializer=_init_worker,
+			initargs=(self.model_options, self._barrier),
+		)
+		try:
+			pids = await self._on_every_worker(executor, _ping)
+		except BaseException:
+			executor.shutdown(wait=False, cancel_futures=True)
+			raise
+		else:
+			self._executor = executor
+		finally:
+			self._started.set()
+		return pids
+
+	async def _on_every_worker(self, executor: ProcessPoolExecutor, fn, *args) -> list[int]:
+		"""Run ``fn`` once in each worker; it ends on the shared barrier, so no worker runs two of them."""
+		loop = asyncio.get_running_loop()
+		try:
+			pids = await asyncio.gather(*(loop.run_in_executor(executor, fn, *args) for _ in range(self.workers)))
+		except BaseException:
+			# Releases the workers still waiting for one that failed or died
+			self._barrier.abort()
+			raise
+		if len(set(pids)) != self.workers:
+			raise RuntimeError(f"expected {self.workers} workers to confirm, got {len(set(pids))}")
+		return sorted(pids)
+
+	async def _submit(self, fn, arg):
+		await self._started.wait()
+		async with self._semaphore:
+			executor = self._executor
+			if executor is None:
+				raise RuntimeError("inference pool is not running")
+			self.in_flight += 1
+			try:
+				return await asyncio.get_running_loop().run_in_executor(executor, fn, arg)
+			finally:
+				self.in_flight -= 1
+
+	async def predict(self, payload: dict) -> dict:
+		return await self._submit(_predict, payload)
+
+	async def predict_batch(self, payloads: list[dict]) -> list[dict]:
+		return await self._submit(_predict_batch, payloads)
+
+	async def warmup(self, payloads: list[dict]) -> list[int]:
+		"""Run ``payloads`` through every worker once; returns the pids that confirmed."""
+		await self._started.wait()
+		executor = self._executor
+		if executor is None:
+			raise RuntimeError("inference pool is not running")
+		return await self._on_every_worker(executor, _warmup, payloads)
+
+	async def shutdown(self, grace: float = 10.0) -> None:
+		"""Stop accepting work, let in-flight calls finish for up to ``grace`` seconds, then cancel the rest."""
+		executor, self._executor = self._executor, None
+		if executor is None:
+			return
+		loop = asyncio.get_running_loop()
+		deadline = loop.time() + grace
+		while self.in_flight and loop.time() < deadline:
+			await asyncio.sleep(0.05)
+		await loop.run_in_executor(None, lambda: executor.shutdown(wait=True, cancel_futures=True))
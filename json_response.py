@@ -0,0 +1,44 @@
+import json
+import os
+from typing import Any
+
+from starlette.responses import JSONResponse
+
+try:
+	import orjson
+except ImportError:  # optional: the stdlib encoder produces the same bytes, only slower
+	orjson = None
+
+
+# JSON_BACKEND=json forces the stdlib encoder even when orjson is installed
+BACKEND = "orjson" if orjson is not None and os.environ.get("JSON_BACKEND", "orjson") == "orjson" else "json"
+
+
+def _default(value: Any) -> Any:
+	# NumPy scalars and arrays, without importing NumPy here
+	if type(value).__module__ == "numpy" and hasattr(value, "tolist"):
+		return value.tolist()
+	raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+if BACKEND == "orjson":
+	def dumps(content: Any) -> bytes:
+		return orjson.dumps(content, default=_default, option=orjson.OPT_SERIALIZE_NUMPY)
+else:
+	def dumps(content: Any) -> bytes:
+		# Same output as Starlette's JSONResponse.render
+		return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+	"""JSONResponse for hot routes that return plain dicts, lists, str and numbers.
+
+	Routes return an instance directly, which skips FastAPI's
+	``jsonable_encoder`` pass, and the body is encoded with orjson when it is
+	installed. ``bytes`` content is taken as already-encoded JSON and sent as is.
+	"""
+
+	def render(self, content: Any) -> bytes:
+		if isinstance(content, bytes):
+			return content
+		return dumps(content)
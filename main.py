@@ -1,8 +1,27 @@
-from fastapi import FastAPI
+import asyncio
+import functools
+import os
+import secrets
+import threading
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Header, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
-from typing import Optional
-from .inference import ModelBundle
+from pydantic import BaseModel, Field, ValidationError
+from starlette.requests import ClientDisconnect
+from typing import TYPE_CHECKING, Optional
+from inference_pool import InferencePool
+from json_response import FastJSONResponse, dumps
+from batcher import MicroBatcher
+from metrics import PROMETHEUS_CONTENT_TYPE, REGISTRY, MetricsMiddleware
+from profiling import RequestProfiler
+from suggestion_engine import API_LOOKUP
+from streaming import NDJSONStreamingResponse, iter_record_batches
+
+# inference pulls in NumPy, joblib and (through unpickling) scikit-learn; it is imported on first use
+if TYPE_CHECKING:
+	from inference import ModelBundle
 
 
 class SuggestRequest(BaseModel):
@@ -15,7 +34,37 @@ class SuggestRequest(BaseModel):
 	sleep_disorder: Optional[str] = None
 
 
-app = FastAPI(title="Lifestyle Recommendation API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+	global _POOL, _BATCHER
+	# Load and warm the model in the background so /ready can report progress
+	if INFERENCE_BACKEND == "process":
+		_POOL = InferencePool(model_options=MODEL_OPTIONS, **POOL_OPTIONS)
+		warmup_task = asyncio.create_task(warmup_pool(_POOL))
+	elif EAGER_WARMUP:
+		warmup_task = asyncio.create_task(run_in_threadpool(warmup))
+	else:
+		# Fast start: serve right away, the model is loaded by the first /predict
+		warmup_task = None
+		_STATUS["ready"] = True
+	if MICROBATCH_OPTIONS is not None:
+		# Flushes serve single /predict calls, so they are profiled under that route
+		_BATCHER = MicroBatcher(functools.partial(_run_predict_batch, route="/predict"), **MICROBATCH_OPTIONS)
+		REGISTRY.register(_BATCHER.batch_sizes)
+		REGISTRY.register(_BATCHER.queue_wait)
+		_BATCHER.start()
+	yield
+	if _BATCHER is not None:
+		await _BATCHER.stop()
+		_BATCHER = None
+	if warmup_task is not None and not warmup_task.done():
+		await asyncio.wait([warmup_task])
+	if _POOL is not None:
+		await _POOL.shutdown(POOL_SHUTDOWN_GRACE)
+		_POOL = None
+
+
+app = FastAPI(title="Lifestyle Recommendation API", lifespan=lifespan)
 
 app.add_middleware(
 	CORSMiddleware,
@@ -24,49 +73,65 @@ app.add_middleware(
 	allow_methods=["*"],
 	allow_headers=["*"],
 )
+# Added last so it wraps everything else and sees every request
+app.add_middleware(MetricsMiddleware)
 
 
 def suggest_health(req: SuggestRequest) -> list[str]:
-	suggestions: list[str] = []
+	return list(API_LOOKUP.render(vars(req)).suggestions)
 
-	if req.age <= 12 and req.physical_activity_level <= 2:
-		suggestions.append(
-			"For children below 12 years with low physical activity, encourage outdoor play and limit screen time."
-		)
 
-	if req.stress_level >= 7:
-		suggestions.append(
-			"High stress can impact health. Practice relaxation like meditation or yoga."
-		)
+@app.post("/suggest", response_class=FastJSONResponse)
+def suggest(req: SuggestRequest):
+	return PROFILER.maybe_call("/suggest", _suggest_response, req)
 
-	if (req.sleep_disorder or "").lower() == "insomnia":
-		suggestions.append(
-			"For insomnia, limit caffeine, include tryptophan-rich foods, and avoid heavy meals near bedtime."
-		)
 
-	if req.heart_rate is not None and req.heart_rate > 100:
-		suggestions.append(
-			"Elevated heart rate observed. Consider consulting a healthcare professional if persistent."
-		)
-	if req.blood_pressure is not None and req.blood_pressure > 120:
-		suggestions.append(
-			"Elevated blood pressure observed. Monitor regularly and consult a professional if needed."
-		)
+def _suggest_response(req: SuggestRequest) -> FastJSONResponse:
+	# The suggestion lines are stored pre-encoded; the body is spliced together without a serializer
+	return FastJSONResponse(b'{"suggestions":' + API_LOOKUP.render_json(vars(req)) + b'}')
 
-	if req.age > 12 and req.stress_level < 7 and (req.blood_pressure is None or req.blood_pressure <= 120):
-		suggestions.append(
-			"Age, stress, and blood pressure are within normal ranges. Keep up the good work!"
-		)
 
-	if not suggestions:
-		suggestions.append("Provide more details or adjust inputs to receive tailored suggestions.")
+def _validation_message(e: ValidationError) -> str:
+	return "; ".join(f"{'.'.join(str(part) for part in err['loc']) or 'body'}: {err['msg']}" for err in e.errors())
 
-	return suggestions
 
+async def _suggest_stream(chunks):
+	"""One JSON line per profile, flushed per incoming chunk, then a trailer line."""
+	start = time.perf_counter()
+	count = failed = 0
+	try:
+		async for records in iter_record_batches(chunks):
+			lines = []
+			for record, error in records:
+				index = count
+				count += 1
+				if error is None and not isinstance(record, dict):
+					error = "expected a JSON object"
+				if error is None:
+					try:
+						suggestions = API_LOOKUP.render_json(vars(SuggestRequest(**record)))
+						lines.append(b'{"index":%d,"suggestions":%s}' % (index, suggestions))
+						continue
+					except ValidationError as e:
+						error = _validation_message(e)
+				failed += 1
+				lines.append(dumps({"index": index, "error": error}))
+			lines.append(b"")
+			yield b"\n".join(lines)
+	except ClientDisconnect:
+		return
+	trailer = {"count": count, "succeeded": count - failed, "failed": failed, "elapsed_seconds": time.perf_counter() - start}
+	yield dumps({"trailer": trailer}) + b"\n"
 
-@app.post("/suggest")
-def suggest(req: SuggestRequest):
-	return {"suggestions": suggest_health(req)}
+
+@app.post("/suggest/batch")
+async def suggest_batch(request: Request):
+	"""Suggestions for a JSON array or NDJSON upload, streamed back as NDJSON.
+
+	The upload is decoded as it arrives and every result line is sent as soon
+	as its chunk is processed; the last line is ``{"trailer": {...}}``.
+	"""
+	return NDJSONStreamingResponse(_suggest_stream(request.stream()))
 
 
 @app.get("/")
@@ -90,17 +155,201 @@ class PredictRequest(BaseModel):
 	diastolic: int
 
 
-_MODEL: ModelBundle | None = None
+# One representative profile per predicted class, so every label path is hot before traffic arrives
+WARMUP_PAYLOADS = [
+	{'age': 28, 'gender': 'Male', 'occupation': 'Doctor', 'sleep_duration': 6.2, 'quality_of_sleep': 6, 'physical_activity_level': 60, 'stress_level': 8, 'bmi_category': 'Normal', 'heart_rate': 75, 'daily_steps': 10000, 'systolic': 125, 'diastolic': 80},
+	{'age': 43, 'gender': 'Female', 'occupation': 'Teacher', 'sleep_duration': 6.7, 'quality_of_sleep': 7, 'physical_activity_level': 45, 'stress_level': 4, 'bmi_category': 'Overweight', 'heart_rate': 65, 'daily_steps': 6000, 'systolic': 135, 'diastolic': 90},
+	{'age': 48, 'gender': 'Female', 'occupation': 'Nurse', 'sleep_duration': 5.9, 'quality_of_sleep': 6, 'physical_activity_level': 90, 'stress_level': 8, 'bmi_category': 'Overweight', 'heart_rate': 75, 'daily_steps': 10000, 'systolic': 140, 'diastolic': 95},
+]
+
+MODEL_OPTIONS = {
+	"engine": os.environ.get("MODEL_ENGINE", "sklearn"),
+	# "mmap" shares the artifacts/bundle arrays across workers (requires MODEL_ENGINE=flat)
+	"artifact_format": os.environ.get("MODEL_ARTIFACT_FORMAT", "joblib"),
+	"cache_size": int(os.environ.get("PREDICT_CACHE_SIZE", "0")),
+	"cache_ttl": float(os.environ["PREDICT_CACHE_TTL"]) if os.environ.get("PREDICT_CACHE_TTL") else None,
+}
+
+# "thread" runs predictions in this process's threadpool, "process" in an InferencePool
+INFERENCE_BACKEND = os.environ.get("INFERENCE_BACKEND", "thread")
+# EAGER_WARMUP=0 skips loading and warming the model at startup (thread backend only)
+EAGER_WARMUP = os.environ.get("EAGER_WARMUP", "1") == "1"
+POOL_OPTIONS = {
+	"workers": int(os.environ["INFERENCE_POOL_SIZE"]) if os.environ.get("INFERENCE_POOL_SIZE") else None,
+	"max_in_flight": int(os.environ["INFERENCE_MAX_IN_FLIGHT"]) if os.environ.get("INFERENCE_MAX_IN_FLIGHT") else None,
+}
+POOL_SHUTDOWN_GRACE = float(os.environ.get("INFERENCE_SHUTDOWN_GRACE", "10"))
+# PREDICT_MICROBATCH=1 coalesces concurrent /predict calls into batched forest passes
+MICROBATCH_OPTIONS = {
+	"max_batch_size": int(os.environ.get("PREDICT_MAX_BATCH_SIZE", "32")),
+	"max_wait_ms": float(os.environ.get("PREDICT_MAX_WAIT_MS", "2")),
+} if os.environ.get("PREDICT_MICROBATCH") == "1" else None
+# PROFILE_SAMPLE_RATE=0.01 writes a cProfile dump for 1% of /predict and /suggest calls;
+# it can be changed at runtime through /admin/profiling, which is disabled unless PROFILE_ADMIN_TOKEN is set
+PROFILER = RequestProfiler(
+	os.environ.get("PROFILE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "profiles")),
+	sample_rate=float(os.environ.get("PROFILE_SAMPLE_RATE", "0")),
+	max_files=int(os.environ.get("PROFILE_MAX_FILES", "100")),
+)
+PROFILE_ADMIN_TOKEN = os.environ.get("PROFILE_ADMIN_TOKEN")
+
+_MODEL: "ModelBundle | None" = None
+_POOL: InferencePool | None = None
+_BATCHER: MicroBatcher | None = None
+_MODEL_LOCK = threading.Lock()
+_STATUS: dict = {"ready": False, "load_seconds": None, "warmup_seconds": None, "error": None}
+
+# parse: request start to the endpoint body (body read + validation); serialize: building the response
+PREDICT_STAGE_SECONDS = {
+	stage: REGISTRY.histogram('predict_stage_seconds', help='Time spent per /predict stage', labels={'stage': stage})
+	for stage in ('parse', 'encode', 'scale', 'forest', 'serialize')  # inference.STAGES in the middle
+}
+# A batched forest pass serves many requests at once, so it gets its own histograms
+PREDICT_BATCH_STAGE_SECONDS = {
+	stage: REGISTRY.histogram('predict_batch_stage_seconds', help='Time spent per stage of a batched forest pass', labels={'stage': stage})
+	for stage in ('encode', 'scale', 'forest')
+}
+MODEL_LOAD_SECONDS = REGISTRY.gauge('model_load_seconds', 'Time taken to load the model artifacts')
+MODEL_WARMUP_SECONDS = REGISTRY.gauge('model_warmup_seconds', 'Time taken by the startup warmup predictions')
+
+
+def _observe_stage(stage: str, seconds: float) -> None:
+	PREDICT_STAGE_SECONDS[stage].observe(seconds)
 
 
-def _get_model() -> ModelBundle:
+def _observe_batch_stage(stage: str, seconds: float) -> None:
+	PREDICT_BATCH_STAGE_SECONDS[stage].observe(seconds)
+
+
+def _get_model() -> "ModelBundle":
 	global _MODEL
 	if _MODEL is None:
-		_MODEL = ModelBundle()
+		with _MODEL_LOCK:
+			# Concurrent first callers wait here instead of each loading their own copy
+			if _MODEL is None:
+				from inference import ModelBundle
+				start = time.perf_counter()
+				# Stage timings are only collected in this process, not inside an InferencePool
+				model = ModelBundle(**MODEL_OPTIONS, stage_hook=_observe_stage, batch_stage_hook=_observe_batch_stage)
+				_STATUS["load_seconds"] = time.perf_counter() - start
+				MODEL_LOAD_SECONDS.set(_STATUS["load_seconds"])
+				_MODEL = model
 	return _MODEL
 
 
-@app.post("/predict")
-def predict(req: PredictRequest):
-	model = _get_model()
-	return model.predict(req.dict())
\ No newline at end of file
+def warmup() -> None:
+	try:
+		model = _get_model()
+		start = time.perf_counter()
+		for payload in WARMUP_PAYLOADS:
+			model.predict(payload)
+		model.predict_batch(WARMUP_PAYLOADS)
+		_STATUS["warmup_seconds"] = time.perf_counter() - start
+		MODEL_WARMUP_SECONDS.set(_STATUS["warmup_seconds"])
+		_STATUS["ready"] = True
+	except Exception as e:
+		# Surfaced through /ready, which keeps reporting not-ready
+		_STATUS["error"] = f"{type(e).__name__}: {e}"
+
+
+async def warmup_pool(pool: InferencePool) -> None:
+	try:
+		start = time.perf_counter()
+		await pool.start()
+		_STATUS["load_seconds"] = time.perf_counter() - start
+		MODEL_LOAD_SECONDS.set(_STATUS["load_seconds"])
+		start = time.perf_counter()
+		await pool.warmup(WARMUP_PAYLOADS)
+		_STATUS["warmup_seconds"] = time.perf_counter() - start
+		MODEL_WARMUP_SECONDS.set(_STATUS["warmup_seconds"])
+		_STATUS["ready"] = True
+	except Exception as e:
+		_STATUS["error"] = f"{type(e).__name__}: {e}"
+
+
+@app.get("/ready")
+def ready(response: Response):
+	if not _STATUS["ready"]:
+		response.status_code = 503
+	status = dict(_STATUS)
+	if _MODEL is not None and _MODEL.cache is not None:
+		status["cache"] = _MODEL.cache.stats()
+	if _BATCHER is not None:
+		status["batching"] = _BATCHER.stats()
+	return status
+
+
+class ProfilingConfig(BaseModel):
+	sample_rate: Optional[float] = Field(None, ge=0, le=1)
+	max_files: Optional[int] = Field(None, ge=1)
+
+
+def _require_admin(token: Optional[str]) -> None:
+	if not PROFILE_ADMIN_TOKEN:
+		raise HTTPException(status_code=404, detail="Not Found")
+	if token is None or not secrets.compare_digest(token, PROFILE_ADMIN_TOKEN):
+		raise HTTPException(status_code=403, detail="invalid admin token")
+
+
+@app.get("/admin/profiling")
+def profiling_status(x_admin_token: Optional[str] = Header(None)):
+	_require_admin(x_admin_token)
+	return PROFILER.status()
+
+
+@app.post("/admin/profiling")
+def configure_profiling(config: ProfilingConfig, x_admin_token: Optional[str] = Header(None)):
+	"""Change the profiled fraction of requests (0 turns profiling off) or the number of files kept."""
+	_require_admin(x_admin_token)
+	PROFILER.configure(config.sample_rate, config.max_files)
+	return PROFILER.status()
+
+
+@app.get("/metrics")
+def metrics():
+	return Response(REGISTRY.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+
+def _observe_parse(request: Request) -> None:
+	PREDICT_STAGE_SECONDS['parse'].observe(time.perf_counter() - request.scope["state"]["metrics_start"])
+
+
+def _serialize(content) -> FastJSONResponse:
+	start = time.perf_counter()
+	response = FastJSONResponse(content)
+	PREDICT_STAGE_SECONDS['serialize'].observe(time.perf_counter() - start)
+	return response
+
+
+def _predict_local(payload: dict) -> dict:
+	return _get_model().predict(payload)
+
+
+def _predict_batch_local(payloads: list[dict]) -> list[dict]:
+	return _get_model().predict_batch(payloads)
+
+
+async def _run_predict_batch(payloads: list[dict], route: str = "/predict/batch") -> list[dict]:
+	if _POOL is not None:
+		return await _POOL.predict_batch(payloads)
+	return await run_in_threadpool(PROFILER.maybe_call, route, _predict_batch_local, payloads)
+
+
+@app.post("/predict", response_class=FastJSONResponse)
+async def predict(req: PredictRequest, request: Request):
+	_observe_parse(request)
+	payload = req.dict()
+	if _BATCHER is not None:
+		result = await _BATCHER.submit(payload)
+	elif _POOL is not None:
+		result = await _POOL.predict(payload)
+	else:
+		# Profiled inside the worker thread, where the model actually runs
+		result = await run_in_threadpool(PROFILER.maybe_call, "/predict", _predict_local, payload)
+	return _serialize(result)
+
+
+@app.post("/predict/batch", response_class=FastJSONResponse)
+async def predict_batch(reqs: list[PredictRequest], request: Request):
+	_observe_parse(request)
+	return _serialize({"results": await _run_predict_batch([req.dict() for req in reqs])})
@@ -0,0 +1,289 @@
+import threading
+import time
+import weakref
+from bisect import bisect_left
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+# Anything else a client sends is labelled "other", so the method label stays bounded
+HTTP_METHODS = frozenset({"GET", "HEAD", "POST", "PUT", "DELETE", "PATCH", "OPTIONS", "CONNECT", "TRACE"})
+LATENCY_BUCKETS = [0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5]
+
+
+class _CellOwner:
+	"""Lives in the owning thread's threading.local, so it is collected when that thread exits."""
+
+	__slots__ = ('__weakref__',)
+
+
+class _ThreadShards:
+	"""One mutable cell per thread, so updates never take a lock or lose increments.
+
+	Readers sum the cells. When a thread exits, its cell is folded into a
+	running total and dropped, so counts never go backwards and short-lived
+	worker threads (anyio retires idle ones after 10 s) do not pile up cells.
+	"""
+
+	def __init__(self, size: int):
+		self._size = size
+		self._local = threading.local()
+		self._cells: dict[int, list] = {}
+		self._retired = [0] * size
+		self._lock = threading.Lock()
+
+	def cell(self) -> list:
+		try:
+			return self._local.cell
+		except AttributeError:
+			return self._new_cell()
+
+	def _new_cell(self) -> list:
+		cell = [0] * self._size
+		owner = _CellOwner()
+		finalizer = weakref.finalize(owner, _ThreadShards._retire, weakref.ref(self), cell)
+		finalizer.atexit = False
+		with self._lock:
+			self._cells[id(cell)] = cell
+		self._local.cell = cell
+		self._local.owner = owner
+		return cell
+
+	@staticmethod
+	def _retire(shards_ref: weakref.ref, cell: list) -> None:
+		# Runs once the owning thread is gone, so nothing writes to the cell any more
+		shards = shards_ref()
+		if shards is None:
+			return
+		with shards._lock:
+			if shards._cells.pop(id(cell), None) is not None:
+				shards._retired = [total + value for total, value in zip(shards._retired, cell)]
+
+	def totals(self) -> list:
+		with self._lock:
+			return [sum(column) for column in zip(self._retired, *self._cells.values())]
+
+
+class _Metric:
+	kind = "untyped"
+
+	def __init__(self, name: str, help: str = '', labels: dict[str, str] | None = None):
+		self.name = name
+		self.help = help
+		self.labels = dict(labels or {})
+
+	def samples(self) -> list[tuple[str, dict, float]]:
+		raise NotImplementedError
+
+
+class Counter(_Metric):
+	"""Monotonic counter."""
+
+	kind = "counter"
+
+	def __init__(self, name: str, help: str = '', labels: dict[str, str] | None = None):
+		super().__init__(name, help, labels)
+		self._shards = _ThreadShards(1)
+
+	def inc(self, amount: float = 1) -> None:
+		self._shards.cell()[0] += amount
+
+	@property
+	def value(self) -> float:
+		return self._shards.totals()[0]
+
+	def samples(self) -> list[tuple[str, dict, float]]:
+		return [(self.name, self.labels, self.value)]
+
+
+class Gauge(_Metric):
+	"""Value that goes up and down; ``inc``/``dec`` are sharded, ``set`` replaces the total."""
+
+	kind = "gauge"
+
+	def __init__(self, name: str, help: str = '', labels: dict[str, str] | None = None):
+		super().__init__(name, help, labels)
+		self._shards = _ThreadShards(1)
+		self._offset = 0
+		self._set_lock = threading.Lock()
+
+	def inc(self, amount: float = 1) -> None:
+		self._shards.cell()[0] += amount
+
+	def dec(self, amount: float = 1) -> None:
+		self._shards.cell()[0] -= amount
+
+	def set(self, value: float) -> None:
+		with self._set_lock:
+			self._offset = value - self._shards.totals()[0]
+
+	@property
+	def value(self) -> float:
+		return self._offset + self._shards.totals()[0]
+
+	def samples(self) -> list[tuple[str, dict, float]]:
+		return [(self.name, self.labels, self.value)]
+
+
+class Histogram(_Metric):
+	"""Fixed-bucket histogram with Prometheus-style cumulative ``le`` buckets."""
+
+	kind = "histogram"
+
+	def __init__(self, name: str, buckets: list[float], help: str = '', labels: dict[str, str] | None = None):
+		super().__init__(name, help, labels)
+		self.buckets = sorted(buckets)
+		# Per-thread cell: one count per bucket, the +Inf count, then the sum
+		self._shards = _ThreadShards(len(self.buckets) + 2)
+
+	def observe(self, value: float) -> None:
+		cell = self._shards.cell()
+		cell[bisect_left(self.buckets, value)] += 1
+		cell[-1] += value
+
+	def snapshot(self) -> dict:
+		totals = self._shards.totals()
+		cumulative = {}
+		running = 0
+		for bound, count in zip(self.buckets + [float('inf')], totals):
+			running += count
+			cumulative['+Inf' if bound == float('inf') else repr(bound)] = running
+		return {"buckets": cumulative, "count": running, "sum": totals[-1]}
+
+	def samples(self) -> list[tuple[str, dict, float]]:
+		snapshot = self.snapshot()
+		samples = [(f"{self.name}_bucket", {**self.labels, "le": le}, count) for le, count in snapshot["buckets"].items()]
+		samples.append((f"{self.name}_sum", self.labels, snapshot["sum"]))
+		samples.append((f"{self.name}_count", self.labels, snapshot["count"]))
+		return samples
+
+
+def _escape(value: str, quote: bool = True) -> str:
+	value = str(value).replace('\\', '\\\\').replace('\n', '\\n')
+	# Label values also escape quotes; HELP text does not
+	return value.replace('"', '\\"') if quote else value
+
+
+def _format_sample(name: str, labels: dict, value: float) -> str:
+	if labels:
+		name += "{" + ",".join(f'{key}="{_escape(val)}"' for key, val in labels.items()) + "}"
+	return f"{name} {value if isinstance(value, int) else float(value)!r}"
+
+
+class Registry:
+	"""Named metrics, rendered together in the Prometheus text exposition format.
+
+	``counter``/``gauge``/``histogram`` return the existing metric for a
+	(name, labels) pair, so call sites can look up labelled children lazily.
+	"""
+
+	def __init__(self):
+		self._metrics: dict[tuple, _Metric] = {}
+		self._lock = threading.Lock()
+
+	def register(self, metric: _Metric) -> _Metric:
+		"""Add (or replace) a metric created elsewhere, such as a MicroBatcher's histograms."""
+		with self._lock:
+			self._metrics[metric.name, tuple(sorted(metric.labels.items()))] = metric
+		return metric
+
+	def _get(self, cls, name: str, labels: dict | None, **kwargs) -> _Metric:
+		key = (name, tuple(sorted((labels or {}).items())))
+		metric = self._metrics.get(key)
+		if metric is None:
+			with self._lock:
+				metric = self._metrics.get(key)
+				if metric is None:
+					metric = self._metrics[key] = cls(name, labels=labels, **kwargs)
+		if not isinstance(metric, cls):
+			raise ValueError(f"metric {name!r} is already registered as a {metric.kind}")
+		return metric
+
+	def counter(self, name: str, help: str = '', labels: dict[str, str] | None = None) -> Counter:
+		return self._get(Counter, name, labels, help=help)
+
+	def gauge(self, name: str, help: str = '', labels: dict[str, str] | None = None) -> Gauge:
+		return self._get(Gauge, name, labels, help=help)
+
+	def histogram(self, name: str, buckets: list[float] = LATENCY_BUCKETS, help: str = '', labels: dict[str, str] | None = None) -> Histogram:
+		return self._get(Histogram, name, labels, buckets=buckets, help=help)
+
+	def render(self) -> str:
+		with self._lock:
+			metrics = list(self._metrics.values())
+		families: dict[str, list[_Metric]] = {}
+		for metric in metrics:
+			families.setdefault(metric.name, []).append(metric)
+		lines = []
+		for name, members in families.items():
+			help = next((m.help for m in members if m.help), '')
+			if help:
+				lines.append(f"# HELP {name} {_escape(help, quote=False)}")
+			lines.append(f"# TYPE {name} {members[0].kind}")
+			for metric in members:
+				lines.extend(_format_sample(*sample) for sample in metric.samples())
+		return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+class MetricsMiddleware:
+	"""Pure ASGI middleware counting HTTP requests, errors, in-flight requests and latency.
+
+	Requests are labelled with the matched route's path template, not the raw
+	path, to keep label cardinality bounded. The start time is left in
+	``scope["state"]["metrics_start"]`` for endpoints that time their own stages.
+	"""
+
+	def __init__(self, app: ASGIApp, registry: Registry = REGISTRY):
+		self.app = app
+		self.registry = registry
+		self.in_flight = registry.gauge('http_requests_in_flight', 'HTTP requests currently being served')
+		# (method, route, status) -> (latency histogram, request counter), so the hot path is one dict hit
+		self._children: dict[tuple[str, str, int], tuple[Histogram, Counter]] = {}
+
+	async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+		if scope["type"] != "http":
+			await self.app(scope, receive, send)
+			return
+
+		start = time.perf_counter()
+		scope.setdefault("state", {})["metrics_start"] = start
+		status = 500
+
+		async def send_wrapper(message: Message) -> None:
+			nonlocal status
+			if message["type"] == "http.response.start":
+				status = message["status"]
+			await send(message)
+
+		self.in_flight.inc()
+		error = None
+		try:
+			await self.app(scope, receive, send_wrapper)
+		except Exception as e:
+			error = type(e).__name__
+			raise
+		finally:
+			self.in_flight.dec()
+			method = scope["method"] if scope["method"] in HTTP_METHODS else "other"
+			key = (method, getattr(scope.get("route"), "path", "<unmatched>"), status)
+			children = self._children.get(key)
+			if children is None:
+				children = self._children[key] = self._create_children(*key)
+			children[0].observe(time.perf_counter() - start)
+			children[1].inc()
+			if error is None and status >= 400:
+				error = f"http_{status}"
+			if error is not None:
+				labels = {"method": key[0], "route": key[1], "type": error}
+				self.registry.counter('http_request_errors_total', 'Failed HTTP requests by error type', labels).inc()
+
+	def _create_children(self, method: str, route: str, status: int) -> tuple[Histogram, Counter]:
+		labels = {"method": method, "route": route}
+		return (
+			self.registry.histogram('http_request_duration_seconds', help='HTTP request latency', labels=labels),
+			self.registry.counter('http_requests_total', 'HTTP requests by route and status', {**labels, "status": str(status)}),
+		)
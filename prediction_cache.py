@@ -0,0 +1,65 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Hashable
+
+
+class PredictionCache:
+	"""Thread-safe, size-bounded LRU with optional TTL and hit/miss counters."""
+
+	def __init__(self, maxsize: int, ttl: float | None = None):
+		if maxsize <= 0:
+			raise ValueError("maxsize must be positive")
+		self.maxsize = maxsize
+		self.ttl = ttl
+		self.hits = 0
+		self.misses = 0
+		self.evictions = 0
+		self.expirations = 0
+		self._entries: OrderedDict[Hashable, tuple[float, dict]] = OrderedDict()
+		self._lock = threading.Lock()
+
+	def get(self, key: Hashable) -> dict | None:
+		with self._lock:
+			entry = self._entries.get(key)
+			if entry is None:
+				self.misses += 1
+				return None
+			expires_at, value = entry
+			if self.ttl is not None and time.monotonic() >= expires_at:
+				del self._entries[key]
+				self.expirations += 1
+				self.misses += 1
+				return None
+			self._entries.move_to_end(key)
+			self.hits += 1
+			return value
+
+	def put(self, key: Hashable, value: dict) -> None:
+		expires_at = time.monotonic() + self.ttl if self.ttl is not None else 0.0
+		with self._lock:
+			self._entries[key] = (expires_at, value)
+			self._entries.move_to_end(key)
+			while len(self._entries) > self.maxsize:
+				self._entries.popitem(last=False)
+				self.evictions += 1
+
+	def clear(self) -> None:
+		with self._lock:
+			self._entries.clear()
+
+	def __len__(self) -> int:
+		return len(self._entries)
+
+	def stats(self) -> dict:
+		lookups = self.hits + self.misses
+		return {
+			"size": len(self._entries),
+			"maxsize": self.maxsize,
+			"ttl": self.ttl,
+			"hits": self.hits,
+			"misses": self.misses,
+			"evictions": self.evictions,
+			"expirations": self.expirations,
+			"hit_rate": self.hits / lookups if lookups else 0.0,
+		}
@@ -0,0 +1,105 @@
+import cProfile
+import logging
+import os
+import random
+import threading
+import time
+from typing import Any, Callable
+
+
+logger = logging.getLogger(__name__)
+
+class RequestProfiler:
+	"""Profiles a random ``sample_rate`` fraction of calls with cProfile.
+
+	Each sampled call is written to ``directory`` as
+	``<time_ns>_<route>_<latency>ms.pstats``, loadable with ``pstats.Stats``
+	or snakeviz; only the newest ``max_files`` are kept. The latency in the
+	name is measured under the profiler, which inflates it. cProfile only
+	sees the calling thread, so wrap the code that runs in the worker thread,
+	not the coroutine that awaits it.
+
+	Only one call is profiled at a time: on Python 3.12+ cProfile is process
+	wide and a second active profile raises. Calls sampled while another is
+	being profiled, or while the profiler fails, simply run unprofiled; a
+	profiler error never fails the call.
+
+	With ``sample_rate`` 0 (the default) ``maybe_call`` is a plain call.
+	"""
+
+	def __init__(self, directory: str, sample_rate: float = 0.0, max_files: int = 100):
+		self.directory = directory
+		self.max_files = max_files
+		self.sample_rate = 0.0
+		self.configure(sample_rate)
+		self.profiles_written = 0
+		self._lock = threading.Lock()
+		self._active = threading.Lock()
+
+	def configure(self, sample_rate: float | None = None, max_files: int | None = None) -> None:
+		if sample_rate is not None:
+			if not 0.0 <= sample_rate <= 1.0:
+				raise ValueError(f"sample_rate must be between 0 and 1, got {sample_rate}")
+			self.sample_rate = float(sample_rate)
+		if max_files is not None:
+			if max_files < 1:
+				raise ValueError(f"max_files must be at least 1, got {max_files}")
+			self.max_files = max_files
+
+	def maybe_call(self, route: str, fn: Callable[..., Any], *args) -> Any:
+		if not self.sample_rate or random.random() >= self.sample_rate:
+			return fn(*args)
+		if not self._active.acquire(blocking=False):
+			return fn(*args)
+		try:
+			profile = cProfile.Profile()
+			profile.enable()
+		except Exception:
+			# e.g. "Another profiling tool is already active" from a debugger or py-spy style tool
+			self._active.release()
+			logger.warning("Could not start profiling %s", route, exc_info=True)
+			return fn(*args)
+		start = time.perf_counter()
+		try:
+			return fn(*args)
+		finally:
+			seconds = time.perf_counter() - start
+			try:
+				profile.disable()
+				self._save(profile, route, seconds)
+			except Exception:
+				logger.warning("Could not save the profile of %s", route, exc_info=True)
+			finally:
+				self._active.release()
+
+	def _save(self, profile: cProfile.Profile, route: str, seconds: float) -> None:
+		slug = route.strip('/').replace('/', '_') or 'root'
+		name = f"{time.time_ns()}_{slug}_{seconds * 1000:.2f}ms.pstats"
+		with self._lock:
+			os.makedirs(self.directory, exist_ok=True)
+			profile.dump_stats(os.path.join(self.directory, name))
+			self.profiles_written += 1
+			self._rotate()
+
+	def _rotate(self) -> None:
+		# time_ns prefixes sort oldest first
+		files = sorted(f for f in os.listdir(self.directory) if f.endswith('.pstats'))
+		for stale in files[:max(0, len(files) - self.max_files)]:
+			try:
+				os.remove(os.path.join(self.directory, stale))
+			except FileNotFoundError:
+				pass
+
+	def files(self) -> list[str]:
+		if not os.path.isdir(self.directory):
+			return []
+		return sorted(f for f in os.listdir(self.directory) if f.endswith('.pstats'))
+
+	def status(self) -> dict:
+		return {
+			"sample_rate": self.sample_rate,
+			"max_files": self.max_files,
+			"directory": os.path.abspath(self.directory),
+			"profiles_written": self.profiles_written,
+			"files": len(self.files()),
+		}
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Score a large CSV in the schema of Sleep_health_and_lifestyle_dataset.csv.
+
+Every row gets the model's predicted sleep disorder and the lifestyle
+suggestion rules' risk and positive factors. The file is read in chunks that
+are scored across a process pool and appended to the output in input order,
+so memory stays flat whatever the input size.
+
+Usage:
+    python score_cohort.py export.csv scored.csv
+    python score_cohort.py export.csv scored.csv --chunksize 50000 --workers 4 --suggestions
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from inference import PAYLOAD_KEYS, ModelBundle
+from suggestion_engine import LIFESTYLE_RULES
+from train_model import BMI_CATEGORY_ALIASES, split_blood_pressure
+
+
+# The dataset records activity in minutes/day; the suggestion rules use the 0-10 scale of the apps
+ACTIVITY_MINUTES_PER_POINT = 10.0
+
+# Per-process bundle, loaded once by the pool initializer
+_WORKER_MODEL = None
+
+
+def _init_worker(model_options: dict) -> None:
+	global _WORKER_MODEL
+	_WORKER_MODEL = ModelBundle(**model_options)
+
+
+def _score_in_worker(chunk: pd.DataFrame, suggestions: bool) -> pd.DataFrame:
+	return score_chunk(_WORKER_MODEL, chunk, suggestions)
+
+
+def score_chunk(bundle: ModelBundle, chunk: pd.DataFrame, suggestions: bool = False) -> pd.DataFrame:
+	"""Prediction and suggestion-rule columns for one chunk of raw CSV rows."""
+	data = split_blood_pressure(chunk, errors='coerce')
+	data['BMI Category'] = data['BMI Category'].replace(BMI_CATEGORY_ALIASES)
+
+	columns = {}
+	for key, col in zip(PAYLOAD_KEYS, bundle.feature_cols):
+		if key in bundle.encoder.codes:
+			columns[key] = data[col].to_numpy(dtype=object)
+		else:
+			columns[key] = pd.to_numeric(data[col], errors='coerce').to_numpy(dtype=float)
+	proba, valid = bundle.predict_proba_columns(columns)
+	predicted = np.full(len(data), None, dtype=object)
+	predicted[valid] = np.asarray(bundle.class_labels, dtype=object)[proba.argmax(axis=1)]
+	confidence = np.full(len(data), np.nan)
+	confidence[valid] = proba.max(axis=1)
+
+	# The recorded disorder when the export has the column, otherwise the prediction.
+	# pandas reads the recorded "None" as NaN; it is restored as in load_and_prepare_dataset.
+	if 'Sleep Disorder' in data:
+		sleep_disorder = data['Sleep Disorder'].fillna('None')
+	else:
+		sleep_disorder = pd.Series(predicted, index=data.index)
+	profiles = pd.DataFrame({
+		'age': data['Age'],
+		'physical_activity_level': pd.to_numeric(data['Physical Activity Level'], errors='coerce') / ACTIVITY_MINUTES_PER_POINT,
+		'stress_level': data['Stress Level'],
+		'gender': data['Gender'],
+		'heart_rate': data['Heart Rate'],
+		'blood_pressure': data['Systolic'],
+		'sleep_disorder': sleep_disorder,
+		'bmi_category': data['BMI Category'],
+		'daily_steps': data['Daily Steps'],
+	})
+	advice = LIFESTYLE_RULES.evaluate_many(profiles)
+
+	result = pd.DataFrame(index=data.index)
+	if 'Person ID' in data:
+		result['Person ID'] = data['Person ID']
+	result['Predicted Sleep Disorder'] = predicted
+	result['Confidence'] = confidence
+	result['Risk Factors'] = ['; '.join(a.risk_factors) for a in advice]
+	result['Positive Factors'] = ['; '.join(a.positive_factors) for a in advice]
+	if suggestions:
+		result['Suggestions'] = [a.text for a in advice]
+	return result
+
+
+def score_csv(input_path: str, output_path: str, chunksize: int = 20_000, workers: int = 0, max_in_flight: int | None = None, suggestions: bool = False, model_options: dict | None = None) -> dict:
+	"""Score ``input_path`` chunk by chunk into ``output_path``; returns rows, seconds and rows/s.
+
+	``workers=0`` scores in this process. Otherwise at most ``max_in_flight``
+	chunks (default twice the workers) are read ahead of the writer.
+	"""
+	model_options = model_options or {}
+	start = time.perf_counter()
+	rows = 0
+	header = True
+
+	def write(scored: pd.DataFrame) -> None:
+		nonlocal rows, header
+		scored.to_csv(output_path, mode='w' if header else 'a', header=header, index=False)
+		header = False
+		rows += len(scored)
+
+	chunks = pd.read_csv(input_path, chunksize=chunksize)
+	if workers <= 0:
+		bundle = ModelBundle(**model_options)
+		for chunk in chunks:
+			write(score_chunk(bundle, chunk, suggestions))
+	else:
+		max_in_flight = max_in_flight or 2 * workers
+		with ProcessPoolExecutor(
+			max_workers=workers,
+			mp_context=multiprocessing.get_context('spawn'),
+			initializer=_init_worker,
+			initargs=(model_options,),
+		) as executor:
+			pending = deque()
+			for chunk in chunks:
+				if len(pending) >= max_in_flight:
+					write(pending.popleft().result())
+				pending.append(executor.submit(_score_in_worker, chunk, suggestions))
+			while pending:
+				write(pending.popleft().result())
+	if header:
+		# Empty input: still leave a file with the header row
+		pd.DataFrame(columns=['Predicted Sleep Disorder', 'Confidence', 'Risk Factors', 'Positive Factors']).to_csv(output_path, index=False)
+
+	seconds = time.perf_counter() - start
+	return {"rows": rows, "seconds": seconds, "rows_per_second": rows / seconds if seconds else 0.0}
+
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument('input', help="CSV in the schema of Sleep_health_and_lifestyle_dataset.csv")
+	parser.add_argument('output', help="where to write the scored CSV")
+	parser.add_argument('--chunksize', type=int, default=20_000, help="rows per chunk (default: %(default)s)")
+	parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="scoring processes, 0 to score in this process (default: %(default)s)")
+	parser.add_argument('--max-in-flight', type=int, help="chunks read ahead of the writer (default: twice --workers)")
+	parser.add_argument('--suggestions', action='store_true', help="also write the full suggestion text per row")
+	parser.add_argument('--engine', choices=['sklearn', 'flat'], default='sklearn', help="forest engine (default: %(default)s)")
+	args = parser.parse_args()
+
+	report = score_csv(
+		args.input, args.output,
+		chunksize=args.chunksize,
+		workers=args.workers,
+		max_in_flight=args.max_in_flight,
+		suggestions=args.suggestions,
+		model_options={'engine': args.engine},
+	)
+	print(f"Scored {report['rows']} rows in {report['seconds']:.2f}s ({report['rows_per_second']:.0f} rows/s) -> {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+	main()
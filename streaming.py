@@ -0,0 +1,140 @@
+import codecs
+import json
+from typing import Any, AsyncIterator
+
+from starlette.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+
+# A single record that is still undecodable after this many buffered characters is rejected
+MAX_RECORD_CHARS = 1 << 20
+_WHITESPACE = ' \t\r\n'
+_DECODER = json.JSONDecoder()
+
+Record = tuple[Any, str | None]  # (decoded value, None) or (None, error message)
+
+
+class NDJSONStreamingResponse(StreamingResponse):
+	"""StreamingResponse for bodies that keep reading the request while they stream.
+
+	Starlette's StreamingResponse listens for ``http.disconnect`` on ``receive``
+	in parallel, which would swallow the request body messages the body
+	iterator is still consuming. Here the iterator owns ``receive``: a
+	disconnect during the upload surfaces in ``request.stream()``, and the
+	server's ``send`` applies backpressure to the output.
+	"""
+
+	media_type = "application/x-ndjson"
+
+	async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+		await self.stream_response(send)
+		if self.background is not None:
+			await self.background()
+
+
+async def iter_record_batches(chunks: AsyncIterator[bytes]) -> AsyncIterator[list[Record]]:
+	"""Decode a JSON array or newline-delimited JSON upload incrementally.
+
+	Yields the records completed by each incoming chunk, so memory is bounded
+	by the chunk size rather than the upload. The format is sniffed from the
+	first non-blank byte: ``[`` starts an array, anything else is NDJSON.
+	An undecodable NDJSON line becomes an error record and decoding goes on;
+	a malformed array ends with one error record since it cannot be resynced.
+	"""
+	decoder = codecs.getincrementaldecoder('utf-8')('replace')
+	parser = None
+	async for chunk in chunks:
+		text = decoder.decode(chunk)
+		if parser is None:
+			if not text.strip():
+				continue
+			parser = _ArrayParser() if text.lstrip()[0] == '[' else _LineParser()
+		records = parser.feed(text)
+		if records:
+			yield records
+		if parser.failed:
+			return
+	if parser is not None:
+		records = parser.feed(decoder.decode(b'', final=True), final=True)
+		if records:
+			yield records
+
+
+class _LineParser:
+	def __init__(self):
+		self.buffer = ''
+		self.failed = False
+
+	def feed(self, text: str, final: bool = False) -> list[Record]:
+		lines = (self.buffer + text).split('\n')
+		self.buffer = '' if final else lines.pop()
+		records = []
+		for line in lines:
+			if not line.strip():
+				continue
+			try:
+				records.append((json.loads(line), None))
+			except ValueError as e:
+				records.append((None, f"invalid JSON: {e}"))
+		if len(self.buffer) > MAX_RECORD_CHARS:
+			self.failed = True
+			records.append((None, f"invalid JSON: line longer than {MAX_RECORD_CHARS} characters"))
+		return records
+
+
+class _ArrayParser:
+	def __init__(self):
+		self.buffer = ''
+		self.started = False
+		self.expect_value = True  # after '[' or ','
+		self.seen_value = False
+		self.finished = False
+		self.failed = False
+
+	def _fail(self, message: str) -> list[Record]:
+		self.failed = True
+		return [(None, f"invalid JSON array: {message}")]
+
+	def feed(self, text: str, final: bool = False) -> list[Record]:
+		buf = self.buffer + text
+		pos, records = 0, []
+		while True:
+			while pos < len(buf) and buf[pos] in _WHITESPACE:
+				pos += 1
+			if pos == len(buf):
+				break
+			char = buf[pos]
+			if self.finished:
+				return records + self._fail("unexpected data after the closing bracket")
+			if not self.started:
+				self.started = True
+				pos += 1  # the sniffed '['
+				continue
+			if char == ']':
+				if self.expect_value and self.seen_value:
+					return records + self._fail("trailing comma before the closing bracket")
+				self.finished = True
+				pos += 1
+				continue
+			if not self.expect_value:
+				if char != ',':
+					return records + self._fail(f"expected ',' between values, found {char!r}")
+				self.expect_value = True
+				pos += 1
+				continue
+			try:
+				value, end = _DECODER.raw_decode(buf, pos)
+			except ValueError as e:
+				if final or len(buf) - pos > MAX_RECORD_CHARS:
+					return records + self._fail(str(e))
+				break  # incomplete; wait for more data
+			if end == len(buf) and not final:
+				break  # a number may continue in the next chunk
+			records.append((value, None))
+			self.expect_value = False
+			self.seen_value = True
+			pos = end
+		self.buffer = buf[pos:]
+		if final and not self.finished and not self.failed:
+			records += self._fail("missing closing bracket")
+		return records
@@ -0,0 +1,591 @@
+import itertools
+import json
+import math
+import operator
+import statistics
+import sys
+import time
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+# NumPy and pandas are imported inside the frame methods, so serving single profiles never loads them
+if TYPE_CHECKING:
+	import numpy as np
+	import pandas as pd
+
+
+class Condition(NamedTuple):
+	"""``field op value``; ``missing`` is the outcome when the field is absent."""
+	field: str
+	op: str
+	value: Any = None
+	missing: bool = False
+
+
+class Branch(NamedTuple):
+	when: tuple[Condition, ...]
+	lines: tuple[str, ...]
+	risk: str | None = None
+	positive: str | None = None
+
+
+class Chain(NamedTuple):
+	"""An ``if``/``elif`` chain: the first branch whose conditions hold wins, and
+	only when every ``when`` condition of the chain itself holds."""
+	name: str
+	when: tuple[Condition, ...]
+	branches: tuple[Branch, ...]
+
+
+class Advice(NamedTuple):
+	suggestions: list[str]
+	risk_factors: list[str]
+	positive_factors: list[str]
+
+	@property
+	def text(self) -> str:
+		return "\n".join(self.suggestions)
+
+
+def _to_float(value):
+	# Falsy inputs (None, 0, '') count as "not provided", as in the original handlers
+	try:
+		return float(value) if value else None
+	except Exception:
+		return None
+
+
+# How each raw input is normalized before the rules see it; None means "absent"
+NORMALIZERS = {
+	'number': lambda v: v,
+	'float': _to_float,
+	'text': lambda v: v if v else None,
+	'lower': lambda v: v.lower() if v else None,
+	'lower_nonblank': lambda v: v.lower() if isinstance(v, str) and v.strip() else None,
+}
+NUMERIC_KINDS = {'number', 'float'}
+
+OPS = {
+	'present': lambda value, _: True,
+	'lt': operator.lt,
+	'le': operator.le,
+	'gt': operator.gt,
+	'ge': operator.ge,
+	'eq': operator.eq,
+	'ne': operator.ne,
+	'contains': lambda value, needle: needle in value,
+	'not_contains': lambda value, needle: needle not in value,
+}
+
+
+COMPARISONS = {'lt': '<', 'le': '<=', 'gt': '>', 'ge': '>=', 'eq': '==', 'ne': '!='}
+
+
+def _condition_source(cond: Condition, var: str, target: str) -> str:
+	if cond.op == 'present':
+		return f"{var} is not None"
+	if cond.op in COMPARISONS:
+		test = f"{var} {COMPARISONS[cond.op]} {target}"
+	elif cond.op == 'contains':
+		test = f"{target} in {var}"
+	elif cond.op == 'not_contains':
+		test = f"{target} not in {var}"
+	else:
+		raise ValueError(f"unknown rule operator {cond.op!r}")
+	if cond.missing:
+		return f"({var} is None or {test})"
+	return f"({var} is not None and {test})"
+
+
+def _compile_chains(fields: dict[str, str], chains: list[Chain], on_hit=None, init: tuple[str, ...] = ("hits = []",), result: str = "hits"):
+	"""Turn the chains into one straight-line function of the normalized values,
+	so the scalar path costs what the hand-written ``if``/``elif`` statements did.
+
+	``on_hit(chain_index, position, flat_index)`` returns the statements run
+	when a branch wins; by default its flat index is appended to ``hits``.
+	"""
+	if on_hit is None:
+		on_hit = lambda chain_index, position, flat_index: [f"hits.append({flat_index})"]
+	variables = {field: f"v{i}" for i, field in enumerate(fields)}
+	targets: list = []
+
+	def all_of(conditions):
+		parts = []
+		for cond in conditions:
+			targets.append(cond.value)
+			parts.append(_condition_source(cond, variables[cond.field], f"T[{len(targets) - 1}]"))
+		return " and ".join(parts)
+
+	lines = ["def advise(values):"]
+	lines += [f"\t{var} = values[{field!r}]" for field, var in variables.items()]
+	lines += [f"\t{statement}" for statement in init]
+	index = 0
+	for chain_index, chain in enumerate(chains):
+		indent = "\t"
+		if chain.when:
+			lines.append(f"\tif {all_of(chain.when)}:")
+			indent = "\t\t"
+		keyword = "if"
+		for position, branch in enumerate(chain.branches):
+			if branch.when:
+				lines.append(f"{indent}{keyword} {all_of(branch.when)}:")
+				keyword = "elif"
+			else:
+				# Unconditional branch: an ``else`` (anything after it is unreachable)
+				lines.append(f"{indent}if True:" if keyword == "if" else f"{indent}else:")
+			lines += [f"{indent}\t{statement}" for statement in on_hit(chain_index, position, index + position) or ["pass"]]
+			if not branch.when:
+				break
+		index += len(chain.branches)
+	lines.append(f"\treturn {result}")
+	namespace = {"T": targets}
+	exec(compile("\n".join(lines), f"<rule table {id(chains):x}>", "exec"), namespace)
+	return namespace["advise"]
+
+
+class RuleTable:
+	"""Declarative suggestion rules, evaluated per profile or over a whole DataFrame.
+
+	``fields`` maps each input to its normalizer kind. ``chains`` run in order and
+	contribute the lines, risk and positive factors of their winning branch; the
+	summary sections are appended after them and ``fallback`` is used when
+	nothing produced a line.
+	"""
+
+	def __init__(self, fields: dict[str, str], chains: list[Chain], risk_summary: tuple[str, ...] = (), positive_summary: tuple[str, ...] = (), footer: tuple[str, ...] = (), fallback: tuple[str, ...] = ()):
+		for field, kind in fields.items():
+			if kind not in NORMALIZERS:
+				raise ValueError(f"unknown normalizer {kind!r} for field {field!r}")
+		for chain in chains:
+			for cond in chain.when + tuple(c for branch in chain.branches for c in branch.when):
+				if cond.op not in OPS:
+					raise ValueError(f"unknown rule operator {cond.op!r} in rule chain {chain.name!r}")
+				if cond.field not in fields:
+					raise ValueError(f"rule chain {chain.name!r} uses undeclared field {cond.field!r}")
+		self.fields = fields
+		self.chains = chains
+		self.risk_summary = risk_summary
+		self.positive_summary = positive_summary
+		self.footer = footer
+		self.fallback = fallback
+		# Flat branch list; a branch's index is its column in evaluate_frame()
+		self.branches = [branch for chain in chains for branch in chain.branches]
+		self._normalizers = [(field, NORMALIZERS[kind]) for field, kind in fields.items()]
+		self._advise = _compile_chains(fields, chains)
+
+	def normalize(self, profile: dict) -> dict:
+		return {field: normalize(profile.get(field)) for field, normalize in self._normalizers}
+
+	def evaluate(self, profile: dict) -> Advice:
+		return self.advise(self.normalize(profile))
+
+	def advise(self, values: dict) -> Advice:
+		"""Evaluate already-normalized values (see ``normalize``)."""
+		branches = self.branches
+		return self.render([branches[i] for i in self._advise(values)])
+
+	def render(self, hits) -> Advice:
+		suggestions, risks, positives = [], [], []
+		for branch in hits:
+			suggestions += branch.lines
+			if branch.risk:
+				risks.append(branch.risk)
+			if branch.positive:
+				positives.append(branch.positive)
+		if risks:
+			suggestions += self._summary(self.risk_summary, risks)
+		if positives:
+			suggestions += self._summary(self.positive_summary, positives)
+		suggestions += self.footer
+		if not suggestions:
+			suggestions += self.fallback
+		return Advice(suggestions, risks, positives)
+
+	@staticmethod
+	def _summary(lines: tuple[str, ...], factors: list[str]) -> list[str]:
+		joined = ', '.join(factors)
+		return [line.format(factors=joined) for line in lines]
+
+	def _column(self, frame: "pd.DataFrame", field: str):
+		"""Numeric fields as a float array (NaN = absent); text fields factorized
+		into (codes, uniques) with code -1 for absent values."""
+		import numpy as np
+		import pandas as pd
+
+		kind = self.fields[field]
+		if field not in frame:
+			if kind in NUMERIC_KINDS:
+				return np.full(len(frame), np.nan)
+			return np.full(len(frame), -1), np.array([], dtype=object)
+		column = frame[field]
+		if kind == 'number':
+			return pd.to_numeric(column, errors='coerce').to_numpy(dtype=float)
+		if kind == 'float' and pd.api.types.is_numeric_dtype(column):
+			values = column.to_numpy(dtype=float)
+			return np.where(values == 0, np.nan, values)
+		# Strings and mixed columns go through the scalar normalizer so edge cases match exactly
+		values = column.map(NORMALIZERS[kind])
+		if kind in NUMERIC_KINDS:
+			return pd.to_numeric(values, errors='coerce').to_numpy(dtype=float)
+		return pd.factorize(values.to_numpy(dtype=object), use_na_sentinel=True)
+
+	@staticmethod
+	def _mask(column, cond: Condition) -> "np.ndarray":
+		import numpy as np
+
+		if isinstance(column, tuple):
+			# Text: evaluate the scalar operator once per distinct value
+			codes, uniques = column
+			present = codes >= 0
+			op = OPS[cond.op]
+			hit = np.array([bool(op(value, cond.value)) for value in uniques] + [False], dtype=bool)[codes]
+		else:
+			present = ~np.isnan(column)
+			hit = present if cond.op == 'present' else OPS[cond.op](column, cond.value)
+		return np.where(present, hit, cond.missing)
+
+	def evaluate_frame(self, frame: "pd.DataFrame") -> "np.ndarray":
+		"""Boolean (rows, branches) matrix of which branch each chain picked per row.
+
+		Every condition becomes one NumPy mask over its column; the ``elif``
+		ordering is kept by removing each branch's rows from those still open.
+		"""
+		import numpy as np
+
+		columns = {field: self._column(frame, field) for field in self.fields}
+		masks: dict[Condition, "np.ndarray"] = {}
+
+		def all_of(conditions):
+			result = np.ones(len(frame), dtype=bool)
+			for cond in conditions:
+				if cond not in masks:
+					masks[cond] = self._mask(columns[cond.field], cond)
+				result &= masks[cond]
+			return result
+
+		hits = np.zeros((len(frame), len(self.branches)), dtype=bool)
+		index = 0
+		for chain in self.chains:
+			open_rows = all_of(chain.when)
+			for branch in chain.branches:
+				hits[:, index] = open_rows & all_of(branch.when)
+				open_rows &= ~hits[:, index]
+				index += 1
+		return hits
+
+	def evaluate_many(self, frame: "pd.DataFrame") -> list[Advice]:
+		"""Advice per row of ``frame``; each distinct branch pattern is rendered once,
+		so rows with the same pattern share one Advice."""
+		import numpy as np
+
+		hits = self.evaluate_frame(frame)
+		if not len(hits):
+			return []
+		# Pack each row's branch pattern into bytes so grouping is a 1-D unique
+		packed = np.packbits(hits, axis=1)
+		codes = packed.view(np.dtype((np.void, packed.shape[1]))).ravel()
+		_, first, inverse = np.unique(codes, return_index=True, return_inverse=True)
+		rendered = [self.render([self.branches[i] for i in np.flatnonzero(hits[row])]) for row in first]
+		return [rendered[i] for i in inverse.reshape(-1)]
+
+
+class RenderedAdvice(NamedTuple):
+	text: str
+	suggestions: tuple[str, ...]
+	risk_factors: tuple[str, ...]
+	positive_factors: tuple[str, ...]
+
+
+def _json_fragment(lines: tuple[str, ...]) -> bytes:
+	# ensure_ascii=False matches both Starlette's JSONResponse and orjson
+	return b",".join(json.dumps(line, ensure_ascii=False).encode("utf-8") for line in lines)
+
+
+class SuggestionLookup:
+	"""Serves a RuleTable's rendered advice from tables precomputed at start-up.
+
+	Each request is reduced to a bucket signature, i.e. which branch won in
+	every chain. Rendering all signatures up front is out of reach (the product
+	over the chains runs into the hundreds of thousands), so consecutive chains
+	are grouped until a group has at most ``max_group_size`` outcomes, and each
+	group's concatenated text is precomputed together with the risk and
+	positive summaries for every combination of factors. Serving a request is
+	one compiled signature function, a handful of list lookups and a string
+	concatenation.
+	"""
+
+	def __init__(self, table: RuleTable, max_group_size: int = 1024):
+		start = time.perf_counter()
+		self.table = table
+		# Digit 0 of a chain means no branch won
+		radices = [len(chain.branches) + 1 for chain in table.chains]
+		self.groups: list[list[int]] = []
+		current, size = [], 1
+		for i, radix in enumerate(radices):
+			if current and size * radix > max_group_size:
+				self.groups.append(current)
+				current, size = [], 1
+			current.append(i)
+			size *= radix
+		if current:
+			self.groups.append(current)
+
+		positions = {}  # chain index -> (group index, weight of its digit)
+		for g, members in enumerate(self.groups):
+			weight = 1
+			for i in members:
+				positions[i] = (g, weight)
+				weight *= radices[i]
+		risk_steps, risk_axes = self._factor_coding('risk')
+		positive_steps, positive_axes = self._factor_coding('positive')
+
+		def on_hit(chain_index, position, flat_index):
+			g, weight = positions[chain_index]
+			statements = [f"g{g} += {weight * (position + 1)}"]
+			if (chain_index, position) in risk_steps:
+				statements.append(f"r += {risk_steps[chain_index, position]}")
+			if (chain_index, position) in positive_steps:
+				statements.append(f"p += {positive_steps[chain_index, position]}")
+			return statements
+
+		group_vars = [f"g{g}" for g in range(len(self.groups))]
+		self._signature = _compile_chains(
+			table.fields, table.chains, on_hit,
+			init=tuple(f"{var} = 0" for var in group_vars) + ("r = 0", "p = 0"),
+			result=f"({', '.join(group_vars + ['r', 'p'])})",
+		)
+
+		self._group_tables = [self._build_group(members) for members in self.groups]
+		self._risk_table = self._build_summary(risk_axes, table.risk_summary)
+		self._positive_table = self._build_summary(positive_axes, table.positive_summary)
+		self._footer = ("\n".join(table.footer), tuple(table.footer))
+		self._fallback = RenderedAdvice("\n".join(table.fallback), tuple(table.fallback), (), ())
+		# The same entries as comma-joined JSON string literals, for render_json
+		self._group_json = [[_json_fragment(entry[1]) for entry in t] for t in self._group_tables]
+		self._risk_json = [_json_fragment(entry[1]) for entry in self._risk_table]
+		self._positive_json = [_json_fragment(entry[1]) for entry in self._positive_table]
+		self._footer_json = _json_fragment(self._footer[1])
+		self._fallback_json = b"[" + _json_fragment(self._fallback.suggestions) + b"]"
+		self.full_cross_product = math.prod(radices)
+		self.build_seconds = time.perf_counter() - start
+
+	def _factor_coding(self, attr: str):
+		"""Mixed-radix code of the risk (or positive) factors a signature carries."""
+		steps, axes, weight = {}, [], 1
+		for i, chain in enumerate(self.table.chains):
+			labels = []
+			for branch in chain.branches:
+				label = getattr(branch, attr)
+				if label and label not in labels:
+					labels.append(label)
+			if not labels:
+				continue
+			for position, branch in enumerate(chain.branches):
+				if getattr(branch, attr):
+					steps[i, position] = weight * (labels.index(getattr(branch, attr)) + 1)
+			axes.append(labels)
+			weight *= len(labels) + 1
+		return steps, axes
+
+	def _build_group(self, members: list[int]) -> list[tuple[str, tuple[str, ...]]]:
+		chains = [self.table.chains[i] for i in members]
+		entries = []
+		# itertools.product varies the last axis fastest; reverse so the first chain is the low digit
+		for digits in itertools.product(*(range(len(chain.branches) + 1) for chain in reversed(chains))):
+			lines = []
+			for chain, digit in zip(chains, reversed(digits)):
+				if digit:
+					lines += chain.branches[digit - 1].lines
+			entries.append(("\n".join(lines), tuple(lines)))
+		return entries
+
+	def _build_summary(self, axes: list[list[str]], summary: tuple[str, ...]) -> list[tuple[str, tuple[str, ...], tuple[str, ...]]]:
+		entries = []
+		for digits in itertools.product(*(range(len(labels) + 1) for labels in reversed(axes))):
+			factors = tuple(labels[digit - 1] for labels, digit in zip(axes, reversed(digits)) if digit)
+			lines = tuple(self.table._summary(summary, list(factors))) if factors else ()
+			entries.append(("\n".join(lines), lines, factors))
+		return entries
+
+	def signature(self, profile: dict) -> tuple[int, ...]:
+		"""Bucket signature: one code per chain group, then the risk and positive factor codes."""
+		return self._signature(self.table.normalize(profile))
+
+	def render(self, profile: dict) -> RenderedAdvice:
+		return self.render_values(self.table.normalize(profile))
+
+	def render_values(self, values: dict) -> RenderedAdvice:
+		"""Like ``render`` for values already normalized by the table."""
+		codes = self._signature(values)
+		texts, lines = [], ()
+		for group_table, code in zip(self._group_tables, codes):
+			group_text, group_lines = group_table[code]
+			texts.append(group_text)
+			lines += group_lines
+		risk_text, risk_lines, risks = self._risk_table[codes[-2]]
+		positive_text, positive_lines, positives = self._positive_table[codes[-1]]
+		lines += risk_lines + positive_lines + self._footer[1]
+		if not lines:
+			return self._fallback
+		texts += (risk_text, positive_text, self._footer[0])
+		return RenderedAdvice("\n".join(filter(None, texts)), lines, risks, positives)
+
+	def render_json(self, profile: dict) -> bytes:
+		"""``render(profile).suggestions`` as an encoded JSON array, spliced from pre-encoded lines."""
+		codes = self._signature(self.table.normalize(profile))
+		parts = [group_json[code] for group_json, code in zip(self._group_json, codes)]
+		parts += (self._risk_json[codes[-2]], self._positive_json[codes[-1]], self._footer_json)
+		body = b",".join(filter(None, parts))
+		return b"[" + body + b"]" if body else self._fallback_json
+
+	def stats(self) -> dict:
+		tables = self._group_tables + [self._risk_table, self._positive_table]
+		entries = sum(len(t) for t in tables)
+		strings, tuples = {}, 0
+		for t in tables:
+			tuples += sys.getsizeof(t)
+			for entry in t:
+				tuples += sum(sys.getsizeof(part) for part in entry if isinstance(part, tuple)) + sys.getsizeof(entry)
+				for line in (entry[0],) + entry[1]:
+					strings[id(line)] = sys.getsizeof(line)
+		table_bytes = tuples + sum(strings.values())
+		# What rendering every signature would cost: one average text per group and summary, per signature
+		mean_text = sum(statistics.fmean(sys.getsizeof(entry[0]) for entry in t) for t in tables)
+		return {
+			"groups": [[self.table.chains[i].name for i in members] for members in self.groups],
+			"entries": entries,
+			"table_bytes": table_bytes,
+			"build_seconds": self.build_seconds,
+			"full_cross_product": self.full_cross_product,
+			"full_table_bytes_estimate": int(self.full_cross_product * mean_text),
+		}
+
+
+def _c(field: str, op: str, value: Any = None, missing: bool = False) -> Condition:
+	return Condition(field, op, value, missing)
+
+
+# Shared by the Gradio front ends (app.py, app_advanced.py)
+LIFESTYLE_RULES = RuleTable(
+	fields={
+		'age': 'number',
+		'physical_activity_level': 'number',
+		'stress_level': 'number',
+		'gender': 'lower',
+		'heart_rate': 'float',
+		'blood_pressure': 'float',
+		'sleep_disorder': 'lower_nonblank',
+		'bmi_category': 'text',
+		'daily_steps': 'float',
+	},
+	chains=[
+		Chain('age', (_c('age', 'present'),), (
+			Branch((_c('age', 'le', 12),), ("👶 **Child Health Focus**: Ensure 9-12 hours of sleep, limit screen time to 2 hours/day, and encourage 60+ minutes of physical activity.",)),
+			Branch((_c('age', 'le', 18),), ("🧑‍🎓 **Teen Health**: Focus on consistent sleep schedule (8-10 hours), balanced nutrition, and stress management during academic periods.",)),
+			Branch((_c('age', 'le', 30),), ("💪 **Young Adult**: Build healthy habits now! Focus on regular exercise, stress management, and preventive healthcare.",)),
+			Branch((_c('age', 'le', 50),), ("👨‍💼 **Mid-Life Health**: Prioritize cardiovascular health, maintain muscle mass through strength training, and manage work-life balance.",)),
+			Branch((), ("🧓 **Senior Health**: Focus on bone health, cognitive stimulation, social connections, and regular health screenings.",)),
+		)),
+		# Children with a non-zero but low activity level
+		Chain('child_activity', (_c('age', 'le', 12), _c('physical_activity_level', 'ne', 0)), (
+			Branch((_c('physical_activity_level', 'le', 2),), ("🏃 **Activity Boost**: Encourage outdoor play, sports, or active games. Consider family activities like hiking or cycling.",)),
+		)),
+		Chain('activity', (_c('physical_activity_level', 'present'),), (
+			Branch((_c('physical_activity_level', 'le', 2),), (
+				"🚶 **Activity Recommendation**: Start with 10-minute walks, gradually increase to 150 minutes/week of moderate activity.",
+				"💡 **Quick Tips**: Take stairs, park farther away, do desk exercises, or try home workout videos.",
+			), risk="Low physical activity"),
+			Branch((_c('physical_activity_level', 'le', 5),), ("👍 **Good Start**: You're moderately active! Consider adding strength training 2x/week and increasing intensity gradually.",)),
+			Branch((_c('physical_activity_level', 'le', 8),), ("🏆 **Excellent Activity Level**: Great job! Maintain your routine and consider adding variety with different activities.",)),
+			Branch((), ("🔥 **High Activity**: Outstanding! Ensure proper recovery, nutrition, and listen to your body to prevent overtraining.",)),
+		)),
+		Chain('stress', (_c('stress_level', 'present'),), (
+			Branch((_c('stress_level', 'ge', 8),), (
+				"😰 **High Stress Alert**: Consider professional help, practice daily meditation, deep breathing, or progressive muscle relaxation.",
+				"🌱 **Stress Relief**: Try yoga, nature walks, journaling, or hobbies. Limit caffeine and ensure adequate sleep.",
+			), risk="High stress level"),
+			Branch((_c('stress_level', 'ge', 6),), ("⚠️ **Moderate Stress**: Practice stress management techniques like mindfulness, regular breaks, and time management.",)),
+			Branch((_c('stress_level', 'le', 3),), ("😊 **Great Stress Management**: Keep up your stress management practices!",), positive="Low stress level"),
+		)),
+		Chain('sleep_disorder', (_c('sleep_disorder', 'present'),), (
+			Branch((_c('sleep_disorder', 'contains', 'insomnia'),), (
+				"😴 **Insomnia Management**: Maintain consistent sleep schedule, limit caffeine after 2 PM, create dark/cool bedroom environment.",
+				"🍯 **Sleep Hygiene**: Avoid screens 1 hour before bed, try chamomile tea, warm bath, or light reading.",
+			), risk="Insomnia"),
+			Branch((_c('sleep_disorder', 'contains', 'apnea'),), ("🫁 **Sleep Apnea**: Consult a sleep specialist. Consider weight management, avoid alcohol before bed, and sleep on your side.",), risk="Sleep apnea"),
+			Branch((_c('sleep_disorder', 'not_contains', 'none'),), ("🛌 **Sleep Health**: Maintain regular sleep schedule, 7-9 hours nightly, and create a relaxing bedtime routine.",)),
+		)),
+		Chain('heart_rate', (_c('heart_rate', 'present'),), (
+			Branch((_c('heart_rate', 'gt', 100),), ("💓 **Heart Rate Alert**: Resting HR >100 may indicate stress, dehydration, or medical condition. Monitor and consult healthcare provider.",), risk="Elevated heart rate"),
+			Branch((_c('heart_rate', 'lt', 60),), ("💪 **Athletic Heart**: Low resting HR can indicate good fitness, but consult doctor if experiencing symptoms.",)),
+			Branch((), (), positive="Normal heart rate"),
+		)),
+		Chain('blood_pressure', (_c('blood_pressure', 'present'),), (
+			Branch((_c('blood_pressure', 'gt', 140),), ("🩸 **High Blood Pressure**: Reduce sodium intake, increase potassium-rich foods, regular exercise, and consult healthcare provider.",), risk="High blood pressure"),
+			Branch((_c('blood_pressure', 'gt', 120),), ("⚠️ **Pre-Hypertension**: Focus on DASH diet, weight management, stress reduction, and regular monitoring.",), risk="Elevated blood pressure"),
+			Branch((), (), positive="Normal blood pressure"),
+		)),
+		Chain('bmi_category', (_c('bmi_category', 'ne', 'Normal'),), (
+			Branch((_c('bmi_category', 'contains', 'Underweight'),), ("📈 **Weight Gain**: Focus on nutrient-dense foods, strength training, and consult nutritionist for healthy weight gain.",)),
+			Branch((_c('bmi_category', 'contains', 'Overweight'),), ("⚖️ **Weight Management**: Create calorie deficit through diet and exercise, focus on whole foods, and consider professional guidance.",), risk="Weight management needed"),
+			Branch((_c('bmi_category', 'contains', 'Obese'),), ("⚖️ **Weight Management**: Create calorie deficit through diet and exercise, focus on whole foods, and consider professional guidance.",), risk="Weight management needed"),
+		)),
+		Chain('daily_steps', (_c('daily_steps', 'present'),), (
+			Branch((_c('daily_steps', 'lt', 5000),), ("👟 **Step Goal**: Aim for 7,000-10,000 steps daily. Start with small increases, use step tracker, take walking breaks.",), risk="Low daily activity"),
+			Branch((_c('daily_steps', 'lt', 8000),), ("🚶 **Good Progress**: You're getting close to optimal step count! Try adding 1,000 more steps daily.",)),
+			Branch((), (), positive="Excellent daily activity"),
+		)),
+		Chain('gender', (_c('gender', 'present'),), (
+			Branch((_c('gender', 'eq', 'female'),), ("👩 **Women's Health**: Consider iron-rich foods, calcium for bone health, and regular health screenings.",)),
+			Branch((), ("👨 **Men's Health**: Focus on heart health, prostate awareness, and regular health checkups.",)),
+		)),
+	],
+	risk_summary=(
+		"\n🚨 **Risk Factors Identified**: {factors}",
+		"💡 **Priority Actions**: Address these areas first for optimal health improvement.",
+	),
+	positive_summary=(
+		"\n✅ **Health Strengths**: {factors}",
+		"🌟 **Keep It Up**: Continue these healthy practices!",
+	),
+	footer=("\n🌿 **General Wellness**: Stay hydrated (8 glasses water/day), eat colorful fruits/vegetables, and maintain social connections.",),
+	fallback=("📝 **Complete Your Profile**: Fill in more details to receive personalized health recommendations!",),
+)
+
+
+# Rules behind the FastAPI /suggest endpoint; every rule is checked independently
+API_RULES = RuleTable(
+	fields={
+		'age': 'number',
+		'physical_activity_level': 'number',
+		'stress_level': 'number',
+		'heart_rate': 'number',
+		'blood_pressure': 'number',
+		'sleep_disorder': 'lower',
+	},
+	chains=[
+		Chain('child_activity', (), (
+			Branch((_c('age', 'le', 12), _c('physical_activity_level', 'le', 2)), ("For children below 12 years with low physical activity, encourage outdoor play and limit screen time.",)),
+		)),
+		Chain('stress', (), (
+			Branch((_c('stress_level', 'ge', 7),), ("High stress can impact health. Practice relaxation like meditation or yoga.",)),
+		)),
+		Chain('insomnia', (), (
+			Branch((_c('sleep_disorder', 'eq', 'insomnia'),), ("For insomnia, limit caffeine, include tryptophan-rich foods, and avoid heavy meals near bedtime.",)),
+		)),
+		Chain('heart_rate', (), (
+			Branch((_c('heart_rate', 'gt', 100),), ("Elevated heart rate observed. Consider consulting a healthcare professional if persistent.",)),
+		)),
+		Chain('blood_pressure', (), (
+			Branch((_c('blood_pressure', 'gt', 120),), ("Elevated blood pressure observed. Monitor regularly and consult a professional if needed.",)),
+		)),
+		Chain('all_clear', (), (
+			Branch((_c('age', 'gt', 12), _c('stress_level', 'lt', 7), _c('blood_pressure', 'le', 120, missing=True)), ("Age, stress, and blood pressure are within normal ranges. Keep up the good work!",)),
+		)),
+	],
+	fallback=("Provide more details or adjust inputs to receive tailored suggestions.",),
+)
+
+
+# Built at import so the first request is already served from the tables
+LIFESTYLE_LOOKUP = SuggestionLookup(LIFESTYLE_RULES)
+API_LOOKUP = SuggestionLookup(API_RULES)
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Generate synthetic rows in the schema of Sleep_health_and_lifestyle_dataset.csv.
+
+Rows are drawn with a smoothed bootstrap, i.e. sampling from a multivariate
+Gaussian kernel density estimate of the source data. Each synthetic row
+starts from a random source row and keeps its categorical columns, which
+preserves relationships such as BMI category vs sleep apnea. Its numeric
+columns are jittered with noise drawn from the numeric covariance matrix,
+which keeps correlations such as stress vs sleep quality and systolic vs
+diastolic. The result is shrunk back so each column keeps the source mean
+and variance.
+
+Usage:
+    python synthetic_data.py synthetic.csv --rows 10000000
+    python synthetic_data.py synthetic.csv --rows 100000 --seed 7 --report
+"""
+
+import argparse
+import sys
+import time
+from typing import Iterator
+
+import numpy as np
+import pandas as pd
+
+from train_model import DATA_FILE, split_blood_pressure
+
+
+CATEGORICAL_COLUMNS = ['Gender', 'Occupation', 'BMI Category', 'Sleep Disorder']
+# Numeric columns and the number of decimals they are rounded to
+NUMERIC_COLUMNS = {
+	'Age': 0,
+	'Sleep Duration': 1,
+	'Quality of Sleep': 0,
+	'Physical Activity Level': 0,
+	'Stress Level': 0,
+	'Heart Rate': 0,
+	'Daily Steps': 0,
+	'Systolic': 0,
+	'Diastolic': 0,
+}
+OUTPUT_COLUMNS = ['Person ID', 'Gender', 'Age', 'Occupation', 'Sleep Duration', 'Quality of Sleep', 'Physical Activity Level', 'Stress Level', 'BMI Category', 'Blood Pressure', 'Heart Rate', 'Daily Steps', 'Sleep Disorder']
+# Pairs whose correlation --report compares between the source and the synthetic rows
+KEY_CORRELATIONS = [
+	('Stress Level', 'Quality of Sleep'),
+	('Stress Level', 'Sleep Duration'),
+	('Systolic', 'Diastolic'),
+	('Physical Activity Level', 'Daily Steps'),
+	('Age', 'Systolic'),
+]
+
+
+class SyntheticCohort:
+	"""Smoothed-bootstrap sampler fitted to a DataFrame in the dataset's schema.
+
+	``bandwidth`` scales the kernel covariance relative to the data
+	covariance; 0 is a plain bootstrap. Numeric values are clipped to the
+	observed range and rounded like the source column.
+	"""
+
+	def __init__(self, data: pd.DataFrame, bandwidth: float = 0.3):
+		data = split_blood_pressure(data.copy())
+		self.bandwidth = bandwidth
+		self.categories = {
+			col: np.asarray(data[col].fillna('None').astype(str).to_numpy(), dtype=object)
+			for col in CATEGORICAL_COLUMNS
+		}
+		self.numeric = data[list(NUMERIC_COLUMNS)].to_numpy(dtype=np.float64)
+		self.mean = self.numeric.mean(axis=0)
+		# Small ridge so a constant column cannot make the covariance singular
+		cov = np.cov(self.numeric, rowvar=False) + 1e-9 * np.eye(len(NUMERIC_COLUMNS))
+		self.kernel = np.linalg.cholesky(cov) * bandwidth
+		self.low = self.numeric.min(axis=0)
+		self.high = self.numeric.max(axis=0)
+		# Jitter inflates the variance by (1 + h^2); shrinking towards the mean undoes that
+		self.shrink = 1.0 / np.sqrt(1.0 + bandwidth ** 2)
+
+	@classmethod
+	def from_csv(cls, csv_path: str = DATA_FILE, bandwidth: float = 0.3) -> "SyntheticCohort":
+		return cls(pd.read_csv(csv_path), bandwidth)
+
+	def sample(self, n_rows: int, rng: np.random.Generator, first_id: int = 1) -> pd.DataFrame:
+		"""``n_rows`` synthetic rows in the CSV schema, ``Person ID`` counting from ``first_id``."""
+		source = rng.integers(0, len(self.numeric), n_rows)
+		noise = rng.standard_normal((n_rows, len(NUMERIC_COLUMNS))) @ self.kernel.T
+		numeric = self.mean + (self.numeric[source] - self.mean + noise) * self.shrink
+		np.clip(numeric, self.low, self.high, out=numeric)
+
+		columns = {}
+		for j, (col, decimals) in enumerate(NUMERIC_COLUMNS.items()):
+			values = numeric[:, j].round(decimals)
+			columns[col] = values.astype(np.int64) if decimals == 0 else values
+		frame = pd.DataFrame({
+			'Person ID': np.arange(first_id, first_id + n_rows),
+			**{col: values[source] for col, values in self.categories.items()},
+			**columns,
+		})
+		frame['Blood Pressure'] = self._blood_pressure(columns['Systolic'], columns['Diastolic'])
+		return frame[OUTPUT_COLUMNS]
+
+	def _blood_pressure(self, systolic: np.ndarray, diastolic: np.ndarray) -> np.ndarray:
+		# Both are clipped to the observed range, so every "S/D" string fits one small table
+		s, d = list(NUMERIC_COLUMNS).index('Systolic'), list(NUMERIC_COLUMNS).index('Diastolic')
+		s_low, d_low = int(self.low[s]), int(self.low[d])
+		s_values = np.arange(s_low, int(self.high[s]) + 1)
+		d_values = np.arange(d_low, int(self.high[d]) + 1)
+		table = np.array([[f"{s}/{d}" for d in d_values] for s in s_values], dtype=object)
+		return table[systolic - s_low, diastolic - d_low]
+
+	def iter_chunks(self, n_rows: int, chunksize: int = 1_000_000, seed: int = 0) -> Iterator[pd.DataFrame]:
+		"""Stream ``n_rows`` rows; the output is fixed by ``seed`` and ``chunksize``."""
+		rng = np.random.default_rng(seed)
+		for start in range(0, n_rows, chunksize):
+			yield self.sample(min(chunksize, n_rows - start), rng, first_id=start + 1)
+
+
+def _column_strings(values: np.ndarray, decimals: int | None) -> np.ndarray:
+	if values.dtype == object:
+		return values
+	if decimals is None:
+		if values.dtype.kind not in 'iu':
+			return values.astype(str).astype(object)
+		decimals = 0
+	# Small-range numbers are formatted once per distinct value and looked up
+	codes = values.astype(np.int64) if decimals == 0 else np.rint(values * 10 ** decimals).astype(np.int64)
+	low, high = int(codes.min()), int(codes.max())
+	if high - low > 1_000_000:
+		return values.astype(str).astype(object)
+	if decimals == 0:
+		table = np.array([str(v) for v in range(low, high + 1)], dtype=object)
+	else:
+		table = np.array([f"{v / 10 ** decimals:.{decimals}f}" for v in range(low, high + 1)], dtype=object)
+	return table[codes - low]
+
+
+def format_csv(frame: pd.DataFrame, header: bool = False) -> str:
+	"""The text ``frame.to_csv(index=False)`` writes for a sampled chunk, built about 4x faster."""
+	columns = [_column_strings(frame[col].to_numpy(), NUMERIC_COLUMNS.get(col)) for col in frame.columns]
+	lines = map(",".join, zip(*columns))
+	text = "\n".join(lines) + "\n" if len(frame) else ""
+	return (",".join(frame.columns) + "\n" + text) if header else text
+
+
+def write_csv(output_path: str, n_rows: int, chunksize: int = 1_000_000, seed: int = 0, bandwidth: float = 0.3, source: str = DATA_FILE) -> dict:
+	cohort = SyntheticCohort.from_csv(source, bandwidth)
+	start = time.perf_counter()
+	with open(output_path, 'w', newline='') as f:
+		for i, chunk in enumerate(cohort.iter_chunks(n_rows, chunksize, seed)):
+			f.write(format_csv(chunk, header=i == 0))
+	seconds = time.perf_counter() - start
+	return {"rows": n_rows, "seconds": seconds, "rows_per_second": n_rows / seconds if seconds else 0.0}
+
+
+def correlation_report(real: pd.DataFrame, synthetic: pd.DataFrame) -> dict:
+	"""Key correlations plus the apnea rate per BMI category, for the source and the synthetic rows."""
+	report = {}
+	frames = {'real': split_blood_pressure(real.copy()), 'synthetic': split_blood_pressure(synthetic.copy())}
+	for a, b in KEY_CORRELATIONS:
+		report[f"corr({a}, {b})"] = {name: float(frame[a].corr(frame[b])) for name, frame in frames.items()}
+	for name, frame in frames.items():
+		apnea = frame['Sleep Disorder'].fillna('None').astype(str).eq('Sleep Apnea')
+		for bmi, rate in apnea.groupby(frame['BMI Category']).mean().items():
+			report.setdefault(f"P(apnea | BMI={bmi})", {})[name] = float(rate)
+	return report
+
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument('output', help="where to write the synthetic CSV")
+	parser.add_argument('--rows', type=int, default=100_000, help="rows to generate (default: %(default)s)")
+	parser.add_argument('--chunksize', type=int, default=1_000_000, help="rows generated and written per chunk (default: %(default)s)")
+	parser.add_argument('--seed', type=int, default=0, help="random seed (default: %(default)s)")
+	parser.add_argument('--bandwidth', type=float, default=0.3, help="kernel width relative to the data covariance, 0 for a plain bootstrap (default: %(default)s)")
+	parser.add_argument('--source', default=DATA_FILE, help="CSV to fit (default: the bundled dataset)")
+	parser.add_argument('--report', action='store_true', help="compare key correlations of the first chunk against the source")
+	args = parser.parse_args()
+
+	report = write_csv(args.output, args.rows, args.chunksize, args.seed, args.bandwidth, args.source)
+	print(f"Wrote {report['rows']} rows in {report['seconds']:.2f}s ({report['rows_per_second']:.0f} rows/s) -> {args.output}", file=sys.stderr)
+	if args.report:
+		synthetic = pd.read_csv(args.output, nrows=min(args.rows, args.chunksize))
+		for name, values in correlation_report(pd.read_csv(args.source), synthetic).items():
+			print(f"{name:<55} real {values.get('real', float('nan')):7.3f}   synthetic {values.get('synthetic', float('nan')):7.3f}")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,74 @@
+import pytest
+
+
+@pytest.fixture
+def apps(tmp_path, monkeypatch):
+	# app_advanced opens health_data.db in the working directory on import
+	monkeypatch.chdir(tmp_path)
+	import app
+	import app_advanced
+	return app, app_advanced
+
+
+ROWS = [
+	(45, 3, 8, 'Female', 85, 135, 'Insomnia', 'Overweight', 6500),
+	(10, 9, 2, 'Male', None, None, 'None', 'Normal', 12000),
+	(70, 0, 5, 'Other', 110, 150, 'Sleep Apnea', 'Obese', 1000),
+]
+
+
+def test_batched_handlers_match_single_calls(apps):
+	app, app_advanced = apps
+	columns = [list(column) for column in zip(*ROWS)]
+	assert app.suggest_health_batch(*columns) == [[app.suggest_health(*row) for row in ROWS]]
+	advanced = [row + ('', False) for row in ROWS]
+	assert app_advanced.suggest_health_advanced_batch(*map(list, zip(*advanced))) == [[app_advanced.suggest_health_advanced(*row) for row in advanced]]
+
+
+def test_demo_queues_batched_submissions(apps):
+	app, app_advanced = apps
+	for module in (app, app_advanced):
+		demo = module.build_demo()
+		submit = next(d for d in demo.config['dependencies'] if d['batch'])
+		assert submit['max_batch_size'] == module.MAX_BATCH_SIZE
+		assert demo._queue.max_size == module.QUEUE_MAX_SIZE
+		assert [fn.concurrency_limit for fn in demo.fns.values() if fn.batch] == [app.CONCURRENCY_LIMIT if module is app else 1]
+	# Every read-only view of app_advanced shares one pool of workers
+	assert {fn.concurrency_id for fn in demo.fns.values() if not fn.batch} == {'database_reads'}
+
+
+def test_batch_saves_every_submission_in_one_call(apps, tmp_path, monkeypatch):
+	_, app_advanced = apps
+	from database import HealthDatabase
+	with HealthDatabase(str(tmp_path / "batch.db")) as db:
+		monkeypatch.setattr(app_advanced, "db", db)
+		calls = []
+		save_submissions = db.save_submissions
+		monkeypatch.setattr(db, "save_submissions", lambda submissions: calls.append(len(submissions)) or save_submissions(submissions))
+		rows = [row + (name, True) for row, name in zip(ROWS, ('Ada', '', 'Grace'))]
+		[results] = app_advanced.suggest_health_advanced_batch(*map(list, zip(*rows)))
+		assert calls == [2]
+		assert 'User ID: 1 | Record ID: 1' in results[0]
+		assert 'Data Saved' not in results[1]
+		assert 'User ID: 2 | Record ID: 2' in results[2]
+		assert sorted(u['name'] for u in db.get_all_users()) == ['Ada', 'Grace']
+		assert len(db.get_health_analytics(1)) == 5
+
+
+def test_users_view_pages_through_the_database(apps, tmp_path, monkeypatch):
+	_, app_advanced = apps
+	from database import HealthDatabase
+	with HealthDatabase(str(tmp_path / "users.db")) as db:
+		monkeypatch.setattr(app_advanced, "db", db)
+		monkeypatch.setattr(app_advanced, "USERS_PAGE_SIZE", 2)
+		for name in ('Ada', 'Grace', 'Alan'):
+			db.create_user(name)
+
+		text, pager = app_advanced.get_users_page()
+		assert '(page 1)' in text and 'Alan' in text and 'Grace' in text and 'More users' in text
+		text, pager = app_advanced.get_users_page(pager, 1)
+		assert '(page 2)' in text and 'Ada' in text and 'End of list' in text
+		# Next on the last page stays there
+		assert app_advanced.get_users_page(pager, 1)[0] == text
+		text, pager = app_advanced.get_users_page(pager, -1)
+		assert '(page 1)' in text and 'Alan' in text
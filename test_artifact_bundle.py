@@ -0,0 +1,40 @@
+import json
+
+import numpy as np
+import pytest
+
+from artifact_bundle import MANIFEST_NAME, load_forest, load_manifest, save_bundle
+from inference import ModelBundle
+from test_inference import SAMPLE, SAMPLE_2
+
+
+@pytest.fixture(scope="module")
+def joblib_bundle():
+	return ModelBundle(engine='flat')
+
+
+def test_bundle_round_trip(tmp_path, joblib_bundle):
+	save_bundle(str(tmp_path), joblib_bundle.forest, joblib_bundle.scaler, joblib_bundle.label_encoders, joblib_bundle.feature_cols)
+	manifest = load_manifest(str(tmp_path))
+	forest = load_forest(str(tmp_path), manifest)
+	assert isinstance(forest.feature, np.memmap)
+	X, _ = joblib_bundle.transform_batch([SAMPLE, SAMPLE_2])
+	np.testing.assert_array_equal(forest.predict_proba(X), joblib_bundle.forest.predict_proba(X))
+	assert manifest["scaler"]["mean"] == joblib_bundle.scaler.mean_.tolist()
+
+	manifest["format_version"] = 99
+	(tmp_path / MANIFEST_NAME).write_text(json.dumps(manifest))
+	with pytest.raises(ValueError, match="version"):
+		load_manifest(str(tmp_path))
+
+
+def test_mmap_model_bundle_matches_joblib(joblib_bundle):
+	mapped = ModelBundle(engine='flat', artifact_format='mmap')
+	assert mapped.model is None
+	assert mapped.class_labels == joblib_bundle.class_labels
+	for payload in (SAMPLE, SAMPLE_2):
+		np.testing.assert_array_equal(mapped.transform_row(payload), joblib_bundle.transform_row(payload))
+		assert mapped.predict(payload) == joblib_bundle.predict(payload)
+	assert mapped.predict_batch([SAMPLE, dict(SAMPLE, gender='?')]) == joblib_bundle.predict_batch([SAMPLE, dict(SAMPLE, gender='?')])
+	with pytest.raises(ValueError, match="engine='flat'"):
+		ModelBundle(artifact_format='mmap')
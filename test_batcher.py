@@ -0,0 +1,47 @@
+import asyncio
+
+import pytest
+
+from batcher import MicroBatcher
+
+
+def test_micro_batcher_coalesces_and_keeps_order():
+	calls = []
+
+	async def predict_batch(payloads):
+		calls.append(list(payloads))
+		return [{"error": "bad"} if p < 0 else {"prediction": p * 10} for p in payloads]
+
+	async def run():
+		batcher = MicroBatcher(predict_batch, max_batch_size=4, max_wait_ms=50)
+		batcher.start()
+		try:
+			results = await asyncio.gather(*(batcher.submit(i) for i in range(10)), return_exceptions=True)
+			bad = await asyncio.gather(batcher.submit(-1), return_exceptions=True)
+		finally:
+			await batcher.stop()
+		return batcher, results, bad
+
+	batcher, results, bad = asyncio.run(run())
+	assert results == [{"prediction": i * 10} for i in range(10)]
+	assert [len(c) for c in calls] == [4, 4, 2, 1]
+	assert isinstance(bad[0], ValueError)
+	stats = batcher.stats()
+	assert stats["batch_size"]["count"] == 4
+	assert stats["queue_wait_seconds"]["count"] == 11
+
+
+def test_micro_batcher_flushes_on_max_wait_and_propagates_failures():
+	async def failing(payloads):
+		raise RuntimeError("backend down")
+
+	async def run():
+		batcher = MicroBatcher(failing, max_batch_size=64, max_wait_ms=1)
+		batcher.start()
+		try:
+			with pytest.raises(RuntimeError, match="backend down"):
+				await asyncio.wait_for(batcher.submit({}), timeout=1)
+		finally:
+			await batcher.stop()
+
+	asyncio.run(run())
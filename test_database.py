@@ -0,0 +1,165 @@
+import sqlite3
+import threading
+
+import pytest
+
+from database import MIGRATIONS, SCHEMA_VERSION, HealthDatabase, apply_migrations
+
+
+@pytest.fixture
+def db(tmp_path):
+	with HealthDatabase(str(tmp_path / "health.db"), busy_timeout=0.5) as db:
+		yield db
+
+
+def test_connection_is_configured_once_per_thread(db):
+	conn = db._connect()
+	assert conn is db._connect()
+	assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+	assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+
+	other = []
+	thread = threading.Thread(target=lambda: other.append(db._connect()))
+	thread.start()
+	thread.join()
+	assert other[0] is not conn
+	# The thread has exited, so its connection is closed and forgotten
+	assert db._connections == [conn]
+	with pytest.raises(sqlite3.ProgrammingError, match="closed"):
+		other[0].execute("SELECT 1")
+
+
+def test_short_lived_threads_do_not_leave_connections_behind(db):
+	user_id = db.create_user("Ada")
+	names = []
+	for _ in range(50):
+		thread = threading.Thread(target=lambda: names.append(db.get_user(user_id)["name"]))
+		thread.start()
+		thread.join()
+	assert names == ["Ada"] * 50
+	assert len(db._connections) == 1
+	# close() still closes the live ones, and threads reconnect afterwards
+	db.close()
+	assert db._connections == [] and db.get_user(user_id)["name"] == "Ada"
+
+
+def test_records_round_trip_and_close_reconnects(db):
+	user_id = db.create_user("Ada", age=36, gender="Female")
+	record_id = db.save_health_record(user_id, {"stress_level": 7, "risk_factors": ["High stress"]})
+	db.save_health_analytics(user_id, "stress_level", 7)
+	db.close()
+	assert db._connections == []
+
+	assert db.get_user(user_id)["name"] == "Ada"
+	history = db.get_user_health_history(user_id)
+	assert [(r["id"], r["risk_factors"]) for r in history] == [(record_id, ["High stress"])]
+	assert db.get_health_analytics(user_id)[0]["metric_value"] == 7
+
+
+def test_failed_write_does_not_hold_the_write_lock(db):
+	with pytest.raises(sqlite3.IntegrityError):
+		db.create_user(None)  # name is NOT NULL
+	# Another thread's connection can still write straight away
+	errors = []
+
+	def write():
+		try:
+			db.create_user("Grace")
+		except sqlite3.Error as e:
+			errors.append(e)
+
+	thread = threading.Thread(target=write)
+	thread.start()
+	thread.join()
+	assert errors == []
+	assert [u["name"] for u in db.get_all_users()] == ["Grace"]
+
+
+def submission(name, **analytics):
+	return {"name": name, "age": 40, "gender": "Female", "health_data": {"stress_level": 5}, "analytics": analytics}
+
+
+def test_save_submissions_returns_ids_in_order(db):
+	db.create_user("Existing")
+	saved = db.save_submissions([submission("Ada", stress_level=5, heart_rate=None), submission("Grace", daily_steps=9000)])
+	assert [db.get_user(user_id)["name"] for user_id, _ in saved] == ["Ada", "Grace"]
+	for user_id, record_id in saved:
+		assert [r["id"] for r in db.get_user_health_history(user_id)] == [record_id]
+	# Metrics without a value are skipped
+	assert [(a["metric_name"], a["metric_value"]) for a in db.get_health_analytics(saved[0][0])] == [("stress_level", 5)]
+	assert db.save_submission("Alan", {"stress_level": 3}, {"stress_level": 3})[0] == saved[-1][0] + 1
+
+
+def test_save_submissions_is_all_or_nothing(db):
+	with pytest.raises(sqlite3.IntegrityError):
+		db.save_submissions([submission("Ada", stress_level=5), submission(None)])
+	conn = db._connect()
+	assert [conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] for table in ("users", "health_records", "health_analytics")] == [0, 0, 0]
+	assert not conn.in_transaction
+
+
+def test_legacy_database_is_upgraded_in_place(tmp_path):
+	path = str(tmp_path / "legacy.db")
+	conn = sqlite3.connect(path)
+	# A database from before schema versioning: the version 1 tables, with data
+	for statement in MIGRATIONS[0][2]:
+		conn.execute(statement)
+	conn.execute("INSERT INTO users (name) VALUES ('Ada')")
+	conn.commit()
+	conn.close()
+
+	with HealthDatabase(path) as db:
+		assert db.schema_version() == SCHEMA_VERSION
+		assert db.get_user(1)["name"] == "Ada"
+		conn = db._connect()
+		assert [row[0] for row in conn.execute("SELECT version FROM schema_version ORDER BY version")] == list(range(1, SCHEMA_VERSION + 1))
+		assert apply_migrations(conn) == []
+
+
+def test_partial_migration_then_upgrade(tmp_path):
+	conn = sqlite3.connect(str(tmp_path / "partial.db"))
+	assert apply_migrations(conn, target=1) == [1]
+	assert conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'index' AND name LIKE 'idx_%'").fetchone()[0] == 0
+	assert apply_migrations(conn) == list(range(2, SCHEMA_VERSION + 1))
+	conn.close()
+
+
+def test_lookups_use_the_indexes(db):
+	conn = db._connect()
+
+	def plan(sql, *params):
+		return " ".join(row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params))
+
+	history = plan("SELECT * FROM health_records WHERE user_id = ? ORDER BY created_at DESC LIMIT ?", 1, 50)
+	assert "idx_health_records_user_created" in history and "TEMP B-TREE" not in history
+	analytics = plan("SELECT * FROM health_analytics WHERE user_id = ? AND metric_name = ? ORDER BY date_recorded DESC", 1, "stress_level")
+	assert "COVERING INDEX idx_health_analytics_user_metric" in analytics and "TEMP B-TREE" not in analytics
+
+
+def test_keyset_pages_and_iterators_cover_every_row_once(db):
+	# Created within the same second, so pages are ordered by the id tie-break
+	user_ids = [user_id for user_id, _ in db.save_submissions([submission(f"user {i}") for i in range(7)])]
+	newest_first = user_ids[::-1]
+
+	seen, cursor = [], None
+	while True:
+		users, cursor = db.get_users_page(limit=3, after=cursor)
+		seen += [u["id"] for u in users]
+		if cursor is None:
+			break
+	assert seen == newest_first
+	assert [u["id"] for u in db.iter_users(chunk_size=2)] == newest_first == [u["id"] for u in db.get_all_users()]
+
+	record_ids = [db.save_health_record(user_ids[0], {"stress_level": i}) for i in range(4)]
+	first, cursor = db.get_health_history_page(user_ids[0], limit=3)
+	rest, end = db.get_health_history_page(user_ids[0], limit=3, after=cursor)
+	assert end is None
+	assert [r["id"] for r in first + rest] == [r["id"] for r in db.iter_user_health_history(user_ids[0], chunk_size=2)]
+	# The submission's own record, then the four saved here
+	assert len(first + rest) == 5 and set(record_ids) < {r["id"] for r in first + rest}
+
+
+def test_user_pages_use_the_index(db):
+	plan = " ".join(row[3] for row in db._connect().execute(
+		"EXPLAIN QUERY PLAN SELECT * FROM users WHERE (created_at, id) < (?, ?) ORDER BY created_at DESC, id DESC LIMIT ?", ("2024-01-01", 1, 51)))
+	assert "idx_users_created" in plan and "TEMP B-TREE" not in plan
@@ -0,0 +1,59 @@
+import os
+
+import joblib
+import numpy as np
+import pytest
+
+from forest_engine import FlatForest
+from inference import ARTIFACT_DIR, ModelBundle
+from test_inference import SAMPLE, SAMPLE_2
+from train_model import load_and_prepare_dataset
+
+
+DATASET = os.path.join(os.path.dirname(__file__), 'Sleep_health_and_lifestyle_dataset.csv')
+
+
+@pytest.fixture(scope="module")
+def model():
+	return joblib.load(os.path.join(ARTIFACT_DIR, 'model.joblib'))
+
+
+def test_flat_forest_matches_sklearn_on_full_dataset(model):
+	X, _, _ = load_and_prepare_dataset(DATASET)
+	X = np.asarray(X)
+	forest = FlatForest.from_sklearn(model)
+	np.testing.assert_allclose(forest.predict_proba(X), model.predict_proba(X), rtol=0, atol=1e-12)
+	np.testing.assert_array_equal(forest.predict(X), model.predict(X))
+	# Single-row evaluation walks the same leaves as the batched one
+	for i in range(0, len(X), 37):
+		np.testing.assert_allclose(forest.predict_proba(X[i:i + 1]), model.predict_proba(X[i:i + 1]), rtol=0, atol=1e-12)
+
+
+def test_flat_forest_routes_nan_like_sklearn(model):
+	X, _, _ = load_and_prepare_dataset(DATASET)
+	X = np.asarray(X, dtype=np.float64)
+	# Every feature missing in some rows, and whole rows missing
+	rng = np.random.default_rng(0)
+	X[rng.random(X.shape) < 0.2] = np.nan
+	X[:5] = np.nan
+	forest = FlatForest.from_sklearn(model)
+	np.testing.assert_allclose(forest.predict_proba(X), model.predict_proba(X), rtol=0, atol=1e-12)
+
+
+def test_model_bundle_flat_engine():
+	sklearn_bundle = ModelBundle()
+	flat_bundle = ModelBundle(engine='flat')
+	assert isinstance(flat_bundle.forest, FlatForest)
+	for payload in (SAMPLE, SAMPLE_2):
+		expected = sklearn_bundle.predict(payload)
+		result = flat_bundle.predict(payload)
+		assert result["prediction"] == expected["prediction"]
+		assert result["probabilities"] == pytest.approx(expected["probabilities"])
+	# JSON NaN passes validation, so it reaches the forest
+	nan_payload = dict(SAMPLE, heart_rate=float('nan'))
+	assert flat_bundle.predict(nan_payload)["probabilities"] == pytest.approx(sklearn_bundle.predict(nan_payload)["probabilities"])
+	assert [r["prediction"] for r in flat_bundle.predict_batch([SAMPLE, SAMPLE_2])] == [
+		r["prediction"] for r in sklearn_bundle.predict_batch([SAMPLE, SAMPLE_2])
+	]
+	with pytest.raises(ValueError):
+		ModelBundle(engine='xgboost')
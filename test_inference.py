@@ -0,0 +1,236 @@
+import time
+
+import numpy as np
+import pytest
+
+from inference import ModelBundle
+
+
+SAMPLE = {
+	'age': 35,
+	'gender': 'Male',
+	'occupation': 'Engineer',
+	'sleep_duration': 7.5,
+	'quality_of_sleep': 8,
+	'physical_activity_level': 60,
+	'stress_level': 5,
+	'bmi_category': 'Normal',
+	'heart_rate': 70,
+	'daily_steps': 8000,
+	'systolic': 120,
+	'diastolic': 80,
+}
+SAMPLE_2 = {
+	'age': 45,
+	'gender': 'Female',
+	'occupation': 'Nurse',
+	'sleep_duration': 6.0,
+	'quality_of_sleep': 5,
+	'physical_activity_level': 90,
+	'stress_level': 8,
+	'bmi_category': 'Overweight',
+	'heart_rate': 85,
+	'daily_steps': 10000,
+	'systolic': 140,
+	'diastolic': 90,
+}
+
+
+@pytest.fixture(scope="module")
+def bundle():
+	return ModelBundle()
+
+
+def test_transform_batch_matches_transform_row(bundle):
+	X, errors = bundle.transform_batch([SAMPLE, SAMPLE_2])
+	assert errors == [None, None]
+	expected = np.vstack([bundle.transform_row(SAMPLE), bundle.transform_row(SAMPLE_2)])
+	np.testing.assert_array_equal(X, expected)
+
+
+def test_predict_batch_matches_predict(bundle):
+	results = bundle.predict_batch([SAMPLE, SAMPLE_2])
+	for payload, result in zip([SAMPLE, SAMPLE_2], results):
+		single = bundle.predict(payload)
+		assert result["prediction"] == single["prediction"]
+		assert result["confidence"] == pytest.approx(single["confidence"])
+
+
+def test_transform_columns_matches_transform_batch(bundle):
+	payloads = [SAMPLE, dict(SAMPLE, occupation='Astronaut'), SAMPLE_2, dict(SAMPLE_2, heart_rate=float('nan'))]
+	columns = {
+		key: np.array([p[key] for p in payloads], dtype=object if key in bundle.encoder.codes else float)
+		for key in SAMPLE
+	}
+	X, valid = bundle.encoder.transform_columns(columns)
+	assert valid.tolist() == [True, False, True, False]
+	np.testing.assert_array_equal(X, bundle.transform_batch([SAMPLE, SAMPLE_2])[0])
+	proba, _ = bundle.predict_proba_columns(columns)
+	assert [bundle.class_labels[i] for i in proba.argmax(axis=1)] == [r["prediction"] for r in bundle.predict_batch([SAMPLE, SAMPLE_2])]
+
+
+def test_predict_batch_reports_errors_per_row(bundle):
+	bad_occupation = dict(SAMPLE, occupation='Astronaut')
+	missing_field = {k: v for k, v in SAMPLE.items() if k != 'heart_rate'}
+	results = bundle.predict_batch([SAMPLE, bad_occupation, missing_field, SAMPLE_2])
+	assert "prediction" in results[0]
+	assert "Astronaut" in results[1]["error"]
+	assert "heart_rate" in results[2]["error"]
+	assert results[3]["prediction"] == bundle.predict(SAMPLE_2)["prediction"]
+
+
+def test_predict_batch_empty(bundle):
+	assert bundle.predict_batch([]) == []
+	assert bundle.predict_batch([dict(SAMPLE, gender='?')]) == [{"error": "unknown gender '?'"}]
+
+
+def test_stage_hooks_time_every_stage_without_changing_results(bundle):
+	expected = [bundle.predict(SAMPLE), bundle.predict_batch([SAMPLE, SAMPLE_2])]
+	calls, batch_calls = [], []
+	bundle.stage_hook = lambda stage, seconds: calls.append((stage, seconds))
+	bundle.batch_stage_hook = lambda stage, seconds: batch_calls.append((stage, seconds))
+	try:
+		assert [bundle.predict(SAMPLE), bundle.predict_batch([SAMPLE, SAMPLE_2])] == expected
+	finally:
+		bundle.stage_hook = bundle.batch_stage_hook = None
+	# Batch timings cover many rows, so they never reach the per-request hook
+	assert [stage for stage, _ in calls] == ['encode', 'scale', 'forest']
+	assert [stage for stage, _ in batch_calls] == ['encode', 'scale', 'forest']
+	assert all(seconds >= 0 for _, seconds in calls + batch_calls)
+
+
+def test_predict_single_pass_matches_sklearn_predict(bundle):
+	for payload in (SAMPLE, SAMPLE_2):
+		result = bundle.predict(payload)
+		row = bundle.transform_row(payload)
+		expected = bundle.label_encoders['Sleep Disorder'].inverse_transform(bundle.model.predict(row))[0]
+		assert result["prediction"] == expected
+		assert set(result["probabilities"]) == {'None', 'Sleep Apnea', 'Insomnia'}
+		assert sum(result["probabilities"].values()) == pytest.approx(1.0)
+		assert result["confidence"] == max(result["probabilities"].values())
+
+
+def _sklearn_transform_row(bundle, payload):
+	row = [
+		bundle.label_encoders['Gender'].transform([payload['gender']])[0],
+		payload['age'],
+		bundle.label_encoders['Occupation'].transform([payload['occupation']])[0],
+		payload['sleep_duration'],
+		payload['quality_of_sleep'],
+		payload['physical_activity_level'],
+		payload['stress_level'],
+		bundle.label_encoders['BMI Category'].transform([payload['bmi_category']])[0],
+		payload['heart_rate'],
+		payload['daily_steps'],
+		payload['systolic'],
+		payload['diastolic'],
+	]
+	return bundle.scaler.transform(np.asarray([row]))
+
+
+def test_feature_encoder_parity_with_sklearn(bundle):
+	payloads = []
+	for gender in bundle.label_encoders['Gender'].classes_:
+		for occupation in bundle.label_encoders['Occupation'].classes_:
+			for bmi in bundle.label_encoders['BMI Category'].classes_:
+				payloads.append(dict(SAMPLE_2, gender=gender, occupation=occupation, bmi_category=bmi, age=len(payloads) % 60 + 20))
+	expected = np.vstack([_sklearn_transform_row(bundle, p) for p in payloads])
+	for payload, row in zip(payloads, expected):
+		np.testing.assert_array_equal(bundle.transform_row(payload)[0], row)
+	X, errors = bundle.transform_batch(payloads)
+	assert errors == [None] * len(payloads)
+	np.testing.assert_array_equal(X, expected)
+
+
+def test_feature_encoder_rejects_unknown_category(bundle):
+	with pytest.raises(ValueError, match="Astronaut"):
+		bundle.transform_row(dict(SAMPLE, occupation='Astronaut'))
+	_, errors = bundle.transform_batch([dict(SAMPLE, age='old')])
+	assert errors == ["invalid value for 'age': 'old'"]
+
+
+def test_prediction_cache_hits_and_evictions():
+	cached = ModelBundle(cache_size=2)
+	first = cached.predict(SAMPLE)
+	# Integer and float spellings of the same profile share one entry
+	again = cached.predict(dict(SAMPLE, age=35.0, daily_steps=8000.0))
+	assert again == first
+	again["probabilities"]["None"] = -1
+	assert cached.predict(SAMPLE)["probabilities"]["None"] != -1
+	cached.predict(SAMPLE_2)
+	cached.predict(dict(SAMPLE, age=36))
+	stats = cached.cache.stats()
+	assert (stats["hits"], stats["misses"], stats["evictions"], stats["size"]) == (2, 3, 1, 2)
+	with pytest.raises(ValueError):
+		cached.predict(dict(SAMPLE, occupation='Astronaut'))
+
+
+def test_prediction_cache_ttl_and_artifact_invalidation(monkeypatch):
+	cached = ModelBundle(cache_size=8, cache_ttl=60)
+	cached.predict(SAMPLE)
+	assert len(cached.cache) == 1
+	assert cached.reload_if_changed() is False
+
+	import inference
+	monkeypatch.setattr(inference, 'artifact_signature', lambda *args: ('retrained',))
+	monkeypatch.setattr(inference, 'ARTIFACT_CHECK_INTERVAL', 0.0)
+	cached.predict(SAMPLE_2)
+	assert cached.artifact_signature == ('retrained',)
+	assert len(cached.cache) == 1
+
+	later = time.monotonic() + 120
+	monkeypatch.setattr(time, 'monotonic', lambda: later)
+	cached.predict(SAMPLE_2)
+	assert cached.cache.expirations == 1
+
+
+def test_failed_reload_keeps_serving_the_previous_artifacts(monkeypatch, caplog):
+	import joblib
+	import inference
+	bundle = ModelBundle(cache_size=8)
+	expected = bundle.predict(SAMPLE)
+	artifacts = bundle._artifacts
+
+	# A retrain is halfway through rewriting the joblib files
+	calls = []
+
+	def truncated(path):
+		calls.append(path)
+		if len(calls) > 1:
+			raise EOFError(path)
+		return real_load(path)
+
+	real_load = joblib.load
+	monkeypatch.setattr(inference, 'artifact_signature', lambda *args: ('retraining',))
+	monkeypatch.setattr(inference.joblib, 'load', truncated)
+	monkeypatch.setattr(inference, 'ARTIFACT_CHECK_INTERVAL', 0.0)
+	assert bundle.predict(SAMPLE_2)
+	assert bundle._artifacts is artifacts
+	assert bundle.artifact_signature != ('retraining',)
+	assert "Reloading the joblib artifacts failed" in caplog.text
+
+	# The next check retries, and succeeds once the files are complete
+	monkeypatch.setattr(inference.joblib, 'load', real_load)
+	assert bundle.reload_if_changed() is True
+	assert bundle.artifact_signature == ('retraining',)
+	assert bundle.predict(SAMPLE) == expected
+
+
+def test_result_computed_across_a_reload_is_not_served_from_the_cache():
+	bundle = ModelBundle(cache_size=8)
+	predict = bundle._predict
+
+	def reload_lands_mid_request(payload, artifacts=None):
+		result = predict(payload, artifacts)
+		bundle._load()  # swaps the artifacts and clears the cache before our put
+		return result
+
+	bundle._predict = reload_lands_mid_request
+	bundle.predict(SAMPLE)
+	bundle._predict = predict
+	# The entry put by the old artifacts is never a hit for the new ones
+	bundle.predict(SAMPLE)
+	stats = bundle.cache.stats()
+	assert (stats["hits"], stats["misses"]) == (0, 2)
+	bundle.predict(SAMPLE)
+	assert bundle.cache.stats()["hits"] == 1
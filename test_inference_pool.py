@@ -0,0 +1,35 @@
+import asyncio
+
+from inference_pool import InferencePool
+from test_inference import SAMPLE, SAMPLE_2
+
+
+def test_inference_pool_round_trip():
+	async def run():
+		pool = InferencePool(workers=1, max_in_flight=2)
+		pids = await pool.start()
+		try:
+			results = await asyncio.gather(*(pool.predict(p) for p in (SAMPLE, SAMPLE_2, SAMPLE)))
+			batch = await pool.predict_batch([SAMPLE, dict(SAMPLE, gender='?')])
+		finally:
+			await pool.shutdown(grace=1.0)
+		return pids, results, batch
+
+	pids, results, batch = asyncio.run(run())
+	assert len(pids) == 1
+	assert results[0] == results[2]
+	assert batch[0] == results[0]
+	assert "error" in batch[1]
+
+
+def test_inference_pool_starts_and_warms_every_worker():
+	async def run():
+		pool = InferencePool(workers=2, max_in_flight=1)
+		try:
+			return await pool.start(), await pool.warmup([SAMPLE, SAMPLE_2])
+		finally:
+			await pool.shutdown(grace=1.0)
+
+	pids, warmed = asyncio.run(run())
+	assert len(pids) == 2
+	assert warmed == pids
@@ -0,0 +1,20 @@
+import json
+
+import numpy as np
+from starlette.responses import JSONResponse
+
+from json_response import FastJSONResponse, dumps
+
+
+def test_dumps_matches_starlette_json_response():
+	content = {"prediction": "Sleep Apnea", "confidence": 0.875, "probabilities": {"None": 0.125}, "note": "Rückenschmerzen", "empty": [], "missing": None}
+	assert json.loads(dumps(content)) == content
+	assert dumps(content) == JSONResponse(content).body
+
+
+def test_numpy_values_and_pre_encoded_bytes():
+	assert json.loads(dumps({"a": np.float64(0.5), "b": np.int64(2), "c": np.arange(3)})) == {"a": 0.5, "b": 2, "c": [0, 1, 2]}
+	body = b'{"suggestions":["x"]}'
+	resp = FastJSONResponse(body)
+	assert resp.body is body
+	assert resp.headers["content-type"] == "application/json"
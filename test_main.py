@@ -0,0 +1,134 @@
+import json
+import time
+
+from fastapi.testclient import TestClient
+
+import main
+from main import app
+from test_inference import SAMPLE, SAMPLE_2
+
+
+client = TestClient(app)
+
+
+def test_suggest():
+	resp = client.post("/suggest", json={"age": 30, "physical_activity_level": 5, "stress_level": 8, "gender": "Male"})
+	assert resp.status_code == 200
+	assert resp.json()["suggestions"][0].startswith("High stress")
+
+
+def test_predict_batch_keeps_order_and_row_errors():
+	single = client.post("/predict", json=SAMPLE_2).json()
+	resp = client.post("/predict/batch", json=[SAMPLE_2, dict(SAMPLE, occupation="Astronaut"), SAMPLE])
+	assert resp.status_code == 200
+	results = resp.json()["results"]
+	assert len(results) == 3
+	assert results[0]["prediction"] == single["prediction"]
+	assert "error" in results[1]
+	assert "prediction" in results[2]
+
+
+def test_ready_after_startup_warmup():
+	with TestClient(app) as warm_client:
+		for _ in range(200):
+			resp = warm_client.get("/ready")
+			if resp.status_code == 200:
+				break
+			time.sleep(0.05)
+		assert resp.status_code == 200
+		status = resp.json()
+		assert status["ready"] is True
+		assert status["load_seconds"] >= 0
+		assert status["warmup_seconds"] >= 0
+
+
+def _ndjson(resp):
+	return [json.loads(line) for line in resp.text.splitlines()]
+
+
+def test_suggest_batch_streams_ndjson_with_trailer():
+	profile = {"age": 30, "physical_activity_level": 5, "stress_level": 8, "gender": "Male"}
+	body = "\n".join([json.dumps(profile), json.dumps({"age": "old"}), "[1", json.dumps(dict(profile, stress_level=2))])
+	resp = client.post("/suggest/batch", content=body, headers={"Content-Type": "application/x-ndjson"})
+	assert resp.status_code == 200
+	assert resp.headers["content-type"].startswith("application/x-ndjson")
+	lines = _ndjson(resp)
+	assert [line.get("index") for line in lines[:-1]] == [0, 1, 2, 3]
+	assert lines[0]["suggestions"] == client.post("/suggest", json=profile).json()["suggestions"]
+	assert "age" in lines[1]["error"]
+	assert lines[2]["error"].startswith("invalid JSON")
+	assert "suggestions" in lines[3]
+	trailer = lines[-1]["trailer"]
+	assert (trailer["count"], trailer["succeeded"], trailer["failed"]) == (4, 2, 2)
+	assert trailer["elapsed_seconds"] >= 0
+
+
+def test_suggest_batch_accepts_json_array():
+	profile = {"age": 10, "physical_activity_level": 1, "stress_level": 3, "gender": "Female"}
+	resp = client.post("/suggest/batch", json=[profile] * 3 + [5])
+	lines = _ndjson(resp)
+	assert len(lines) == 5
+	assert lines[0]["suggestions"][0].startswith("For children")
+	assert lines[3]["error"] == "expected a JSON object"
+	assert lines[-1]["trailer"]["count"] == 4
+
+
+def _sample_value(text, line_prefix):
+	return float(next(line for line in text.splitlines() if line.startswith(line_prefix)).rsplit(" ", 1)[1])
+
+
+def test_metrics_exposes_request_and_stage_metrics():
+	client.post("/predict", json=SAMPLE)
+	before = client.get("/metrics").text
+	client.post("/predict", json=SAMPLE)
+	client.post("/predict", json={"age": 30})
+	resp = client.get("/metrics")
+	assert resp.status_code == 200
+	assert resp.headers["content-type"].startswith("text/plain; version=0.0.4")
+	after = resp.text
+	ok = 'http_requests_total{method="POST",route="/predict",status="200"}'
+	assert _sample_value(after, ok) == _sample_value(before, ok) + 1
+	assert 'http_request_errors_total{method="POST",route="/predict",type="http_422"}' in after
+	for stage in ("parse", "encode", "scale", "forest", "serialize"):
+		count = f'predict_stage_seconds_count{{stage="{stage}"}}'
+		assert _sample_value(after, count) >= _sample_value(before, count) + 1
+	assert _sample_value(after, "model_load_seconds") > 0
+
+
+def test_batched_stage_timings_stay_out_of_the_per_request_histograms():
+	client.post("/predict/batch", json=[SAMPLE])
+	before = client.get("/metrics").text
+	client.post("/predict/batch", json=[SAMPLE, SAMPLE_2])
+	after = client.get("/metrics").text
+	for stage in ("encode", "scale", "forest"):
+		batch_count = f'predict_batch_stage_seconds_count{{stage="{stage}"}}'
+		assert _sample_value(after, batch_count) == _sample_value(before, batch_count) + 1
+		count = f'predict_stage_seconds_count{{stage="{stage}"}}'
+		assert _sample_value(after, count) == _sample_value(before, count)
+
+
+def test_admin_profiling_needs_a_configured_token(monkeypatch, tmp_path):
+	assert client.get("/admin/profiling").status_code == 404
+	monkeypatch.setattr(main, "PROFILE_ADMIN_TOKEN", "s3cret")
+	monkeypatch.setattr(main, "PROFILER", main.RequestProfiler(str(tmp_path)))
+	assert client.post("/admin/profiling", json={"sample_rate": 1}).status_code == 403
+	assert client.post("/admin/profiling", json={"sample_rate": 1}, headers={"X-Admin-Token": "wrong"}).status_code == 403
+
+	resp = client.post("/admin/profiling", json={"sample_rate": 1}, headers={"X-Admin-Token": "s3cret"})
+	assert resp.status_code == 200
+	assert resp.json()["sample_rate"] == 1.0
+	client.post("/suggest", json={"age": 30, "physical_activity_level": 5, "stress_level": 8, "gender": "Male"})
+	client.post("/predict", json=SAMPLE)
+	status = client.get("/admin/profiling", headers={"X-Admin-Token": "s3cret"}).json()
+	assert status["profiles_written"] == 2
+	assert [name.split("_", 1)[1].rsplit("_", 1)[0] for name in main.PROFILER.files()] == ["suggest", "predict"]
+	assert client.post("/admin/profiling", json={"sample_rate": 0}, headers={"X-Admin-Token": "s3cret"}).json()["sample_rate"] == 0.0
+
+
+def test_micro_batched_predict_is_profiled_under_its_own_route(monkeypatch, tmp_path):
+	monkeypatch.setattr(main, "MICROBATCH_OPTIONS", {"max_batch_size": 4, "max_wait_ms": 1})
+	monkeypatch.setattr(main, "PROFILER", main.RequestProfiler(str(tmp_path), sample_rate=1))
+	with TestClient(app) as batched_client:
+		assert batched_client.post("/predict", json=SAMPLE).status_code == 200
+		assert batched_client.post("/predict/batch", json=[SAMPLE]).status_code == 200
+	assert [name.split("_", 1)[1].rsplit("_", 1)[0] for name in main.PROFILER.files()] == ["predict", "predict_batch"]
@@ -0,0 +1,97 @@
+import threading
+
+import pytest
+
+from metrics import Histogram, MetricsMiddleware, Registry
+
+
+def test_sharded_counter_does_not_lose_increments_across_threads():
+	registry = Registry()
+	counter = registry.counter('jobs_total', 'Jobs')
+	histogram = registry.histogram('job_seconds', [0.1, 1.0])
+
+	def work():
+		for _ in range(10_000):
+			counter.inc()
+			histogram.observe(0.5)
+
+	threads = [threading.Thread(target=work) for _ in range(8)]
+	for t in threads:
+		t.start()
+	for t in threads:
+		t.join()
+	assert counter.value == 80_000
+	assert histogram.snapshot() == {"buckets": {'0.1': 0, '1.0': 80_000, '+Inf': 80_000}, "count": 80_000, "sum": 40_000.0}
+
+
+def test_registry_renders_prometheus_text():
+	registry = Registry()
+	registry.counter('requests_total', 'Requests', {'route': '/predict', 'status': '200'}).inc(3)
+	registry.counter('requests_total', 'Requests', {'route': '/predict', 'status': '200'}).inc()
+	gauge = registry.gauge('in_flight', 'In flight')
+	gauge.inc()
+	gauge.inc()
+	gauge.dec()
+	registry.gauge('load_seconds').set(1.5)
+	registry.register(Histogram('wait_seconds', [0.01], 'Wait "time"', labels={'stage': 'a\nb'})).observe(0.02)
+
+	assert registry.render().splitlines() == [
+		'# HELP requests_total Requests',
+		'# TYPE requests_total counter',
+		'requests_total{route="/predict",status="200"} 4',
+		'# HELP in_flight In flight',
+		'# TYPE in_flight gauge',
+		'in_flight 1',
+		'# TYPE load_seconds gauge',
+		'load_seconds 1.5',
+		'# HELP wait_seconds Wait "time"',
+		'# TYPE wait_seconds histogram',
+		'wait_seconds_bucket{stage="a\\nb",le="0.01"} 0',
+		'wait_seconds_bucket{stage="a\\nb",le="+Inf"} 1',
+		'wait_seconds_sum{stage="a\\nb"} 0.02',
+		'wait_seconds_count{stage="a\\nb"} 1',
+	]
+	with pytest.raises(ValueError, match="counter"):
+		registry.gauge('requests_total', labels={'route': '/predict', 'status': '200'})
+
+
+def test_exited_threads_fold_their_cells_into_the_total():
+	registry = Registry()
+	counter = registry.counter('jobs_total')
+	histogram = registry.histogram('job_seconds', buckets=[0.1, 1.0])
+	gauge = registry.gauge('jobs_in_flight')
+	gauge.set(5)
+
+	def work():
+		counter.inc()
+		histogram.observe(0.5)
+		gauge.inc()
+
+	for _ in range(1000):
+		thread = threading.Thread(target=work)
+		thread.start()
+		thread.join()
+	assert counter.value == 1000
+	assert histogram.snapshot()["count"] == 1000 and histogram.snapshot()["buckets"]["1.0"] == 1000
+	assert gauge.value == 1005
+	for metric in (counter, histogram, gauge):
+		assert len(metric._shards._cells) <= 1
+
+
+def test_middleware_labels_nonstandard_methods_as_other():
+	from fastapi import FastAPI
+	from fastapi.testclient import TestClient
+
+	registry = Registry()
+	app = FastAPI()
+	app.add_middleware(MetricsMiddleware, registry=registry)
+	app.get("/")(lambda: "ok")
+	client = TestClient(app)
+	client.get("/")
+	for method in ("PROPFIND", "XYZZY-1"):
+		client.request(method, "/")
+	text = registry.render()
+	assert 'http_requests_total{method="GET",route="/",status="200"} 1' in text
+	assert 'http_requests_total{method="other",route="/",status="405"} 2' in text
+	assert 'http_request_errors_total{method="other",route="/",type="http_405"} 2' in text
+	assert "PROPFIND" not in text and "XYZZY" not in text
@@ -7,7 +7,7 @@ import sys
 import os
 sys.path.append('.')
 
-from backend.inference import ModelBundle
+from inference import ModelBundle
 
 def test_model():
     """Test the trained model with sample data"""
@@ -45,6 +45,8 @@ def test_model():
         print(f"\n🎯 Prediction Result:")
         print(f"   Sleep Disorder: {result['prediction']}")
         print(f"   Confidence: {result['confidence']:.3f}")
+        assert result['prediction'] in model.class_labels
+        assert 0.0 <= result['confidence'] <= 1.0
         
         # Test with different data
         test_data_2 = {
@@ -71,17 +73,18 @@ def test_model():
         print(f"\n🎯 Prediction Result 2:")
         print(f"   Sleep Disorder: {result_2['prediction']}")
         print(f"   Confidence: {result_2['confidence']:.3f}")
+        assert result_2['prediction'] in model.class_labels
+        assert 0.0 <= result_2['confidence'] <= 1.0
         
         print(f"\n🎉 Model is working correctly!")
-        return True
         
     except Exception as e:
         print(f"❌ Error testing model: {e}")
-        return False
+        raise
 
 if __name__ == "__main__":
-    success = test_model()
-    if success:
+    try:
+        test_model()
         print("\n✅ Your model is ready for predictions!")
-    else:
+    except Exception:
         print("\n❌ Model testing failed. Please check the error above.")
@@ -0,0 +1,80 @@
+import pstats
+import threading
+
+import pytest
+
+import profiling
+from profiling import RequestProfiler
+
+
+def test_disabled_profiler_writes_nothing(tmp_path):
+	profiler = RequestProfiler(str(tmp_path / "profiles"))
+	assert profiler.maybe_call("/predict", sum, [1, 2]) == 3
+	assert profiler.files() == []
+	assert profiler.profiles_written == 0
+
+
+def test_sampled_calls_write_rotating_pstats(tmp_path):
+	profiler = RequestProfiler(str(tmp_path), sample_rate=1.0, max_files=3)
+	for i in range(5):
+		assert profiler.maybe_call("/predict/batch", sorted, [3, 1, i]) == sorted([3, 1, i])
+	files = profiler.files()
+	assert len(files) == 3
+	assert profiler.profiles_written == 5
+	assert all("_predict_batch_" in f and f.endswith("ms.pstats") for f in files)
+	stats = pstats.Stats(str(tmp_path / files[-1]))
+	assert any(func[2] == "<built-in method builtins.sorted>" for func in stats.stats)
+
+
+def test_profiler_still_writes_when_the_call_raises(tmp_path):
+	profiler = RequestProfiler(str(tmp_path), sample_rate=1.0)
+	with pytest.raises(ZeroDivisionError):
+		profiler.maybe_call("/suggest", lambda: 1 / 0)
+	assert len(profiler.files()) == 1
+	with pytest.raises(ValueError):
+		profiler.configure(sample_rate=2)
+
+
+def test_concurrent_sampled_calls_profile_one_at_a_time(tmp_path):
+	profiler = RequestProfiler(str(tmp_path), sample_rate=1.0)
+	# Every call is inside fn at the same time, as requests on the threadpool are
+	barrier = threading.Barrier(4, timeout=5)
+	results, errors = [], []
+
+	def handler(i):
+		barrier.wait()
+		return i
+
+	def request(i):
+		try:
+			results.append(profiler.maybe_call("/predict", handler, i))
+		except Exception as e:
+			errors.append(e)
+
+	threads = [threading.Thread(target=request, args=(i,)) for i in range(4)]
+	for thread in threads:
+		thread.start()
+	for thread in threads:
+		thread.join()
+	assert errors == []
+	assert sorted(results) == [0, 1, 2, 3]
+	assert profiler.profiles_written == 1
+
+
+def test_profiler_errors_never_fail_the_call(tmp_path, monkeypatch):
+	class ActiveElsewhere:
+		def enable(self):
+			raise ValueError("Another profiling tool is already active")
+
+	monkeypatch.setattr(profiling.cProfile, "Profile", ActiveElsewhere)
+	profiler = RequestProfiler(str(tmp_path), sample_rate=1.0)
+	assert profiler.maybe_call("/suggest", sum, [1, 2]) == 3
+	assert profiler.files() == []
+	monkeypatch.undo()
+
+	# The profile directory cannot be created: the call still succeeds, and so does the next one
+	blocker = tmp_path / "not-a-directory"
+	blocker.write_text("")
+	profiler = RequestProfiler(str(blocker / "profiles"), sample_rate=1.0)
+	assert profiler.maybe_call("/suggest", sum, [1, 2]) == 3
+	assert profiler.maybe_call("/suggest", sum, [3, 4]) == 7
@@ -0,0 +1,80 @@
+import pandas as pd
+import pytest
+
+from inference import ModelBundle
+from score_cohort import score_csv
+from suggestion_engine import LIFESTYLE_RULES
+from train_model import DATA_FILE
+
+
+@pytest.fixture(scope="module")
+def scored(tmp_path_factory):
+	out = tmp_path_factory.mktemp("scored") / "scored.csv"
+	report = score_csv(DATA_FILE, str(out), chunksize=100)
+	return report, pd.read_csv(out, keep_default_na=False)
+
+
+def test_score_csv_matches_model_and_rules(scored):
+	report, result = scored
+	raw = pd.read_csv(DATA_FILE)
+	assert report["rows"] == len(result) == len(raw)
+	assert result["Person ID"].tolist() == raw["Person ID"].tolist()
+
+	bundle = ModelBundle()
+	row = raw.iloc[0]
+	systolic, diastolic = map(int, row['Blood Pressure'].split('/'))
+	expected = bundle.predict({
+		'gender': row['Gender'], 'age': row['Age'], 'occupation': row['Occupation'],
+		'sleep_duration': row['Sleep Duration'], 'quality_of_sleep': row['Quality of Sleep'],
+		'physical_activity_level': row['Physical Activity Level'], 'stress_level': row['Stress Level'],
+		'bmi_category': row['BMI Category'], 'heart_rate': row['Heart Rate'], 'daily_steps': row['Daily Steps'],
+		'systolic': systolic, 'diastolic': diastolic,
+	})
+	assert result.loc[0, "Predicted Sleep Disorder"] == expected["prediction"]
+	assert result.loc[0, "Confidence"] == pytest.approx(expected["confidence"])
+
+	advice = LIFESTYLE_RULES.evaluate({
+		'age': row['Age'], 'physical_activity_level': row['Physical Activity Level'] / 10, 'stress_level': row['Stress Level'],
+		'gender': row['Gender'], 'heart_rate': row['Heart Rate'], 'blood_pressure': systolic,
+		'sleep_disorder': None, 'bmi_category': row['BMI Category'], 'daily_steps': row['Daily Steps'],
+	})
+	assert result.loc[0, "Risk Factors"] == '; '.join(advice.risk_factors)
+
+
+def test_score_csv_process_pool_matches_inline(scored, tmp_path):
+	_, inline = scored
+	out = tmp_path / "pooled.csv"
+	report = score_csv(DATA_FILE, str(out), chunksize=50, workers=1, max_in_flight=2)
+	assert report["rows"] == len(inline)
+	pd.testing.assert_frame_equal(pd.read_csv(out, keep_default_na=False), inline)
+
+
+def test_score_csv_flags_malformed_rows(tmp_path):
+	raw = pd.read_csv(DATA_FILE, nrows=3)
+	raw.loc[1, 'Blood Pressure'] = 'unknown'
+	raw.loc[2, 'Occupation'] = 'Astronaut'
+	src, out = tmp_path / "in.csv", tmp_path / "out.csv"
+	raw.to_csv(src, index=False)
+	score_csv(str(src), str(out))
+	result = pd.read_csv(out, keep_default_na=False)
+	assert result["Predicted Sleep Disorder"].tolist()[1:] == ['', '']
+	assert result["Predicted Sleep Disorder"][0] != ''
+
+
+def test_recorded_none_wins_over_the_prediction(tmp_path):
+	# Recorded as "None", predicted Insomnia and Sleep Apnea respectively
+	raw = pd.read_csv(DATA_FILE).iloc[[248, 267]]
+	assert raw['Sleep Disorder'].isna().all()
+	src, out = tmp_path / "in.csv", tmp_path / "out.csv"
+	raw.to_csv(src, index=False)
+	score_csv(str(src), str(out))
+	result = pd.read_csv(out, keep_default_na=False)
+	assert result["Predicted Sleep Disorder"].tolist() == ['Insomnia', 'Sleep Apnea']
+	for risks in result["Risk Factors"]:
+		assert 'insomnia' not in risks.lower() and 'sleep apnea' not in risks.lower()
+
+	# Without the column the prediction is used
+	raw.drop(columns=['Sleep Disorder']).to_csv(src, index=False)
+	score_csv(str(src), str(out))
+	result = pd.read_csv(out, keep_default_na=False)
+	assert 'Insomnia' in result["Risk Factors"][0]
@@ -0,0 +1,63 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+# Cumulative `import main` time, most of it FastAPI itself; a cold container must serve /suggest well under a second
+MAIN_IMPORT_BUDGET_US = 750_000
+HEAVY_MODULES = ('numpy', 'pandas', 'joblib', 'sklearn', 'gradio')
+
+
+def _run(code: str, **env) -> subprocess.CompletedProcess:
+	return subprocess.run(
+		[sys.executable, '-X', 'importtime', '-c', code],
+		cwd=HERE, capture_output=True, text=True, timeout=120,
+		env={**os.environ, **env}, check=True,
+	)
+
+
+def _imported(importtime_log: str) -> dict[str, int]:
+	"""Module name -> cumulative import time in microseconds, from ``-X importtime`` output."""
+	times = {}
+	for line in importtime_log.splitlines():
+		if line.startswith('import time:') and '|' in line:
+			_, cumulative, name = line.split('|')
+			if cumulative.strip().isdigit():
+				times[name.strip()] = int(cumulative)
+	return times
+
+
+def test_import_main_stays_light_and_within_budget():
+	# Best of three, so one slow run on a busy machine does not fail the test
+	runs = [_imported(_run('import main').stderr) for _ in range(3)]
+	assert not [m for m in HEAVY_MODULES if m in runs[0]]
+	assert min(run['main'] for run in runs) < MAIN_IMPORT_BUDGET_US
+
+
+@pytest.mark.parametrize('module', ['app', 'app_advanced'])
+def test_gradio_apps_import_without_gradio(module, tmp_path):
+	# app_advanced creates its database in the working directory
+	result = subprocess.run(
+		[sys.executable, '-c', f'import sys; sys.path.insert(0, {HERE!r}); import {module}; print("gradio" in sys.modules)'],
+		cwd=tmp_path, capture_output=True, text=True, timeout=120, check=True,
+	)
+	assert result.stdout.strip() == 'False'
+
+
+def test_fast_start_defers_the_model_to_the_first_predict():
+	code = '''
+import sys
+from fastapi.testclient import TestClient
+import main
+from test_inference import SAMPLE
+with TestClient(main.app) as client:
+	assert client.get("/ready").status_code == 200
+	assert client.post("/suggest", json={"age": 30, "physical_activity_level": 5, "stress_level": 8, "gender": "Male"}).status_code == 200
+	print("sklearn" in sys.modules)
+	assert client.post("/predict", json=SAMPLE).status_code == 200
+	print("sklearn" in sys.modules)
+'''
+	assert _run(code, EAGER_WARMUP='0').stdout.split() == ['False', 'True']
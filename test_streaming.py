@@ -0,0 +1,41 @@
+import asyncio
+
+from streaming import MAX_RECORD_CHARS, iter_record_batches
+
+
+def _decode(*chunks):
+	async def source():
+		for chunk in chunks:
+			yield chunk
+
+	async def collect():
+		return [record async for batch in iter_record_batches(source()) for record in batch]
+	return asyncio.run(collect())
+
+
+def test_array_split_across_chunks():
+	body = '[{"a": 1}, 12345, "é", {"b": [1, 2]}]'.encode()
+	# Split at every byte, including inside numbers and multi-byte characters
+	chunks = [body[i:i + 1] for i in range(len(body))]
+	assert _decode(*chunks) == [({"a": 1}, None), (12345, None), ("é", None), ({"b": [1, 2]}, None)]
+
+
+def test_ndjson_keeps_going_after_bad_line():
+	records = _decode(b'{"a": 1}\n{oops\n', b'\n{"a"', b': 2}')
+	assert records[0] == ({"a": 1}, None)
+	assert records[1][0] is None and records[1][1].startswith("invalid JSON")
+	assert records[2] == ({"a": 2}, None)
+
+
+def test_malformed_array_stops_with_one_error():
+	records = _decode(b'[{"a": 1} {"a": 2}]')
+	assert records[0] == ({"a": 1}, None)
+	assert len(records) == 2 and "expected ','" in records[1][1]
+	assert "missing closing bracket" in _decode(b'[1, 2')[-1][1]
+	assert "trailing comma" in _decode(b'[1, 2,]')[-1][1]
+	assert _decode(b'  [ ]  ') == []
+
+
+def test_oversized_ndjson_line_is_rejected():
+	records = _decode(b'{"a": "' + b'x' * (MAX_RECORD_CHARS + 10))
+	assert len(records) == 1 and "longer than" in records[0][1]
@@ -0,0 +1,282 @@
+import itertools
+import json
+import random
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+from suggestion_engine import API_LOOKUP, API_RULES, LIFESTYLE_LOOKUP, LIFESTYLE_RULES, Chain, Condition, RuleTable
+
+
+# Copies of the hand-written if-chains the rule tables replaced, kept as the parity reference
+def _legacy_lifestyle(age, physical_activity_level, stress_level, gender, heart_rate, blood_pressure, sleep_disorder, bmi_category, daily_steps):
+	suggestions = []
+	risk_factors = []
+	positive_factors = []
+
+	try:
+		heart_rate_val = float(heart_rate) if heart_rate else None
+	except Exception:
+		heart_rate_val = None
+	try:
+		bp_val = float(blood_pressure) if blood_pressure else None
+	except Exception:
+		bp_val = None
+	try:
+		steps_val = float(daily_steps) if daily_steps else None
+	except Exception:
+		steps_val = None
+
+	# Age-based recommendations
+	if age is not None:
+		if age <= 12:
+			suggestions.append("👶 **Child Health Focus**: Ensure 9-12 hours of sleep, limit screen time to 2 hours/day, and encourage 60+ minutes of physical activity.")
+			if physical_activity_level and physical_activity_level <= 2:
+				suggestions.append("🏃 **Activity Boost**: Encourage outdoor play, sports, or active games. Consider family activities like hiking or cycling.")
+		elif age <= 18:
+			suggestions.append("🧑‍🎓 **Teen Health**: Focus on consistent sleep schedule (8-10 hours), balanced nutrition, and stress management during academic periods.")
+		elif age <= 30:
+			suggestions.append("💪 **Young Adult**: Build healthy habits now! Focus on regular exercise, stress management, and preventive healthcare.")
+		elif age <= 50:
+			suggestions.append("👨‍💼 **Mid-Life Health**: Prioritize cardiovascular health, maintain muscle mass through strength training, and manage work-life balance.")
+		else:
+			suggestions.append("🧓 **Senior Health**: Focus on bone health, cognitive stimulation, social connections, and regular health screenings.")
+
+	# Physical Activity Analysis
+	if physical_activity_level is not None:
+		if physical_activity_level <= 2:
+			risk_factors.append("Low physical activity")
+			suggestions.append("🚶 **Activity Recommendation**: Start with 10-minute walks, gradually increase to 150 minutes/week of moderate activity.")
+			suggestions.append("💡 **Quick Tips**: Take stairs, park farther away, do desk exercises, or try home workout videos.")
+		elif physical_activity_level <= 5:
+			suggestions.append("👍 **Good Start**: You're moderately active! Consider adding strength training 2x/week and increasing intensity gradually.")
+		elif physical_activity_level <= 8:
+			suggestions.append("🏆 **Excellent Activity Level**: Great job! Maintain your routine and consider adding variety with different activities.")
+		else:
+			suggestions.append("🔥 **High Activity**: Outstanding! Ensure proper recovery, nutrition, and listen to your body to prevent overtraining.")
+
+	# Stress Management
+	if stress_level is not None:
+		if stress_level >= 8:
+			risk_factors.append("High stress level")
+			suggestions.append("😰 **High Stress Alert**: Consider professional help, practice daily meditation, deep breathing, or progressive muscle relaxation.")
+			suggestions.append("🌱 **Stress Relief**: Try yoga, nature walks, journaling, or hobbies. Limit caffeine and ensure adequate sleep.")
+		elif stress_level >= 6:
+			suggestions.append("⚠️ **Moderate Stress**: Practice stress management techniques like mindfulness, regular breaks, and time management.")
+		elif stress_level <= 3:
+			positive_factors.append("Low stress level")
+			suggestions.append("😊 **Great Stress Management**: Keep up your stress management practices!")
+
+	# Sleep Disorder Management
+	if isinstance(sleep_disorder, str) and sleep_disorder.strip():
+		sleep_disorder_lower = sleep_disorder.lower()
+		if "insomnia" in sleep_disorder_lower:
+			risk_factors.append("Insomnia")
+			suggestions.append("😴 **Insomnia Management**: Maintain consistent sleep schedule, limit caffeine after 2 PM, create dark/cool bedroom environment.")
+			suggestions.append("🍯 **Sleep Hygiene**: Avoid screens 1 hour before bed, try chamomile tea, warm bath, or light reading.")
+		elif "apnea" in sleep_disorder_lower:
+			risk_factors.append("Sleep apnea")
+			suggestions.append("🫁 **Sleep Apnea**: Consult a sleep specialist. Consider weight management, avoid alcohol before bed, and sleep on your side.")
+		elif "none" not in sleep_disorder_lower:
+			suggestions.append("🛌 **Sleep Health**: Maintain regular sleep schedule, 7-9 hours nightly, and create a relaxing bedtime routine.")
+
+	# Cardiovascular Health
+	if heart_rate_val is not None:
+		if heart_rate_val > 100:
+			risk_factors.append("Elevated heart rate")
+			suggestions.append("💓 **Heart Rate Alert**: Resting HR >100 may indicate stress, dehydration, or medical condition. Monitor and consult healthcare provider.")
+		elif heart_rate_val < 60:
+			suggestions.append("💪 **Athletic Heart**: Low resting HR can indicate good fitness, but consult doctor if experiencing symptoms.")
+		else:
+			positive_factors.append("Normal heart rate")
+
+	if bp_val is not None:
+		if bp_val > 140:
+			risk_factors.append("High blood pressure")
+			suggestions.append("🩸 **High Blood Pressure**: Reduce sodium intake, increase potassium-rich foods, regular exercise, and consult healthcare provider.")
+		elif bp_val > 120:
+			risk_factors.append("Elevated blood pressure")
+			suggestions.append("⚠️ **Pre-Hypertension**: Focus on DASH diet, weight management, stress reduction, and regular monitoring.")
+		else:
+			positive_factors.append("Normal blood pressure")
+
+	# BMI and Weight Management
+	if bmi_category and bmi_category != "Normal":
+		if "Underweight" in bmi_category:
+			suggestions.append("📈 **Weight Gain**: Focus on nutrient-dense foods, strength training, and consult nutritionist for healthy weight gain.")
+		elif "Overweight" in bmi_category or "Obese" in bmi_category:
+			risk_factors.append("Weight management needed")
+			suggestions.append("⚖️ **Weight Management**: Create calorie deficit through diet and exercise, focus on whole foods, and consider professional guidance.")
+
+	# Daily Steps Analysis
+	if steps_val is not None:
+		if steps_val < 5000:
+			risk_factors.append("Low daily activity")
+			suggestions.append("👟 **Step Goal**: Aim for 7,000-10,000 steps daily. Start with small increases, use step tracker, take walking breaks.")
+		elif steps_val < 8000:
+			suggestions.append("🚶 **Good Progress**: You're getting close to optimal step count! Try adding 1,000 more steps daily.")
+		else:
+			positive_factors.append("Excellent daily activity")
+
+	# Gender-specific recommendations
+	if gender:
+		if gender.lower() == "female":
+			suggestions.append("👩 **Women's Health**: Consider iron-rich foods, calcium for bone health, and regular health screenings.")
+		else:
+			suggestions.append("👨 **Men's Health**: Focus on heart health, prostate awareness, and regular health checkups.")
+
+	# Comprehensive Health Summary
+	if risk_factors:
+		suggestions.append(f"\n🚨 **Risk Factors Identified**: {', '.join(risk_factors)}")
+		suggestions.append("💡 **Priority Actions**: Address these areas first for optimal health improvement.")
+
+	if positive_factors:
+		suggestions.append(f"\n✅ **Health Strengths**: {', '.join(positive_factors)}")
+		suggestions.append("🌟 **Keep It Up**: Continue these healthy practices!")
+
+	# General wellness tips
+	suggestions.append("\n🌿 **General Wellness**: Stay hydrated (8 glasses water/day), eat colorful fruits/vegetables, and maintain social connections.")
+
+	if not suggestions:
+		suggestions.append("📝 **Complete Your Profile**: Fill in more details to receive personalized health recommendations!")
+
+	return "\n".join(suggestions)
+
+
+def _legacy_api(req) -> list[str]:
+	suggestions: list[str] = []
+
+	if req.age <= 12 and req.physical_activity_level <= 2:
+		suggestions.append(
+			"For children below 12 years with low physical activity, encourage outdoor play and limit screen time."
+		)
+
+	if req.stress_level >= 7:
+		suggestions.append(
+			"High stress can impact health. Practice relaxation like meditation or yoga."
+		)
+
+	if (req.sleep_disorder or "").lower() == "insomnia":
+		suggestions.append(
+			"For insomnia, limit caffeine, include tryptophan-rich foods, and avoid heavy meals near bedtime."
+		)
+
+	if req.heart_rate is not None and req.heart_rate > 100:
+		suggestions.append(
+			"Elevated heart rate observed. Consider consulting a healthcare professional if persistent."
+		)
+	if req.blood_pressure is not None and req.blood_pressure > 120:
+		suggestions.append(
+			"Elevated blood pressure observed. Monitor regularly and consult a professional if needed."
+		)
+
+	if req.age > 12 and req.stress_level < 7 and (req.blood_pressure is None or req.blood_pressure <= 120):
+		suggestions.append(
+			"Age, stress, and blood pressure are within normal ranges. Keep up the good work!"
+		)
+
+	if not suggestions:
+		suggestions.append("Provide more details or adjust inputs to receive tailored suggestions.")
+
+	return suggestions
+
+
+LIFESTYLE_GRID = {
+	'age': [None, 0, 5, 12, 12.5, 18, 30, 31, 50, 51, 90],
+	'physical_activity_level': [None, 0, 1, 2, 2.5, 5, 8, 9],
+	'stress_level': [None, 0, 3, 4, 6, 7.5, 8, 10],
+	'gender': [None, '', 'Female', 'FEMALE', 'Male', 'Other'],
+	'heart_rate': [None, 0, '', 'abc', 59, 60, 100, 100.5, '101'],
+	'blood_pressure': [None, 0, 120, 121, 140, 141],
+	'sleep_disorder': [None, '', '  ', 'None', 'Insomnia', 'Sleep Apnea', 'Restless Leg Syndrome', 'insomnia and apnea'],
+	'bmi_category': [None, '', 'Normal', 'Underweight', 'Overweight', 'Obese'],
+	'daily_steps': [None, 0, 4999, 5000, 7999, 8000],
+}
+
+
+def _sample_profiles(grid, n, seed=0):
+	# The full cross product is millions of profiles; a seeded sample keeps the test fast
+	rng = random.Random(seed)
+	return [{key: rng.choice(values) for key, values in grid.items()} for _ in range(n)]
+
+
+def _lifestyle_args(profile):
+	return [profile[k] for k in ('age', 'physical_activity_level', 'stress_level', 'gender', 'heart_rate', 'blood_pressure', 'sleep_disorder', 'bmi_category', 'daily_steps')]
+
+
+def test_lifestyle_rules_match_legacy_text():
+	for profile in _sample_profiles(LIFESTYLE_GRID, 5000):
+		assert LIFESTYLE_RULES.evaluate(profile).text == _legacy_lifestyle(*_lifestyle_args(profile)), profile
+
+
+def test_lifestyle_frame_matches_scalar():
+	profiles = _sample_profiles(LIFESTYLE_GRID, 2000, seed=1)
+	frame = pd.DataFrame(profiles)
+	for profile, advice in zip(profiles, LIFESTYLE_RULES.evaluate_many(frame)):
+		assert advice == LIFESTYLE_RULES.evaluate(profile), profile
+
+
+def test_numeric_frame_columns_are_vectorized_exactly():
+	frame = pd.DataFrame({'age': [10, 40, 70], 'physical_activity_level': [1, 0, 9.5], 'heart_rate': [0, 55.0, 120], 'daily_steps': [3000, 0, 9000]})
+	advice = LIFESTYLE_RULES.evaluate_many(frame)
+	expected = [LIFESTYLE_RULES.evaluate(row) for row in frame.to_dict('records')]
+	assert advice == expected
+	assert advice[0].risk_factors == ["Low physical activity", "Low daily activity"]
+
+
+def test_api_rules_match_legacy():
+	grid = {
+		'age': [0, 12, 13, 60],
+		'physical_activity_level': [0, 2, 2.5],
+		'stress_level': [0, 6.9, 7],
+		'heart_rate': [None, 0, 100, 101],
+		'blood_pressure': [None, 0, 120, 121],
+		'sleep_disorder': [None, '', 'Insomnia', 'insomnia ', 'None'],
+	}
+	profiles = [dict(zip(grid, combo)) for combo in itertools.product(*grid.values())]
+	for profile in profiles:
+		assert API_RULES.evaluate(profile).suggestions == _legacy_api(SimpleNamespace(**profile)), profile
+	assert [a.suggestions for a in API_RULES.evaluate_many(pd.DataFrame(profiles))] == [_legacy_api(SimpleNamespace(**p)) for p in profiles]
+
+
+def test_rule_table_rejects_undeclared_fields():
+	with pytest.raises(ValueError, match="stress_level"):
+		RuleTable(fields={'age': 'number'}, chains=[Chain('bad', (Condition('stress_level', 'ge', 8),), ())])
+
+
+def test_lookup_matches_rule_table():
+	for profile in _sample_profiles(LIFESTYLE_GRID, 5000, seed=2):
+		rendered = LIFESTYLE_LOOKUP.render(profile)
+		advice = LIFESTYLE_RULES.evaluate(profile)
+		assert rendered.text == advice.text, profile
+		assert list(rendered.suggestions) == advice.suggestions
+		assert list(rendered.risk_factors) == advice.risk_factors
+		assert list(rendered.positive_factors) == advice.positive_factors
+
+
+def test_lookup_api_fallback_and_signature():
+	profile = {'age': 30, 'physical_activity_level': 5, 'stress_level': 8}
+	assert list(API_LOOKUP.render(profile).suggestions) == API_RULES.evaluate(profile).suggestions
+	# Same buckets, different raw values: same signature
+	assert API_LOOKUP.signature(profile) == API_LOOKUP.signature(dict(profile, stress_level=9.5))
+	assert API_LOOKUP.signature(profile) != API_LOOKUP.signature(dict(profile, stress_level=3))
+	child = {'age': 5, 'physical_activity_level': 5, 'stress_level': 3}
+	assert list(API_LOOKUP.render(child).suggestions) == API_RULES.evaluate(child).suggestions == list(API_RULES.fallback)
+
+
+def test_lookup_render_json_matches_render():
+	api_profiles = [
+		{'age': 5, 'physical_activity_level': 5, 'stress_level': 3},
+		{'age': 30, 'physical_activity_level': 1, 'stress_level': 8, 'heart_rate': 110, 'blood_pressure': 150, 'sleep_disorder': 'Insomnia'},
+	]
+	for lookup, profiles in [(API_LOOKUP, api_profiles), (LIFESTYLE_LOOKUP, _sample_profiles(LIFESTYLE_GRID, 2000, seed=3))]:
+		for profile in profiles:
+			assert json.loads(lookup.render_json(profile)) == list(lookup.render(profile).suggestions), profile
+
+
+def test_lookup_stats():
+	stats = LIFESTYLE_LOOKUP.stats()
+	assert stats["entries"] < stats["full_cross_product"]
+	assert 0 < stats["table_bytes"] < stats["full_table_bytes_estimate"]
+	assert [name for group in stats["groups"] for name in group] == [chain.name for chain in LIFESTYLE_RULES.chains]
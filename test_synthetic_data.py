@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+
+from synthetic_data import SyntheticCohort, correlation_report, format_csv, write_csv
+from train_model import DATA_FILE, load_and_prepare_dataset
+
+
+def test_chunks_are_deterministic_and_in_schema():
+	cohort = SyntheticCohort.from_csv()
+	first = pd.concat(cohort.iter_chunks(2500, chunksize=1000, seed=7), ignore_index=True)
+	again = pd.concat(cohort.iter_chunks(2500, chunksize=1000, seed=7), ignore_index=True)
+	pd.testing.assert_frame_equal(first, again)
+	assert not first.equals(pd.concat(cohort.iter_chunks(2500, chunksize=1000, seed=8), ignore_index=True))
+
+	real = pd.read_csv(DATA_FILE)
+	assert list(first.columns) == list(real.columns)
+	assert first['Person ID'].tolist() == list(range(1, 2501))
+	for col in ['Age', 'Stress Level', 'Daily Steps']:
+		assert real[col].min() <= first[col].min() and first[col].max() <= real[col].max()
+	assert set(first['Occupation']) <= set(real['Occupation'])
+
+
+def test_key_correlations_are_preserved():
+	cohort = SyntheticCohort.from_csv()
+	synthetic = cohort.sample(50_000, np.random.default_rng(0))
+	report = correlation_report(pd.read_csv(DATA_FILE), synthetic)
+	for name in ['corr(Stress Level, Quality of Sleep)', 'corr(Systolic, Diastolic)']:
+		assert abs(report[name]['real'] - report[name]['synthetic']) < 0.05, name
+	assert abs(report['P(apnea | BMI=Obese)']['real'] - report['P(apnea | BMI=Obese)']['synthetic']) < 0.05
+
+
+def test_written_csv_matches_to_csv_and_trains(tmp_path):
+	cohort = SyntheticCohort.from_csv()
+	frame = cohort.sample(500, np.random.default_rng(1))
+	assert format_csv(frame, header=True) == frame.to_csv(index=False)
+
+	out = tmp_path / "synthetic.csv"
+	report = write_csv(str(out), 3000, chunksize=1000, seed=3)
+	assert report["rows"] == 3000
+	X, y, _ = load_and_prepare_dataset(str(out))
+	assert X.shape == (3000, 12) and len(y) == 3000
@@ -0,0 +1,34 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from train_model import pareto_frontier, split_blood_pressure, sweep_and_save
+
+
+def test_pareto_frontier():
+	candidates = [
+		{"name": "big", "accuracy": 0.95, "flat_row_us": 100.0},
+		{"name": "small", "accuracy": 0.93, "flat_row_us": 30.0},
+		{"name": "dominated", "accuracy": 0.92, "flat_row_us": 50.0},
+	]
+	assert [c["name"] for c in pareto_frontier(candidates)] == ["big", "small"]
+
+
+def test_sweep_saves_smallest_model_within_tolerance(tmp_path):
+	report = sweep_and_save(tolerance=1.0, artifact_dir=str(tmp_path), n_estimators=[5, 10], max_depths=[2, None])
+	assert report["chosen"]["node_count"] == min(c["node_count"] for c in report["candidates"])
+	assert os.path.exists(tmp_path / 'model.joblib')
+	assert os.path.exists(tmp_path / 'bundle' / 'manifest.json')
+	with open(tmp_path / 'frontier.json') as f:
+		assert json.load(f)["chosen"] == report["chosen"]
+
+
+def test_split_blood_pressure():
+	data = split_blood_pressure(pd.DataFrame({'Blood Pressure': ['126/83', '140/95']}))
+	assert list(data.columns) == ['Systolic', 'Diastolic']
+	assert data.values.tolist() == [[126, 83], [140, 95]]
+	coerced = split_blood_pressure(pd.DataFrame({'Blood Pressure': ['120/80', 'n/a', None]}), errors='coerce')
+	assert coerced['Systolic'].tolist()[0] == 120
+	assert np.isnan(coerced.values[1:]).all()
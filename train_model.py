@@ -1,4 +1,8 @@
+import argparse
+import json
 import os
+import statistics
+import time
 import joblib
 import pandas as pd
 import numpy as np
@@ -6,21 +10,40 @@ from sklearn import preprocessing
 from sklearn.model_selection import train_test_split
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import accuracy_score, classification_report
+from artifact_bundle import save_bundle
+from forest_engine import FlatForest
 
 
-DATA_FILE = os.path.join(os.path.dirname(__file__), "..", "Sleep_health_and_lifestyle_dataset.csv")
+DATA_FILE = os.path.join(os.path.dirname(__file__), "Sleep_health_and_lifestyle_dataset.csv")
 ARTIFACT_DIR = os.path.join(os.path.dirname(__file__), "artifacts")
+BUNDLE_DIR = os.path.join(ARTIFACT_DIR, "bundle")
 os.makedirs(ARTIFACT_DIR, exist_ok=True)
 
 
+# Spellings in the raw data that the label encoders know under another name
+BMI_CATEGORY_ALIASES = {'Normal Weight': 'Normal'}
+
+
+def split_blood_pressure(data: pd.DataFrame, errors: str = 'raise') -> pd.DataFrame:
+	"""Replace the "126/83" 'Blood Pressure' column with Systolic and Diastolic columns.
+
+	With ``errors='coerce'`` malformed readings become NaN instead of raising.
+	"""
+	parts = data['Blood Pressure'].astype(str).str.split('/', n=1, expand=True)
+	if errors == 'coerce':
+		parts = parts.reindex(columns=[0, 1])
+		data[['Systolic', 'Diastolic']] = parts.apply(pd.to_numeric, errors='coerce').to_numpy()
+	else:
+		data[['Systolic', 'Diastolic']] = parts.astype(int)
+	return data.drop('Blood Pressure', axis=1)
+
+
 def load_and_prepare_dataset(csv_path: str) -> tuple[pd.DataFrame, pd.Series, dict]:
 	data = pd.read_csv(csv_path)
 	data['Sleep Disorder'] = data['Sleep Disorder'].fillna('None')
-	data['BMI Category'] = data['BMI Category'].replace({'Normal Weight': 'Normal'})
+	data['BMI Category'] = data['BMI Category'].replace(BMI_CATEGORY_ALIASES)
 
-	# Split blood pressure
-	data[['Systolic', 'Diastolic']] = data['Blood Pressure'].str.split('/', expand=True).astype(int)
-	data = data.drop('Blood Pressure', axis=1)
+	data = split_blood_pressure(data)
 
 	# Label encoders
 	label_encoders: dict[str, preprocessing.LabelEncoder] = {}
@@ -53,11 +76,20 @@ def load_and_prepare_dataset(csv_path: str) -> tuple[pd.DataFrame, pd.Series, di
 	return pd.DataFrame(X_scaled, columns=feature_cols), pd.Series(y), artifacts
 
 
-def train_and_save():
+# Candidate ensembles for the latency/accuracy sweep
+SWEEP_N_ESTIMATORS = [5, 10, 25, 50, 100, 200]
+SWEEP_MAX_DEPTHS = [4, 6, 8, None]
+
+
+def build_model(n_estimators: int = 200, max_depth: int | None = None) -> RandomForestClassifier:
+	return RandomForestClassifier(max_depth=max_depth, min_samples_leaf=1, min_samples_split=10, n_estimators=n_estimators, random_state=42)
+
+
+def train_and_save(artifact_dir: str = ARTIFACT_DIR):
 	X, y, artifacts = load_and_prepare_dataset(DATA_FILE)
 	X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.3, random_state=42, stratify=y)
 
-	model = RandomForestClassifier(max_depth=None, min_samples_leaf=1, min_samples_split=10, n_estimators=200, random_state=42)
+	model = build_model()
 	model.fit(X_train, y_train)
 
 	pred = model.predict(X_test)
@@ -65,15 +97,132 @@ def train_and_save():
 	print(f"Accuracy: {acc:.4f}")
 	print(classification_report(y_test, pred))
 
-	# Save artifacts
-	joblib.dump(model, os.path.join(ARTIFACT_DIR, 'model.joblib'))
-	joblib.dump(artifacts['scaler'], os.path.join(ARTIFACT_DIR, 'scaler.joblib'))
-	joblib.dump(artifacts['label_encoders'], os.path.join(ARTIFACT_DIR, 'label_encoders.joblib'))
-	joblib.dump(artifacts['feature_cols'], os.path.join(ARTIFACT_DIR, 'feature_cols.joblib'))
-	print(f"Saved artifacts to {ARTIFACT_DIR}")
+	save_artifacts(model, artifacts, artifact_dir)
+
+
+def save_artifacts(model, artifacts: dict, artifact_dir: str = ARTIFACT_DIR) -> None:
+	os.makedirs(artifact_dir, exist_ok=True)
+	joblib.dump(model, os.path.join(artifact_dir, 'model.joblib'))
+	joblib.dump(artifacts['scaler'], os.path.join(artifact_dir, 'scaler.joblib'))
+	joblib.dump(artifacts['label_encoders'], os.path.join(artifact_dir, 'label_encoders.joblib'))
+	joblib.dump(artifacts['feature_cols'], os.path.join(artifact_dir, 'feature_cols.joblib'))
+	print(f"Saved artifacts to {artifact_dir}")
+	export_bundle(model, artifacts, os.path.join(artifact_dir, 'bundle'))
+
+
+def export_bundle(model, artifacts: dict, bundle_dir: str = BUNDLE_DIR) -> None:
+	# Single versioned bundle that ModelBundle(artifact_format='mmap') memory-maps
+	manifest_path = save_bundle(
+		bundle_dir,
+		FlatForest.from_sklearn(model),
+		artifacts['scaler'],
+		artifacts['label_encoders'],
+		artifacts['feature_cols'],
+	)
+	print(f"Saved memory-mappable bundle to {os.path.dirname(manifest_path)}")
+
+
+def export_existing_bundle() -> None:
+	model = joblib.load(os.path.join(ARTIFACT_DIR, 'model.joblib'))
+	artifacts = {
+		'scaler': joblib.load(os.path.join(ARTIFACT_DIR, 'scaler.joblib')),
+		'label_encoders': joblib.load(os.path.join(ARTIFACT_DIR, 'label_encoders.joblib')),
+		'feature_cols': joblib.load(os.path.join(ARTIFACT_DIR, 'feature_cols.joblib')),
+	}
+	export_bundle(model, artifacts)
+
+
+def _median_us(fn, repeat: int) -> float:
+	fn()
+	timings = []
+	for _ in range(repeat):
+		start = time.perf_counter()
+		fn()
+		timings.append((time.perf_counter() - start) * 1e6)
+	return statistics.median(timings)
+
+
+def measure_candidate(model, X_test: np.ndarray, y_test: np.ndarray, repeat: int = 30) -> dict:
+	forest = FlatForest.from_sklearn(model)
+	row = X_test[:1]
+	return {
+		"n_estimators": model.n_estimators,
+		"max_depth": model.max_depth,
+		"node_count": forest.node_count,
+		"accuracy": accuracy_score(y_test, model.predict(X_test)),
+		"sklearn_row_us": _median_us(lambda: model.predict_proba(row), repeat),
+		"sklearn_batch_us_per_row": _median_us(lambda: model.predict_proba(X_test), repeat) / len(X_test),
+		"flat_row_us": _median_us(lambda: forest.predict_proba(row), repeat),
+		"flat_batch_us_per_row": _median_us(lambda: forest.predict_proba(X_test), repeat) / len(X_test),
+	}
+
+
+def pareto_frontier(candidates: list[dict], latency_key: str = 'flat_row_us') -> list[dict]:
+	"""Candidates no other candidate beats on both accuracy and latency."""
+	return [
+		c for c in candidates
+		if not any(
+			o['accuracy'] >= c['accuracy'] and o[latency_key] <= c[latency_key]
+			and (o['accuracy'] > c['accuracy'] or o[latency_key] < c[latency_key])
+			for o in candidates
+		)
+	]
+
+
+def sweep_and_save(tolerance: float = 0.01, artifact_dir: str = ARTIFACT_DIR, n_estimators: list[int] = SWEEP_N_ESTIMATORS, max_depths: list = SWEEP_MAX_DEPTHS) -> dict:
+	"""Fit every (n_estimators, max_depth) candidate, then save the smallest forest
+	whose held-out accuracy is within ``tolerance`` of the best one, plus a
+	frontier report of accuracy against single-row and batched latency.
+	"""
+	X, y, artifacts = load_and_prepare_dataset(DATA_FILE)
+	X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.3, random_state=42, stratify=y)
+	X_test = np.asarray(X_test)
+
+	candidates, models = [], []
+	for n in n_estimators:
+		for depth in max_depths:
+			model = build_model(n_estimators=n, max_depth=depth)
+			model.fit(np.asarray(X_train), y_train)
+			candidates.append(measure_candidate(model, X_test, np.asarray(y_test)))
+			models.append(model)
+			c = candidates[-1]
+			print(f"trees={n:<4} depth={str(depth):<5} nodes={c['node_count']:<6} acc={c['accuracy']:.4f} "
+				f"row sklearn={c['sklearn_row_us']:.0f}us flat={c['flat_row_us']:.0f}us")
+
+	best_accuracy = max(c['accuracy'] for c in candidates)
+	eligible = [i for i, c in enumerate(candidates) if c['accuracy'] >= best_accuracy - tolerance]
+	chosen = min(eligible, key=lambda i: (candidates[i]['node_count'], candidates[i]['flat_row_us']))
+	frontier = pareto_frontier(candidates)
+	report = {
+		"tolerance": tolerance,
+		"best_accuracy": best_accuracy,
+		"chosen": candidates[chosen],
+		"frontier": frontier,
+		"candidates": candidates,
+	}
+
+	print(f"Chosen: {candidates[chosen]['n_estimators']} trees, max_depth={candidates[chosen]['max_depth']}, "
+		f"accuracy {candidates[chosen]['accuracy']:.4f} (best {best_accuracy:.4f}, tolerance {tolerance})")
+	save_artifacts(models[chosen], artifacts, artifact_dir)
+	report_path = os.path.join(artifact_dir, 'frontier.json')
+	with open(report_path, 'w') as f:
+		json.dump(report, f, indent=2)
+	print(f"Saved frontier report to {report_path}")
+	return report
 
 
 if __name__ == "__main__":
-	train_and_save()
+	parser = argparse.ArgumentParser(description="Train the sleep disorder model and save its artifacts")
+	parser.add_argument('--export-bundle', action='store_true', help="only convert the existing joblib artifacts into the memory-mappable bundle")
+	parser.add_argument('--sweep', action='store_true', help="sweep tree count and depth, save the smallest forest within --tolerance of the best accuracy")
+	parser.add_argument('--tolerance', type=float, default=0.01, help="accuracy the sweep may give up for a smaller forest (default: 0.01)")
+	parser.add_argument('--artifact-dir', default=ARTIFACT_DIR, help="where to write the artifacts (default: %(default)s)")
+	args = parser.parse_args()
+	if args.export_bundle:
+		export_existing_bundle()
+	elif args.sweep:
+		sweep_and_save(tolerance=args.tolerance, artifact_dir=args.artifact_dir)
+	else:
+		train_and_save(args.artifact_dir)
 
 